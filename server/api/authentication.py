@@ -0,0 +1,136 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.permissions import SAFE_METHODS, AllowAny
+from rest_framework.settings import api_settings
+
+AUTH_GENERATION_KEY = 'api:token_auth_generation:{user_id}'
+TOKEN_CACHE_KEY = 'api:token_auth:{digest}'
+
+_local_cache = None
+
+
+def _generation_cache():
+    """Where user generations live: TOKEN_AUTH_SHARED_CACHE if set, otherwise the default cache"""
+    return _get_shared_cache() or cache
+
+
+def get_auth_generation(user_id):
+    """Return the user's token cache generation, bumped whenever the user or one of their tokens changes"""
+    key = AUTH_GENERATION_KEY.format(user_id=user_id)
+    generations = _generation_cache()
+    generation = generations.get(key)
+    if generation is None:
+        # Seed with the clock so a restarted cache never reuses an old generation
+        generation = int(time.time() * 1000)
+        if not generations.add(key, generation, timeout=None):
+            generation = generations.get(key, generation)
+    return generation
+
+
+def _token_cache_key(key):
+    return TOKEN_CACHE_KEY.format(digest=hashlib.sha256(key.encode()).hexdigest())
+
+
+def invalidate_token_cache(user_id, key=None):
+    """Drop the user's cached token lookups, and the entry for token key if given.
+
+    The entry itself goes from this process's cache and the shared one;
+    other processes' local copies are dropped by bumping the user's
+    generation. That only reaches them through a shared cache, so deployments
+    with several workers need TOKEN_AUTH_SHARED_CACHE or a shared default
+    cache; otherwise other workers can honour a revoked token for up to
+    TOKEN_AUTH_CACHE_TIMEOUT seconds.
+    """
+    if key is not None:
+        cache_key = _token_cache_key(key)
+        _get_local_cache().delete(cache_key)
+        shared_cache = _get_shared_cache()
+        if shared_cache is not None:
+            shared_cache.delete(cache_key)
+    generations = _generation_cache()
+    try:
+        generations.incr(AUTH_GENERATION_KEY.format(user_id=user_id))
+    except ValueError:
+        get_auth_generation(user_id)
+        generations.incr(AUTH_GENERATION_KEY.format(user_id=user_id))
+
+
+def _get_local_cache():
+    global _local_cache
+    if _local_cache is None:
+        _local_cache = LocMemCache('api-token-auth', {
+            'TIMEOUT': getattr(settings, 'TOKEN_AUTH_CACHE_TIMEOUT', 60),
+            'OPTIONS': {'MAX_ENTRIES': getattr(settings, 'TOKEN_AUTH_CACHE_MAX_ENTRIES', 1000)},
+        })
+    return _local_cache
+
+
+def _get_shared_cache():
+    alias = getattr(settings, 'TOKEN_AUTH_SHARED_CACHE', None)
+    return caches[alias] if alias else None
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that remembers resolved tokens.
+
+    Lookups go to a bounded in-process cache first, then to the cache named
+    by TOKEN_AUTH_SHARED_CACHE if set, and only then to the database.
+    Entries are keyed by the token's digest and carry the owner's generation
+    stamp, which api/signals.py bumps when that user changes (a password
+    change or deactivation) or one of their tokens is deleted (logout,
+    rotation); an entry from an older generation is treated as a miss. Other
+    users' entries are left alone.
+
+    Safe requests to views that set public_read = True and allow anonymous
+    access are not authenticated at all, so anonymous catalog reads carrying
+    a token cost no query.
+    """
+
+    def authenticate(self, request):
+        view = (getattr(request, 'parser_context', None) or {}).get('view')
+        if self.skip_authentication(request, view):
+            return None
+        return super().authenticate(request)
+
+    def skip_authentication(self, request, view):
+        if view is None or not getattr(view, 'public_read', False) or request.method not in SAFE_METHODS:
+            return False
+        return all(isinstance(permission, AllowAny) for permission in view.get_permissions())
+
+    def authenticate_credentials(self, key):
+        cache_key = _token_cache_key(key)
+        local_cache = _get_local_cache()
+        shared_cache = _get_shared_cache()
+
+        entry = local_cache.get(cache_key)
+        if entry is None and shared_cache is not None:
+            entry = shared_cache.get(cache_key)
+            if entry is not None:
+                local_cache.set(cache_key, entry)
+        if entry is not None:
+            token, generation = entry
+            if generation == get_auth_generation(token.user_id):
+                return (token.user, token)
+
+        # Raises AuthenticationFailed for unknown keys and inactive users, which aren't cached
+        user, token = super().authenticate_credentials(key)
+        # The owner is only known now, so a change landing between the lookup
+        # and this read is missed until the entry times out
+        generation = get_auth_generation(user.pk)
+        local_cache.set(cache_key, (token, generation))
+        if shared_cache is not None:
+            shared_cache.set(cache_key, (token, generation), getattr(settings, 'TOKEN_AUTH_CACHE_TIMEOUT', 60))
+        return (user, token)
+
+
+def cached_authentication_classes():
+    """DEFAULT_AUTHENTICATION_CLASSES with TokenAuthentication swapped for CachedTokenAuthentication"""
+    return [
+        CachedTokenAuthentication if authentication is TokenAuthentication else authentication
+        for authentication in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    ]
@@ -0,0 +1,115 @@
+import time
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Count, Max
+
+CATALOG_CACHE_ALIAS = 'catalog'
+CATALOG_VERSION_KEY = 'api:catalog_version'
+
+
+def get_catalog_cache():
+    """CACHES['catalog'] if configured, otherwise the default cache.
+
+    State that every worker must agree on (the catalog version, favorite
+    ids) lives here, so multi-worker deployments need it to be shared.
+    """
+    return caches[CATALOG_CACHE_ALIAS if CATALOG_CACHE_ALIAS in settings.CACHES else DEFAULT_CACHE_ALIAS]
+
+
+def _is_shared(store):
+    return not isinstance(store, (LocMemCache, DummyCache))
+
+
+def require_shared_catalog_cache(workers):
+    """Raise ImproperlyConfigured when several workers would each keep their own catalog cache.
+
+    The catalog version, ETags and cached favorite ids only agree across
+    workers through a shared cache; with local memory each worker would see
+    another's writes late or not at all. Called from gunicorn.conf.py.
+    """
+    if workers > 1 and not _is_shared(get_catalog_cache()):
+        raise ImproperlyConfigured(
+            f"{workers} workers need a shared catalog cache: configure CACHES['catalog'] "
+            "(or the default cache) with a backend such as Redis or Memcached, or run one worker"
+        )
+
+
+def database_stamp():
+    """A stamp read from the Laptop table itself (latest updated_at and row count), the same in every process"""
+    from .models import Laptop
+
+    stats = Laptop.objects.aggregate(latest=Max('updated_at'), count=Count('pk'))
+    latest = int(stats['latest'].timestamp() * 1_000_000) if stats['latest'] else 0
+    return f'db-{latest}-{stats["count"]}'
+
+
+def get_catalog_version():
+    """Return the current catalog version stamp.
+
+    The stamp changes whenever a Laptop is written, so anything derived from
+    the catalog can compare stamps instead of re-reading the table. Treat it
+    as opaque: it is only ever compared and put into cache keys.
+
+    With a shared cache (CACHES['catalog'], or a default cache that isn't
+    local memory) the stamp is a counter there that every process bumps.
+    A local-memory cache is only allowed with a single worker (see
+    require_shared_catalog_cache), but scripts such as import_data.py still
+    write from another process, so there the stamp is read from the table
+    and kept for CATALOG_VERSION_TTL seconds: such writes show up within
+    that time, at the cost of one aggregate query per TTL.
+    """
+    store = get_catalog_cache()
+    version = store.get(CATALOG_VERSION_KEY)
+    if version is None:
+        if _is_shared(store):
+            # Seed with the clock so a restarted cache never reuses an old stamp
+            version, timeout = int(time.time() * 1000), None
+        else:
+            version, timeout = database_stamp(), getattr(settings, 'CATALOG_VERSION_TTL', 5)
+        if not store.add(CATALOG_VERSION_KEY, version, timeout=timeout):
+            version = store.get(CATALOG_VERSION_KEY, version)
+    return version
+
+
+def bump_catalog_version():
+    """Invalidate everything derived from the catalog"""
+    store = get_catalog_cache()
+    if not _is_shared(store):
+        # The next read takes a fresh stamp from the table. Dropping it again
+        # on commit stops another thread from keeping one read in between.
+        store.delete(CATALOG_VERSION_KEY)
+        transaction.on_commit(lambda: store.delete(CATALOG_VERSION_KEY))
+        return None
+    try:
+        return store.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        get_catalog_version()
+        return store.incr(CATALOG_VERSION_KEY)
+
+
+# Catalog filters that take comma-separated lists where order and repeats don't matter
+LIST_FILTER_PARAMS = ['brand', 'category', 'storage', 'screen_size', 'performance']
+
+
+def canonical_params(params, ignore=()):
+    """Return a sorted, deduplicated tuple of (name, value) pairs for cache keys.
+
+    Comma lists in LIST_FILTER_PARAMS are sorted and deduplicated, so
+    brand=HP,Dell and brand=Dell,HP,HP normalize to the same key.
+    """
+    canonical = []
+    for name in sorted(params.keys()):
+        if name in ignore:
+            continue
+        for value in params.getlist(name):
+            if not value:
+                continue
+            if name in LIST_FILTER_PARAMS:
+                value = ','.join(sorted(set(value.split(','))))
+            canonical.append((name, value))
+    return tuple(canonical)
@@ -0,0 +1,289 @@
+import threading
+import time
+from collections.abc import Sequence
+from decimal import Decimal, InvalidOperation
+
+import numpy as np
+from django.conf import settings
+from rest_framework.filters import SearchFilter
+
+from .catalog import get_catalog_version
+from .models import Laptop
+from .search import search_scores
+from .serializers import LaptopSerializer
+from .specs import (
+    HIGH_PERFORMANCE_GPU_CLASSES, PERFORMANCE_CPU_TIERS, CPU_TIER_HIGH,
+    parse_int_list, screen_size_range,
+)
+
+SORTABLE_FIELDS = {field.name for field in Laptop._meta.concrete_fields}
+
+
+def catalog_engine_enabled():
+    """Whether list requests use the engine; with CATALOG_ENGINE_ENABLED off they go through the ORM.
+
+    The setting only picks the list path. facets and recommend have no ORM
+    version and always read the engine, so a worker that serves them builds
+    it on first use whatever the setting says.
+    """
+    return getattr(settings, 'CATALOG_ENGINE_ENABLED', False)
+
+
+def _parse_price(value):
+    """Parse a price bound the way LaptopFilter's NumberFilter does, or raise ValueError"""
+    try:
+        price = Decimal(value.strip())
+    except (InvalidOperation, AttributeError):
+        raise ValueError(f"Invalid price filter: {value}")
+    if not price.is_finite():
+        raise ValueError(f"Invalid price filter: {value}")
+    return float(price)
+
+
+def _lower(values):
+    return np.array([(value or '').lower() for value in values], dtype=str)
+
+
+def _isin(column, choices):
+    # Elementwise == instead of np.isin, which sorts and chokes on None in object columns
+    mask = np.zeros(len(column), dtype=bool)
+    for choice in set(choices):
+        mask |= column == choice
+    return mask
+
+
+def _contains(lowered, term):
+    return np.char.find(lowered, term.lower()) >= 0
+
+
+class RowSequence(Sequence):
+    """Lazily maps a slice of matched positions to the pre-serialized rows"""
+
+    def __init__(self, rows, positions):
+        self.rows = rows
+        self.positions = positions
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self.rows[i] for i in self.positions[item]]
+        return self.rows[self.positions[item]]
+
+
+class CatalogEngine:
+    """An in-memory, column-per-field copy of the Laptop table.
+
+    Filters are evaluated as NumPy boolean masks and orderings as lexsorted
+    rank arrays, so a list request only slices already serialized rows. The
+    snapshot is tagged with the catalog version it was built from.
+    """
+
+    def __init__(self, laptops, version):
+        self.version = version
+        self.built_at = time.monotonic()
+        self.rows = list(LaptopSerializer(laptops, many=True).data)
+        self.position = {laptop.pk: i for i, laptop in enumerate(laptops)}
+
+        self.brand = np.array([laptop.brand for laptop in laptops], dtype=object)
+        self.category = np.array([laptop.category for laptop in laptops], dtype=object)
+        self.condition = np.array([laptop.condition for laptop in laptops], dtype=object)
+        self.gpu_class = np.array([laptop.gpu_class for laptop in laptops], dtype=object)
+        self.cpu_tier = np.array([laptop.cpu_tier for laptop in laptops], dtype=np.int16)
+        self.price = self._floats(laptop.price for laptop in laptops)
+        self.ram_gb = self._floats(laptop.ram_gb for laptop in laptops)
+        self.storage_gb = self._floats(laptop.storage_gb for laptop in laptops)
+        self.display_inches = self._floats(laptop.display_inches for laptop in laptops)
+
+        self.brand_lower = _lower(laptop.brand for laptop in laptops)
+        self.processor_lower = _lower(laptop.processor for laptop in laptops)
+
+        self._ranks = {}
+        self._orders = {}
+
+    @classmethod
+    def load(cls, version):
+        return cls(list(Laptop.objects.all()), version)
+
+    @staticmethod
+    def _floats(values):
+        return np.array([np.nan if value is None else float(value) for value in values], dtype=float)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def filter_masks(self, params, search_terms=(), relevance=None):
+        """Return {filter name: boolean mask} for every filter present in params.
+
+        Mirrors LaptopViewSet.get_queryset plus LaptopFilter and
+        RankedSearchFilter; relevance may be passed in if already computed.
+        Raises ValueError for input the ORM path would reject.
+        """
+        masks = {}
+
+        brand = params.get('brand')
+        if brand:
+            masks['brand'] = _isin(self.brand, brand.split(','))
+
+        category = params.get('category')
+        if category:
+            masks['category'] = _isin(self.category, category.split(','))
+
+        storage = params.get('storage')
+        if storage:
+            masks['storage'] = np.isin(self.storage_gb, parse_int_list(storage.split(',')))
+
+        screen_size = params.get('screen_size')
+        if screen_size:
+            mask = np.zeros(len(self), dtype=bool)
+            for value in screen_size.split(','):
+                bounds = screen_size_range(value)
+                if bounds:
+                    mask |= (self.display_inches >= float(bounds[0])) & (self.display_inches < float(bounds[1]))
+            masks['screen_size'] = mask
+
+        min_price = params.get('min_price')
+        max_price = params.get('max_price')
+        if min_price or max_price:
+            mask = np.ones(len(self), dtype=bool)
+            if min_price:
+                mask &= self.price >= _parse_price(min_price)
+            if max_price:
+                mask &= self.price <= _parse_price(max_price)
+            masks['price'] = mask
+
+        condition = params.get('condition')
+        if condition:
+            masks['condition'] = self.condition == condition
+
+        performance = params.get('performance')
+        if performance:
+            mask = None
+            for level in performance.split(','):
+                level_mask = self.performance_mask(level)
+                if level_mask is not None:
+                    mask = level_mask if mask is None else mask | level_mask
+            if mask is not None:
+                masks['performance'] = mask
+
+        processor = params.get('processor')
+        if processor:
+            masks['processor'] = _contains(self.processor_lower, processor)
+
+        if search_terms:
+            if relevance is None:
+                relevance = self.search_relevance(search_terms, by_relevance=not params.get('ordering'))
+            masks['search'] = relevance > 0
+
+        return masks
+
+    def search_relevance(self, search_terms, by_relevance=True):
+        """Per-row search score from the search index, 0 for rows that don't match (see search_scores)"""
+        relevance = np.zeros(len(self), dtype=float)
+        for pk, score in search_scores(search_terms, by_relevance).items():
+            position = self.position.get(pk)
+            if position is not None:
+                relevance[position] = score
+        return relevance
+
+    def performance_mask(self, level):
+        """Rows at a performance level, or None for an unknown level"""
+        tier = PERFORMANCE_CPU_TIERS.get(level)
+        if tier is None:
+            return None
+        mask = self.cpu_tier == tier
+        if tier == CPU_TIER_HIGH:
+            mask &= _isin(self.gpu_class, HIGH_PERFORMANCE_GPU_CLASSES)
+        return mask
+
+    def combine(self, masks, exclude=None):
+        mask = np.ones(len(self), dtype=bool)
+        for name, filter_mask in masks.items():
+            if name != exclude:
+                mask &= filter_mask
+        return mask
+
+    def _rank(self, field):
+        """Dense rank of each row by field, in the database's own collation"""
+        ranks = self._ranks.get(field)
+        if ranks is None:
+            ranks = np.full(len(self), len(self), dtype=np.int64)
+            rank = -1
+            previous = object()
+            for pk, value in Laptop.objects.order_by(field, 'pk').values_list('pk', field):
+                if rank < 0 or value != previous:
+                    rank += 1
+                    previous = value
+                position = self.position.get(pk)
+                if position is not None:
+                    ranks[position] = rank
+            self._ranks[field] = ranks
+        return ranks
+
+    def sort_order(self, ordering=None):
+        """Return row positions in list order, or None for orderings we can't mirror"""
+        key = ordering or ''
+        order = self._orders.get(key)
+        if order is not None:
+            return order
+
+        if ordering:
+            if ',' in ordering:
+                return None
+            field = ordering.lstrip('-')
+            field = 'id' if field == 'pk' else field
+            if field not in SORTABLE_FIELDS:
+                return None
+            rank = self._rank(field)
+            sort_keys = [-rank if ordering.startswith('-') else rank]
+        else:
+            sort_keys = [self._rank(field) for field in Laptop._meta.ordering]
+
+        # np.lexsort sorts by the last key first, pk is the final tie-breaker
+        order = np.lexsort([self._rank('id')] + sort_keys[::-1])
+        self._orders[key] = order
+        return order
+
+    def query(self, request):
+        """Return the matching rows as a RowSequence, or None to fall back to the ORM"""
+        params = request.query_params
+        search_terms = SearchFilter().get_search_terms(request)
+        ordering = params.get('ordering')
+        relevance = self.search_relevance(search_terms, by_relevance=not ordering) if search_terms else None
+        try:
+            masks = self.filter_masks(params, search_terms, relevance)
+        except ValueError:
+            return None
+        order = self.sort_order(ordering)
+        if order is None:
+            return None
+        mask = self.combine(masks)
+        positions = order[mask[order]]
+        if relevance is not None and not ordering:
+            # Best matches first, the default ordering breaks ties
+            positions = positions[np.argsort(-relevance[positions], kind='stable')]
+        return RowSequence(self.rows, positions)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def _is_stale(engine, version):
+    # The age limit covers writes that skip the Laptop signals, such as QuerySet.update()
+    max_age = getattr(settings, 'CATALOG_ENGINE_MAX_AGE', 300)
+    return engine is None or engine.version != version or time.monotonic() - engine.built_at > max_age
+
+
+def get_catalog_engine():
+    """Return this worker's engine, rebuilding it if the catalog version moved on"""
+    global _engine
+    version = get_catalog_version()
+    engine = _engine
+    if _is_stale(engine, version):
+        with _engine_lock:
+            if _is_stale(_engine, version):
+                _engine = CatalogEngine.load(version)
+            engine = _engine
+    return engine
@@ -0,0 +1,85 @@
+import asyncio
+import json
+import weakref
+
+from django.conf import settings
+
+# In-flight request limits per URL prefix; the longest matching prefix applies.
+# Sync views each hold a thread for their whole run under ASGI, so the catch-all
+# limit also bounds the threads catalog reads can take.
+DEFAULT_CONCURRENCY_LIMITS = {
+    '/server/api/': 64,
+    '/server/api/auth/google/callback/': 100,
+    '/server/api/chatbot/': 50,
+    '/server/api/laptop-finder/': 16,
+}
+
+# One set of semaphores per event loop: asyncio primitives can't be shared across loops
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def get_concurrency_limits():
+    return getattr(settings, 'ASGI_CONCURRENCY_LIMITS', DEFAULT_CONCURRENCY_LIMITS)
+
+
+def match_limit(path, limits):
+    """Return (prefix, limit) of the longest prefix matching path, or (None, None)"""
+    best = None
+    for prefix in limits:
+        if path.startswith(prefix) and (best is None or len(prefix) > len(best)):
+            best = prefix
+    return best, limits.get(best)
+
+
+def _get_semaphore(prefix, limit):
+    loop = asyncio.get_running_loop()
+    semaphores = _semaphores.setdefault(loop, {})
+    semaphore = semaphores.get(prefix)
+    if semaphore is None:
+        semaphore = semaphores[prefix] = asyncio.Semaphore(limit)
+    return semaphore
+
+
+async def _send_busy(send, retry_after):
+    body = json.dumps({"error": "Server busy, please retry shortly"}).encode()
+    await send({
+        'type': 'http.response.start',
+        'status': 503,
+        'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode()),
+            (b'retry-after', str(retry_after).encode()),
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+class ConcurrencyLimiter:
+    """ASGI wrapper capping in-flight requests per URL prefix.
+
+    A burst of slow upstream calls (LLM, Google) can then only take its own
+    share of a worker; requests past a limit wait up to
+    ASGI_CONCURRENCY_QUEUE_TIMEOUT seconds for a slot and are answered with
+    a 503 and Retry-After if none frees up, instead of queueing without end.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        prefix, limit = match_limit(scope['path'], get_concurrency_limits())
+        if prefix is None:
+            return await self.app(scope, receive, send)
+
+        semaphore = _get_semaphore(prefix, limit)
+        timeout = getattr(settings, 'ASGI_CONCURRENCY_QUEUE_TIMEOUT', 10)
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout)
+        except asyncio.TimeoutError:
+            return await _send_busy(send, max(1, round(timeout)))
+        try:
+            return await self.app(scope, receive, send)
+        finally:
+            semaphore.release()
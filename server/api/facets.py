@@ -0,0 +1,70 @@
+import hashlib
+from collections import Counter
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from .catalog import canonical_params
+from .specs import PERFORMANCE_CPU_TIERS
+
+# Paging and ordering never change facet counts
+FACET_IGNORED_PARAMS = ('page', 'page_size', 'ordering', 'format')
+
+
+def _buckets(column, mask, key=None):
+    counts = Counter(value for value in column[mask] if value is not None and value == value)
+    buckets = [{'value': key(value) if key else value, 'count': count} for value, count in counts.items()]
+    buckets.sort(key=lambda bucket: (-bucket['count'], str(bucket['value'])))
+    return buckets
+
+
+def _inches(value):
+    return float(f'{value:.2f}'.rstrip('0').rstrip('.'))
+
+
+def compute_facets(engine, params, search_terms=()):
+    """Count the matches for every filter option with disjunctive faceting.
+
+    Each facet is counted over the rows that match every *other* active
+    filter, so the sidebar shows how many laptops each option would add.
+    Raises ValueError for input the list endpoint would reject.
+    """
+    masks = engine.filter_masks(params, search_terms)
+
+    performance_mask = engine.combine(masks, exclude='performance')
+    performance = []
+    for level in PERFORMANCE_CPU_TIERS:
+        performance.append({'value': level, 'count': int(np.count_nonzero(performance_mask & engine.performance_mask(level)))})
+
+    price_mask = engine.combine(masks, exclude='price')
+    prices = engine.price[price_mask]
+    prices = prices[~np.isnan(prices)]
+
+    return {
+        'count': int(np.count_nonzero(engine.combine(masks))),
+        'facets': {
+            'brand': _buckets(engine.brand, engine.combine(masks, exclude='brand')),
+            'category': _buckets(engine.category, engine.combine(masks, exclude='category')),
+            'condition': _buckets(engine.condition, engine.combine(masks, exclude='condition')),
+            'storage': _buckets(engine.storage_gb, engine.combine(masks, exclude='storage'), key=int),
+            'screen_size': _buckets(engine.display_inches, engine.combine(masks, exclude='screen_size'), key=_inches),
+            'performance': performance,
+        },
+        'price': {
+            'min': float(prices.min()) if len(prices) else None,
+            'max': float(prices.max()) if len(prices) else None,
+        },
+    }
+
+
+def get_facets(engine, request, search_terms=()):
+    """compute_facets, cached per catalog version and normalized filter set"""
+    params = canonical_params(request.query_params, ignore=FACET_IGNORED_PARAMS)
+    digest = hashlib.sha1(repr(params).encode()).hexdigest()
+    key = f'api:facets:{engine.version}:{digest}'
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(engine, request.query_params, search_terms)
+        cache.set(key, facets, getattr(settings, 'CATALOG_FACETS_CACHE_TIMEOUT', 300))
+    return facets
@@ -0,0 +1,89 @@
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from .catalog import get_catalog_cache, get_catalog_version
+from .models import Favorite, Laptop
+
+
+def favorite_ids_key(user_id):
+    # Deleting a laptop cascades to favorites and bumps the catalog version
+    return f'api:favorite_ids:{get_catalog_version()}:{user_id}'
+
+
+def invalidate_favorite_ids(user_id):
+    get_catalog_cache().delete(favorite_ids_key(user_id))
+
+
+def get_favorite_laptop_ids(user_id):
+    """Return the user's favorited laptop ids, most recent first, from the cache when possible.
+
+    The ids live in the catalog cache, so a change made through one worker
+    is seen by the others once that cache is shared.
+    """
+    key = favorite_ids_key(user_id)
+    store = get_catalog_cache()
+    laptop_ids = store.get(key)
+    if laptop_ids is None:
+        laptop_ids = list(Favorite.objects.filter(user_id=user_id).values_list('laptop_id', flat=True))
+        store.set(key, laptop_ids, getattr(settings, 'FAVORITE_IDS_CACHE_TIMEOUT', 300))
+    return laptop_ids
+
+
+def toggle_favorite(user_id, laptop_id):
+    """Remove the favorite if it exists, otherwise add it; returns 'removed' or 'added'.
+
+    Removing is a single DELETE, which doubles as the existence check.
+    Adding takes three statements: that DELETE, a check that the laptop
+    exists and the INSERT. The INSERT relies on the (user, laptop) unique
+    constraint, so when two toggles race, one adds the favorite and the
+    other hits the constraint and removes it again, the same as if they had
+    run one after the other. Raises Laptop.DoesNotExist when adding an
+    unknown laptop.
+    """
+    with transaction.atomic():
+        deleted, _ = Favorite.objects.filter(user_id=user_id, laptop_id=laptop_id).delete()
+        if deleted:
+            status = 'removed'
+        else:
+            if not Laptop.objects.filter(pk=laptop_id).exists():
+                raise Laptop.DoesNotExist(laptop_id)
+            try:
+                with transaction.atomic():
+                    Favorite.objects.create(user_id=user_id, laptop_id=laptop_id)
+                status = 'added'
+            except IntegrityError:
+                # A concurrent toggle added it since the DELETE
+                Favorite.objects.filter(user_id=user_id, laptop_id=laptop_id).delete()
+                status = 'removed'
+    invalidate_favorite_ids(user_id)
+    return status
+
+
+def apply_favorite_changes(user_id, add=(), remove=()):
+    """Add and remove several favorites in one transaction.
+
+    Returns the laptop ids actually added, the ids removed, and the ids in
+    add that don't exist.
+    """
+    add = list(dict.fromkeys(add))
+    remove = list(dict.fromkeys(remove))
+    with transaction.atomic():
+        removed = []
+        if remove:
+            removed = list(Favorite.objects.filter(user_id=user_id, laptop_id__in=remove).values_list('laptop_id', flat=True))
+            Favorite.objects.filter(user_id=user_id, laptop_id__in=removed).delete()
+
+        added = []
+        if add:
+            existing = set(Laptop.objects.filter(pk__in=add).values_list('pk', flat=True))
+            already = set(Favorite.objects.filter(user_id=user_id, laptop_id__in=existing).values_list('laptop_id', flat=True))
+            added = [laptop_id for laptop_id in add if laptop_id in existing and laptop_id not in already]
+            Favorite.objects.bulk_create(
+                [Favorite(user_id=user_id, laptop_id=laptop_id) for laptop_id in added], ignore_conflicts=True
+            )
+    invalidate_favorite_ids(user_id)
+    return {
+        'added': added,
+        'removed': removed,
+        'missing': [laptop_id for laptop_id in add if laptop_id not in existing] if add else [],
+    }
@@ -0,0 +1,293 @@
+import threading
+import time
+import warnings
+
+import numpy as np
+from django.conf import settings
+
+from .catalog import get_catalog_version
+from .models import Laptop
+from .serializers import laptop_rows
+from .specs import CPU_TIER_HIGH, HIGH_PERFORMANCE_GPU_CLASSES, PERFORMANCE_CPU_TIERS
+
+# Columns of the feature matrix, in order
+FINDER_FEATURES = ('price', 'ram_gb', 'storage_gb', 'display_inches', 'cpu_tier', 'gpu')
+
+# How much a distance along each feature counts
+FEATURE_WEIGHTS = np.array([2.0, 1.5, 1.0, 1.0, 1.5, 1.0])
+
+# Squared distance charged for a missing value: two standard deviations
+MISSING_DISTANCE = 4.0
+
+# Query parameters that restrict the candidates, and the feature each one bounds
+FINDER_FILTERS = {
+    'price_min': ('price', np.greater_equal),
+    'price_max': ('price', np.less_equal),
+    'ram_min': ('ram_gb', np.greater_equal),
+    'storage_min': ('storage_gb', np.greater_equal),
+}
+
+# Query parameters giving the values to rank towards
+FINDER_TARGETS = {
+    'price': 'price',
+    'ram': 'ram_gb',
+    'storage': 'storage_gb',
+    'display_size': 'display_inches',
+}
+
+_PRICE = FINDER_FEATURES.index('price')
+_CPU_TIER = FINDER_FEATURES.index('cpu_tier')
+_GPU = FINDER_FEATURES.index('gpu')
+
+
+def feature_row(values):
+    """Raw feature values of a Laptop .values() row, NaN where unknown"""
+    return [
+        np.nan if values['price'] is None else float(values['price']),
+        np.nan if values['ram_gb'] is None else float(values['ram_gb']),
+        np.nan if values['storage_gb'] is None else float(values['storage_gb']),
+        np.nan if values['display_inches'] is None else float(values['display_inches']),
+        float(values['cpu_tier']) if values['cpu_tier'] else np.nan,
+        1.0 if values['gpu_class'] in HIGH_PERFORMANCE_GPU_CLASSES else 0.0,
+    ]
+
+
+def transform(raw):
+    """Map raw features onto scales where equal steps mean similar differences"""
+    features = np.array(raw, dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        features[..., _PRICE] = np.log1p(features[..., _PRICE])
+        for column in (FINDER_FEATURES.index('ram_gb'), FINDER_FEATURES.index('storage_gb')):
+            features[..., column] = np.log2(np.maximum(features[..., column], 1))
+    return features
+
+
+class FinderIndex:
+    """A normalized feature matrix over the catalog for nearest-spec retrieval.
+
+    Filters are boolean masks over the raw columns, ranking is a weighted
+    distance to the requested target values in the normalized space, and
+    the top k are picked with np.partition, so a query never leaves NumPy.
+    Rows are kept per (pk, updated_at): a rebuild after an import copies the
+    unchanged rows from the previous matrix and only reads the changed ones.
+    Categories ride along for api/similar.py.
+    """
+
+    def __init__(self, pks, updated_at, raw, categories, version):
+        self.version = version
+        self.built_at = time.monotonic()
+        self.pks = pks
+        self.updated_at = updated_at
+        self.raw = raw
+        self.categories = categories
+        self.position = {pk: i for i, pk in enumerate(pks)}
+
+        features = transform(raw)
+        with warnings.catch_warnings():
+            # All-NaN columns, e.g. on an empty catalog
+            warnings.simplefilter('ignore', RuntimeWarning)
+            self.mean = np.nan_to_num(np.nanmean(features, axis=0))
+            std = np.nanstd(features, axis=0)
+        self.std = np.where(np.isnan(std) | (std == 0), 1.0, std)
+        self.matrix = ((features - self.mean) / self.std).astype(np.float32)
+        self._missing = np.isnan(self.matrix).astype(float)
+        self._known = 1 - self._missing
+        self._values = np.nan_to_num(self.matrix.astype(float))
+
+    @classmethod
+    def build(cls, version, previous=None):
+        """Build the matrix, reusing the previous index's rows for unchanged laptops"""
+        current = list(Laptop.objects.order_by('pk').values_list('pk', 'updated_at'))
+        pks = [pk for pk, _ in current]
+        updated_at = [updated for _, updated in current]
+        raw = np.full((len(current), len(FINDER_FEATURES)), np.nan)
+        categories = np.full(len(current), None, dtype=object)
+        filled = np.zeros(len(current), dtype=bool)
+
+        reused, sources, changed = [], [], []
+        old_position = previous.position if previous is not None else {}
+        for i, (pk, updated) in enumerate(current):
+            j = old_position.get(pk)
+            if j is not None and previous.updated_at[j] == updated:
+                reused.append(i)
+                sources.append(j)
+            else:
+                changed.append(pk)
+        if reused:
+            raw[reused] = previous.raw[sources]
+            categories[reused] = previous.categories[sources]
+            filled[reused] = True
+
+        position = {pk: i for i, pk in enumerate(pks)}
+        fields = ['pk', 'updated_at', 'price', 'ram_gb', 'storage_gb', 'display_inches', 'cpu_tier', 'gpu_class',
+                  'category']
+        batch_size = 1000
+        for start in range(0, len(changed), batch_size):
+            for values in Laptop.objects.filter(pk__in=changed[start:start + batch_size]).values(*fields):
+                i = position[values['pk']]
+                raw[i] = feature_row(values)
+                categories[i] = values['category']
+                updated_at[i] = values['updated_at']
+                filled[i] = True
+
+        # Rows deleted between the two queries
+        keep = np.flatnonzero(filled)
+        return cls([pks[i] for i in keep], [updated_at[i] for i in keep], raw[keep], categories[keep], version)
+
+    def __len__(self):
+        return len(self.pks)
+
+    def filter_masks(self, filters_list):
+        """(queries x rows) mask of the rows passing each query's filters.
+
+        Unknown values never pass a bound.
+        """
+        masks = np.ones((len(filters_list), len(self)), dtype=bool)
+        with np.errstate(invalid='ignore'):
+            for name, (feature, compare) in FINDER_FILTERS.items():
+                bounds = np.array([filters.get(name, np.nan) for filters in filters_list], dtype=float)
+                active = ~np.isnan(bounds)
+                if active.any():
+                    column = self.raw[:, FINDER_FEATURES.index(feature)]
+                    masks[active] &= compare(column[None, :], bounds[active, None])
+        tiers = np.array([filters.get('performance_level', 0) for filters in filters_list], dtype=int)
+        for tier in np.unique(tiers[tiers > 0]):
+            mask = self.raw[:, _CPU_TIER] == tier
+            if tier == CPU_TIER_HIGH:
+                mask &= self.raw[:, _GPU] == 1.0
+            masks[tiers == tier] &= mask
+        return masks
+
+    def distances(self, targets_list):
+        """(queries x rows) weighted squared distance from each query's targets"""
+        weights = np.array(
+            [[feature in targets for feature in FINDER_FEATURES] for targets in targets_list], dtype=float,
+        ).reshape(-1, len(FINDER_FEATURES)) * FEATURE_WEIGHTS
+        goals = transform(np.array(
+            [[targets.get(feature, np.nan) for feature in FINDER_FEATURES] for targets in targets_list], dtype=float,
+        ).reshape(-1, len(FINDER_FEATURES)))
+        # Features a query doesn't target have zero weight
+        goals = np.nan_to_num((goals - self.mean) / self.std)
+        # sum(w * (x - g)^2) expanded into matrix products, with a missing x costing MISSING_DISTANCE
+        distances = (
+            weights @ np.square(self._values).T
+            - 2 * (weights * goals) @ self._values.T
+            + (weights * np.square(goals)) @ self._known.T
+            + MISSING_DISTANCE * weights @ self._missing.T
+        )
+        return np.maximum(distances, 0)
+
+    def _nearest(self, candidates, distance, limit):
+        if limit < len(candidates):
+            # Keep every row tied with the k-th closest so the cut is deterministic
+            threshold = np.partition(distance, limit - 1)[limit - 1]
+            nearest = np.flatnonzero(distance <= threshold)
+        else:
+            nearest = np.arange(len(candidates))
+        price = np.nan_to_num(self.raw[candidates[nearest], _PRICE], nan=np.inf)
+        nearest = nearest[np.lexsort((candidates[nearest], price, distance[nearest]))][:limit]
+        return candidates[nearest], distance[nearest], len(candidates)
+
+    def find_many(self, queries, limit):
+        """Return (positions, distances, match count) for each (filters, targets) query, in order.
+
+        Masks and distances for a whole chunk of queries are computed as
+        single array operations; chunks are sized so a (queries x rows) array
+        stays under CATALOG_FINDER_BATCH_CELLS cells. Ties, including every
+        row when a query has no targets, go to the cheaper laptop and then
+        to pk order, so results are deterministic.
+        """
+        chunk = max(1, getattr(settings, 'CATALOG_FINDER_BATCH_CELLS', 4_000_000) // max(len(self), 1))
+        results = []
+        for start in range(0, len(queries), chunk):
+            part = queries[start:start + chunk]
+            masks = self.filter_masks([filters for filters, _ in part])
+            distances = self.distances([targets for _, targets in part])
+            for mask, distance in zip(masks, distances):
+                candidates = np.flatnonzero(mask)
+                results.append(self._nearest(candidates, distance[candidates], limit))
+        return results
+
+    def find(self, filters, targets, limit):
+        """find_many() for a single query"""
+        return self.find_many([(filters, targets)], limit)[0]
+
+
+def finder_results(index, matches):
+    """Response payloads for find_many() matches, fetching every row in as few queries as possible"""
+    pks = list(dict.fromkeys(index.pks[i] for positions, _, _ in matches for i in positions))
+    rows = {}
+    batch_size = 1000
+    for start in range(0, len(pks), batch_size):
+        queryset = Laptop.objects.filter(pk__in=pks[start:start + batch_size])
+        rows.update((row['id'], row) for row in laptop_rows.many(laptop_rows.values(queryset)))
+
+    results = []
+    for positions, distances, count in matches:
+        # Rows deleted since the index was built are dropped along with their scores
+        found = [i for i, position in enumerate(positions) if index.pks[position] in rows]
+        results.append({
+            'count': count,
+            'results': [rows[index.pks[positions[i]]] for i in found],
+            'scores': np.round(1 / (1 + np.sqrt(distances[found])), 4),
+        })
+    return results
+
+
+def _number(params, name):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a number")
+    if not np.isfinite(number):
+        raise ValueError(f"{name} must be a number")
+    return number
+
+
+def parse_finder_params(params):
+    """Return (filters, targets) from request parameters, or raise ValueError"""
+    if not hasattr(params, 'get'):
+        raise ValueError("each query must be an object")
+    filters = {}
+    for name in FINDER_FILTERS:
+        value = _number(params, name)
+        if value is not None:
+            filters[name] = value
+    targets = {}
+    for name, feature in FINDER_TARGETS.items():
+        value = _number(params, name)
+        if value is not None:
+            targets[feature] = value
+
+    level = params.get('performance_level')
+    if level not in (None, ''):
+        tier = PERFORMANCE_CPU_TIERS.get(str(level).lower())
+        if tier is None:
+            raise ValueError("performance_level must be one of: " + ', '.join(PERFORMANCE_CPU_TIERS))
+        filters['performance_level'] = tier
+    return filters, targets
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def _is_stale(index, version):
+    max_age = getattr(settings, 'CATALOG_FINDER_MAX_AGE', getattr(settings, 'CATALOG_ENGINE_MAX_AGE', 300))
+    return index is None or index.version != version or time.monotonic() - index.built_at > max_age
+
+
+def get_finder_index():
+    """Return this worker's finder index, rebuilding it if the catalog version moved on"""
+    global _index
+    version = get_catalog_version()
+    index = _index
+    if _is_stale(index, version):
+        with _index_lock:
+            if _is_stale(_index, version):
+                _index = FinderIndex.build(version, previous=_index)
+            index = _index
+    return index
@@ -0,0 +1,122 @@
+import asyncio
+import contextlib
+import logging
+import secrets
+import weakref
+
+import httpx
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import IntegrityError
+
+from .metrics import observe_outbound
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_TOKEN_URL = 'https://oauth2.googleapis.com/token'
+GOOGLE_USERINFO_URL = 'https://www.googleapis.com/oauth2/v2/userinfo'
+
+# One pooled client per event loop: httpx connections can't be shared across loops
+_clients = weakref.WeakKeyDictionary()
+
+
+class GoogleOAuthError(Exception):
+    pass
+
+
+def _new_client():
+    timeout = getattr(settings, 'GOOGLE_OAUTH_TIMEOUT', 5.0)
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(timeout, connect=min(timeout, 2.0)),
+        limits=httpx.Limits(max_connections=getattr(settings, 'GOOGLE_OAUTH_MAX_CONNECTIONS', 100)),
+        transport=httpx.AsyncHTTPTransport(retries=getattr(settings, 'GOOGLE_OAUTH_RETRIES', 2)),
+    )
+
+
+def get_google_client():
+    """Return the pooled AsyncClient for the running event loop.
+
+    Under ASGI there is a single loop per worker, so every login reuses the
+    same keep-alive connections to Google. Connection failures are retried
+    by the transport; every call is bounded by GOOGLE_OAUTH_TIMEOUT.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = _clients[loop] = _new_client()
+    return client
+
+
+@contextlib.asynccontextmanager
+async def google_client(pooled):
+    """The client for one login: the loop's pooled client when pooled, else a fresh one closed afterwards.
+
+    Under WSGI, Django runs each async view in a new event loop, so a
+    per-loop client would be created for every login and never closed;
+    there the login's two calls share a client that lives for the request.
+    """
+    if pooled:
+        yield get_google_client()
+    else:
+        async with _new_client() as client:
+            yield client
+
+
+async def exchange_code(client, code, redirect_uri):
+    """Trade an authorization code for Google's token response.
+
+    Not retried past connection failures: a code can only be redeemed once.
+    """
+    app = settings.SOCIALACCOUNT_PROVIDERS['google']['APP']
+    with observe_outbound('google_token'):
+        response = await client.post(
+            getattr(settings, 'GOOGLE_OAUTH_TOKEN_URL', GOOGLE_TOKEN_URL),
+            data={
+                'code': code,
+                'client_id': app['client_id'],
+                'client_secret': app['secret'],
+                'redirect_uri': redirect_uri,
+                'grant_type': 'authorization_code',
+            },
+        )
+    token_data = response.json()
+    if 'error' in token_data:
+        logger.warning("Google token error details: %s", token_data)
+        raise GoogleOAuthError(f"Google token error: {token_data['error']}")
+    return token_data
+
+
+async def fetch_userinfo(client, access_token):
+    """Fetch the Google profile for an access token, retrying once on a timeout or 5xx"""
+    url = getattr(settings, 'GOOGLE_OAUTH_USERINFO_URL', GOOGLE_USERINFO_URL)
+    headers = {'Authorization': f'Bearer {access_token}'}
+    for attempt in range(2):
+        try:
+            with observe_outbound('google_userinfo'):
+                response = await client.get(url, headers=headers)
+        except httpx.TimeoutException:
+            if attempt:
+                raise
+            continue
+        if response.status_code < 500 or attempt:
+            return response.json()
+
+
+async def get_or_create_google_user(email):
+    """Return the user with this email, creating one with a free username if needed"""
+    user = await User.objects.filter(email=email).order_by('pk').afirst()
+    if user is not None:
+        return user
+
+    base = email.split('@')[0]
+    username = base
+    for _ in range(10):
+        # Exact username lookups hit the unique index, unlike counting the table
+        if not await User.objects.filter(username=username).aexists():
+            try:
+                return await User.objects.acreate_user(username=username, email=email, password=None)
+            except IntegrityError:
+                # Taken by a concurrent signup between the check and the insert
+                pass
+        username = f"{base}{secrets.randbelow(10 ** 6)}"
+    raise GoogleOAuthError('Could not find a free username')
@@ -0,0 +1,67 @@
+import logging
+import threading
+
+from django.conf import settings
+from django.urls import get_resolver
+from django.utils.module_loading import import_string
+from django.views.decorators.csrf import csrf_exempt
+
+logger = logging.getLogger(__name__)
+
+_lazy_views = []
+
+
+class LazyView:
+    """A URL callback that imports its DRF view class on first use.
+
+    Endpoints backed by heavy modules (the ML finder, the chatbot SDK) are
+    routed through this, so importing the URLconf and serving catalog reads
+    never loads them. Like APIView.as_view(), the callback is csrf_exempt;
+    SessionAuthentication enforces CSRF inside the view.
+    """
+
+    def __init__(self, view_path, **initkwargs):
+        self.view_path = view_path
+        self.initkwargs = initkwargs
+        self._view = None
+        self._lock = threading.Lock()
+
+    def resolve(self):
+        if self._view is None:
+            with self._lock:
+                if self._view is None:
+                    self._view = import_string(self.view_path).as_view(**self.initkwargs)
+        return self._view
+
+    def __call__(self, request, *args, **kwargs):
+        return self.resolve()(request, *args, **kwargs)
+
+
+def lazy_view(view_path, **initkwargs):
+    view = LazyView(view_path, **initkwargs)
+    _lazy_views.append(view)
+    return csrf_exempt(view)
+
+
+def warm_up():
+    """Load the URLconf and every lazy view, e.g. after a worker starts"""
+    get_resolver().url_patterns
+    for view in _lazy_views:
+        try:
+            view.resolve()
+        except Exception:
+            # The endpoint will raise the same error when first requested
+            logger.exception("Failed to warm up %s", view.view_path)
+
+
+def start_background_warm_up():
+    """Run warm_up() in a daemon thread when LAZY_VIEWS_WARMUP is set.
+
+    The worker accepts requests straight away; a request for a lazy view
+    that arrives before the thread gets to it imports the view itself.
+    """
+    if not getattr(settings, 'LAZY_VIEWS_WARMUP', False):
+        return None
+    thread = threading.Thread(target=warm_up, name='lazy-views-warm-up', daemon=True)
+    thread.start()
+    return thread
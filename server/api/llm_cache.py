@@ -0,0 +1,140 @@
+import hashlib
+import re
+import threading
+import unicodedata
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models import F
+from django.utils import timezone
+
+from .models import SpecExtraction
+
+# Bump when the extraction prompt changes so old answers are no longer served
+DEFAULT_PROMPT_VERSION = '1'
+
+_AMOUNT_RE = re.compile(r'(?<![\w.])(\d+(?:\.\d+)?)\s*k\b')
+_THOUSANDS_RE = re.compile(r'(?<=\d),(?=\d{3}\b)')
+# Currency symbols and names, and the code each is written as
+_CURRENCIES = {
+    '$': 'usd', 'usd': 'usd', 'dollar': 'usd', 'dollars': 'usd',
+    '€': 'eur', 'eur': 'eur', 'euro': 'eur', 'euros': 'eur',
+    '£': 'gbp', 'gbp': 'gbp',
+    'egp': 'egp', 'egy': 'egp',
+}
+_CURRENCY_NAMES = r'(?:usd|dollars?|euros?|eur|gbp|egp|egy)\b'
+# A symbol before the amount (and any name repeated after it), or a name after it
+_CURRENCY_RE = re.compile(
+    rf'([$€£])\s*(\d+(?:\.\d+)?)(?:\s*{_CURRENCY_NAMES})?|(\d+(?:\.\d+)?)\s*({_CURRENCY_NAMES})'
+)
+_UNIT_RE = re.compile(r'(\d)\s+(gb|tb|ghz|hz|inch(?:es)?|in)\b')
+_SPACE_RE = re.compile(r'\s+')
+
+_local_cache = None
+_stats = {'memory_hits': 0, 'db_hits': 0, 'misses': 0}
+_stats_lock = threading.Lock()
+
+
+def _thousands(match):
+    return str(round(float(match.group(1)) * 1000))
+
+
+def _currency(match):
+    symbol, amount = (match.group(1), match.group(2)) if match.group(1) else (match.group(4), match.group(3))
+    return f'{amount} {_CURRENCIES[symbol]}'
+
+
+def normalize_message(message):
+    """Canonical form of a chat message for cache keys.
+
+    Lowercases, folds unicode compatibility forms, collapses whitespace,
+    drops trailing punctuation and writes numbers and currencies one way,
+    so that "Gaming laptop under $1,000!" and "gaming laptop  under 1k usd"
+    match. The currency is kept as a code: "1000 EGP" and "$1000" are
+    different budgets.
+    """
+    text = unicodedata.normalize('NFKC', message or '').lower()
+    text = _THOUSANDS_RE.sub('', text)
+    text = _AMOUNT_RE.sub(_thousands, text)
+    text = _CURRENCY_RE.sub(_currency, text)
+    text = _UNIT_RE.sub(r'\1\2', text)
+    text = _SPACE_RE.sub(' ', text).strip()
+    return text.rstrip('.!?,; ')
+
+
+def get_prompt_version():
+    return str(getattr(settings, 'CHATBOT_PROMPT_VERSION', DEFAULT_PROMPT_VERSION))
+
+
+def extraction_key(normalized, prompt_version):
+    return hashlib.sha256(f'{prompt_version}\x1f{normalized}'.encode()).hexdigest()
+
+
+def _get_local_cache():
+    global _local_cache
+    if _local_cache is None:
+        _local_cache = LocMemCache('api-spec-extractions', {
+            'TIMEOUT': getattr(settings, 'SPEC_EXTRACTION_MEMORY_TIMEOUT', 300),
+            'OPTIONS': {'MAX_ENTRIES': getattr(settings, 'SPEC_EXTRACTION_MEMORY_MAX_ENTRIES', 1000)},
+        })
+    return _local_cache
+
+
+def _record(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def extraction_cache_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    total = sum(stats.values())
+    stats['hit_ratio'] = (stats['memory_hits'] + stats['db_hits']) / total if total else None
+    return stats
+
+
+def cached_extraction(message, extract, prompt_version=None):
+    """Return extract(message), reusing earlier answers for the same normalized message.
+
+    Lookups go to a bounded in-process LRU first, then to the SpecExtraction
+    table (shared by all workers, rows expire after SPEC_EXTRACTION_TTL
+    seconds), and only then to extract, which is the LLM call. Empty or
+    failed extractions are returned but not stored.
+    """
+    prompt_version = prompt_version or get_prompt_version()
+    normalized = normalize_message(message)
+    key = extraction_key(normalized, prompt_version)
+    local_cache = _get_local_cache()
+
+    specs = local_cache.get(key)
+    if specs is not None:
+        _record('memory_hits')
+        return specs
+
+    now = timezone.now()
+    row = SpecExtraction.objects.filter(pk=key, expires_at__gt=now).only('specs').first()
+    if row is not None:
+        _record('db_hits')
+        SpecExtraction.objects.filter(pk=key).update(hits=F('hits') + 1)
+        local_cache.set(key, row.specs)
+        return row.specs
+
+    _record('misses')
+    specs = extract(message)
+    if specs:
+        SpecExtraction.objects.update_or_create(pk=key, defaults={
+            'prompt_version': prompt_version,
+            'message': normalized,
+            'specs': specs,
+            'hits': 0,
+            'expires_at': now + timedelta(seconds=getattr(settings, 'SPEC_EXTRACTION_TTL', 7 * 24 * 3600)),
+        })
+        local_cache.set(key, specs)
+    return specs
+
+
+def purge_expired_extractions():
+    """Delete expired rows; returns how many were removed"""
+    deleted, _ = SpecExtraction.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
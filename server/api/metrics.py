@@ -0,0 +1,209 @@
+import hmac
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse
+
+METRICS_MIDDLEWARE = 'api.metrics.MetricsMiddleware'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Totals for the current request. The dict is shared by reference, so ORM work
+# that sync_to_async runs in another thread still adds to the right request.
+_request_stats = ContextVar('api_request_stats', default=None)
+
+_metrics = None
+_metrics_lock = threading.Lock()
+# The prometheus_client module once imported, False if it isn't installed
+_prometheus_client = None
+
+
+def get_prometheus_client():
+    """Import prometheus_client on first use, so workers with metrics off never load it"""
+    global _prometheus_client
+    if _prometheus_client is None:
+        try:
+            import prometheus_client
+            import prometheus_client.multiprocess  # noqa: F401
+        except ImportError:  # pragma: no cover - metrics are off without prometheus_client
+            prometheus_client = False
+        _prometheus_client = prometheus_client
+    return _prometheus_client or None
+
+
+def metrics_enabled():
+    return getattr(settings, 'METRICS_ENABLED', False) and get_prometheus_client() is not None
+
+
+class Metrics:
+    def __init__(self):
+        prometheus_client = get_prometheus_client()
+        histogram = prometheus_client.Histogram
+        self.latency = histogram('http_request_duration_seconds', 'Request latency',
+                                 ['view', 'method', 'status'], buckets=LATENCY_BUCKETS)
+        self.db_queries = histogram('http_request_db_queries', 'SQL queries per request',
+                                    ['view'], buckets=QUERY_BUCKETS)
+        self.db_time = histogram('http_request_db_duration_seconds', 'Time spent in SQL per request',
+                                 ['view'], buckets=LATENCY_BUCKETS)
+        self.serialize_time = histogram('http_request_serialize_duration_seconds',
+                                        'Time spent serializing rows and rendering the body per request',
+                                        ['view'], buckets=LATENCY_BUCKETS)
+        self.response_bytes = histogram('http_response_size_bytes', 'Response body size',
+                                        ['view'], buckets=SIZE_BUCKETS)
+        self.exceptions = prometheus_client.Counter('http_request_exceptions_total', 'Unhandled exceptions by view',
+                                                    ['view', 'exception'])
+        self.outbound = histogram('outbound_request_duration_seconds', 'Latency of calls to external services',
+                                  ['service', 'outcome'], buckets=LATENCY_BUCKETS)
+
+
+def get_metrics():
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = Metrics()
+    return _metrics
+
+
+def _record_query(execute, sql, params, many, context):
+    stats = _request_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats['queries'] += 1
+        stats['db_time'] += time.perf_counter() - started
+
+
+def _add_query_recorder(sender, connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def install_metrics():
+    """Hook the middleware and query recorder in when METRICS_ENABLED is set.
+
+    Done at startup rather than listed in settings.MIDDLEWARE, so with
+    metrics off nothing is installed and requests pay nothing.
+    """
+    if not metrics_enabled():
+        return
+    connection_created.connect(_add_query_recorder, dispatch_uid='api-metrics-queries')
+    if METRICS_MIDDLEWARE not in settings.MIDDLEWARE:
+        # First, so the latency covers every other middleware
+        settings.MIDDLEWARE = [METRICS_MIDDLEWARE, *settings.MIDDLEWARE]
+
+
+@contextmanager
+def track_serialization():
+    """Add the time spent in the block to the current request's serialization time"""
+    stats = _request_stats.get()
+    if stats is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats['serialize_time'] += time.perf_counter() - started
+
+
+@contextmanager
+def observe_outbound(service):
+    """Record the latency of a call to an external service; usable around awaits too"""
+    if not metrics_enabled():
+        yield
+        return
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        yield
+        outcome = 'ok'
+    finally:
+        get_metrics().outbound.labels(service, outcome).observe(time.perf_counter() - started)
+
+
+def _view_name(request):
+    # Unresolved paths share one label so 404 probes can't blow up cardinality
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'unresolved'
+
+
+class MetricsMiddleware:
+    """Per-view latency, SQL query count and time, serialization time and response size"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        stats = {'queries': 0, 'db_time': 0.0, 'serialize_time': 0.0}
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_stats.reset(token)
+        self.observe(request, response, stats, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        stats = {'queries': 0, 'db_time': 0.0, 'serialize_time': 0.0}
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_stats.reset(token)
+        self.observe(request, response, stats, time.perf_counter() - started)
+        return response
+
+    def observe(self, request, response, stats, elapsed):
+        metrics = get_metrics()
+        view = _view_name(request)
+        metrics.latency.labels(view, request.method, str(response.status_code)).observe(elapsed)
+        metrics.db_queries.labels(view).observe(stats['queries'])
+        metrics.db_time.labels(view).observe(stats['db_time'])
+        metrics.serialize_time.labels(view).observe(stats['serialize_time'])
+        if not response.streaming:
+            metrics.response_bytes.labels(view).observe(len(response.content))
+
+    def process_exception(self, request, exception):
+        get_metrics().exceptions.labels(_view_name(request), type(exception).__name__).inc()
+
+
+def metrics_view(request):
+    """Prometheus exposition of every worker's metrics.
+
+    With PROMETHEUS_MULTIPROC_DIR set (see gunicorn.conf.py) the values
+    are read from the shared directory, so any worker answers for all of
+    them. If METRICS_TOKEN is set, requests must send it as a bearer token.
+    """
+    if not metrics_enabled():
+        raise Http404
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse(status=401)
+    prometheus_client = get_prometheus_client()
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = prometheus_client.CollectorRegistry()
+        prometheus_client.multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return HttpResponse(prometheus_client.generate_latest(registry), content_type=prometheus_client.CONTENT_TYPE_LATEST)
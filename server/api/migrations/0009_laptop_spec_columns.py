@@ -0,0 +1,66 @@
+# Generated by Django 5.2 on 2026-10-18 06:21
+
+from django.db import migrations, models
+
+from api.specs import spec_columns
+
+SPEC_FIELDS = ['ram_gb', 'storage_gb', 'display_inches', 'cpu_tier', 'gpu_class']
+
+
+BATCH_SIZE = 1000
+
+
+def backfill_spec_columns(apps, schema_editor):
+    Laptop = apps.get_model('api', 'Laptop')
+    # Written batch by batch, so memory doesn't grow with the catalog
+    laptops = []
+    for laptop in Laptop.objects.all().iterator(chunk_size=BATCH_SIZE):
+        columns = spec_columns(laptop.ram, laptop.storage, laptop.display_size, laptop.processor, laptop.graphics)
+        for field, value in columns.items():
+            setattr(laptop, field, value)
+        laptops.append(laptop)
+        if len(laptops) == BATCH_SIZE:
+            Laptop.objects.bulk_update(laptops, SPEC_FIELDS)
+            laptops = []
+    Laptop.objects.bulk_update(laptops, SPEC_FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_favorite'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='laptop',
+            name='cpu_tier',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='laptop',
+            name='display_inches',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=2, max_digits=5, null=True),
+        ),
+        migrations.AddField(
+            model_name='laptop',
+            name='gpu_class',
+            field=models.CharField(db_index=True, default='integrated', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='laptop',
+            name='ram_gb',
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='laptop',
+            name='storage_gb',
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='laptop',
+            name='price',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=1, max_digits=10, null=True),
+        ),
+        migrations.RunPython(backfill_spec_columns, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 06:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_laptop_spec_columns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='laptop',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 06:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_laptop_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='laptop',
+            name='row_hash',
+            field=models.CharField(blank=True, max_length=40, null=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-18 06:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_laptop_row_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpecExtraction',
+            fields=[
+                ('key', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('prompt_version', models.CharField(max_length=50)),
+                ('message', models.TextField()),
+                ('specs', models.JSONField()),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
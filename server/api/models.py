@@ -1,4 +1,5 @@
 from django.db import models
+from .specs import spec_columns
 
 class Laptop(models.Model):
     id = models.CharField(max_length=100, primary_key=True)
@@ -13,15 +14,36 @@ class Laptop(models.Model):
     display = models.CharField(max_length=100, blank=True, null=True)
     display_size = models.CharField(max_length=50, blank=True, null=True)
     display_resolution = models.CharField(max_length=50, blank=True, null=True)
-    price = models.DecimalField(max_digits=10, decimal_places=1, blank=True, null=True)
+    price = models.DecimalField(max_digits=10, decimal_places=1, blank=True, null=True, db_index=True)
     product_url = models.URLField(blank=True, null=True)
     image_url = models.URLField(blank=True, null=True)
     in_stock = models.BooleanField(default=False)
     seller = models.CharField(max_length=100, blank=True, null=True)
     condition = models.CharField(max_length=50, default='New')
+
+    # Normalized spec columns derived from the free-text fields above (see api/specs.py)
+    ram_gb = models.PositiveIntegerField(blank=True, null=True, db_index=True)
+    storage_gb = models.PositiveIntegerField(blank=True, null=True, db_index=True)
+    display_inches = models.DecimalField(max_digits=5, decimal_places=2, blank=True, null=True, db_index=True)
+    cpu_tier = models.PositiveSmallIntegerField(default=0, db_index=True)
+    gpu_class = models.CharField(max_length=20, default='integrated', db_index=True)
+
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # Hash of the normalized import row, lets incremental imports skip unchanged rows
+    row_hash = models.CharField(max_length=40, blank=True, null=True)
     
     def __str__(self):
         return self.name
+
+    def populate_spec_columns(self):
+        """Recompute the normalized spec columns from the free-text fields"""
+        columns = spec_columns(self.ram, self.storage, self.display_size, self.processor, self.graphics)
+        for field, value in columns.items():
+            setattr(self, field, value)
+
+    def save(self, *args, **kwargs):
+        self.populate_spec_columns()
+        super().save(*args, **kwargs)
     
     class Meta:
         ordering = ['brand', 'name']
@@ -40,3 +62,15 @@ class Favorite(models.Model):
         unique_together = ('user', 'laptop')  # Prevent duplicate favorites
         ordering = ['-created_at']  # Most recent favorites first
 
+
+
+class SpecExtraction(models.Model):
+    """Cached LLM spec extraction for a normalized chat message (see api/llm_cache.py)"""
+    # sha256 of the prompt version and normalized message
+    key = models.CharField(max_length=64, primary_key=True)
+    prompt_version = models.CharField(max_length=50)
+    message = models.TextField()
+    specs = models.JSONField()
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
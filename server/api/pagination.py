@@ -0,0 +1,168 @@
+import contextlib
+import hashlib
+from functools import reduce
+import operator
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+
+from .catalog import canonical_params, get_catalog_version
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination that seeks on (ordering fields..., pk) instead of OFFSET.
+
+    The cursor is a signed token carrying the ordering and the sort key of
+    the last row served, so fetching page N costs the same as page 1 for any
+    single-field ordering (or the model's default ordering). NULL sort keys
+    are always placed last and paging is forward-only, which is all infinite
+    scroll needs. The total count is only computed when asked for with
+    ?count=true, and is then cached per catalog version and filter set.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor'
+    cursor_salt = 'api.pagination.keyset'
+    # Params that don't change which rows match, left out of the count cache key
+    count_ignored_params = ('cursor', 'pagination', 'page', 'page_size', 'ordering', 'count', 'format')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.model = queryset.model
+        self.ordering = self.get_ordering(request)
+        self.page_size = self.get_page_size(request)
+        self.count = self.get_count(queryset, request)
+
+        queryset = queryset.order_by(*self.get_order_by())
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            queryset = queryset.filter(self.seek_q(cursor['values'], cursor['pk']))
+
+        results = list(queryset[:self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            with contextlib.suppress(KeyError, ValueError):
+                return _positive_int(
+                    request.query_params[self.page_size_query_param],
+                    strict=True,
+                    cutoff=self.max_page_size
+                )
+        return self.page_size
+
+    def get_ordering(self, request):
+        """Return [(field name, descending)] for the requested ordering"""
+        ordering = request.query_params.get(self.ordering_query_param)
+        fields = [ordering] if ordering else list(self.model._meta.ordering)
+        parsed = []
+        for field in fields:
+            name = field.lstrip('-')
+            if name == 'pk':
+                name = self.model._meta.pk.name
+            try:
+                self.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                raise NotFound(f"Invalid ordering: {field}")
+            parsed.append((name, field.startswith('-')))
+        return parsed
+
+    def get_order_by(self):
+        order_by = []
+        for name, descending in self.ordering:
+            order_by.append(F(name).desc(nulls_last=True) if descending else F(name).asc(nulls_last=True))
+        return order_by + ['pk']
+
+    def seek_q(self, values, pk):
+        """Rows strictly after (values..., pk) in the (nulls last) ordering"""
+        conditions = []
+        equal = Q()
+        for (name, descending), value in zip(self.ordering, values):
+            if value is None:
+                # Only other NULLs can follow a NULL key, tie-broken further down
+                equal &= Q(**{f'{name}__isnull': True})
+                continue
+            lookup = 'lt' if descending else 'gt'
+            after = Q(**{f'{name}__{lookup}': value}) | Q(**{f'{name}__isnull': True})
+            conditions.append(equal & after)
+            equal &= Q(**{name: value})
+        conditions.append(equal & Q(pk__gt=pk))
+        return reduce(operator.or_, conditions)
+
+    def get_cursor_fields(self, request, model):
+        """Fields each row must carry for the cursor, for callers paginating .values() rows"""
+        self.model = model
+        return [name for name, _ in self.get_ordering(request)] + [model._meta.pk.name]
+
+    def encode_cursor(self, instance):
+        if isinstance(instance, dict):
+            row = instance
+        else:
+            row = {name: getattr(instance, name) for name, _ in self.ordering}
+            row[self.model._meta.pk.name] = instance.pk
+        values = []
+        for name, _ in self.ordering:
+            value = row[name]
+            # Decimals, dates and datetimes travel as strings the field lookups parse back
+            values.append(value if value is None or isinstance(value, (str, int, float)) else str(value))
+        payload = {
+            'o': self.request.query_params.get(self.ordering_query_param, ''),
+            'v': values,
+            'pk': row[self.model._meta.pk.name],
+        }
+        return signing.dumps(payload, salt=self.cursor_salt, compress=True)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            payload = signing.loads(token, salt=self.cursor_salt)
+        except signing.BadSignature:
+            raise NotFound(self.invalid_cursor_message)
+        ordering = request.query_params.get(self.ordering_query_param, '')
+        if payload.get('o') != ordering or len(payload.get('v', [])) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return {'values': payload['v'], 'pk': payload['pk']}
+
+    def get_count(self, queryset, request):
+        if request.query_params.get(self.count_query_param, '').lower() not in ('1', 'true', 'yes'):
+            return None
+        params = canonical_params(request.query_params, ignore=self.count_ignored_params)
+        digest = hashlib.sha1(repr(params).encode()).hexdigest()
+        key = f'api:keyset_count:{get_catalog_version()}:{digest}'
+        count = cache.get(key)
+        if count is None:
+            count = queryset.count()
+            cache.set(key, count, getattr(settings, 'CATALOG_COUNT_CACHE_TIMEOUT', 300))
+        return count
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, 'page')
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        response = {
+            'next': self.get_next_link(),
+            'previous': None,
+            'results': data,
+        }
+        if self.count is not None:
+            response = {'count': self.count, **response}
+        return Response(response)
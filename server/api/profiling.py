@@ -0,0 +1,301 @@
+import cProfile
+import datetime
+import io
+import json
+import logging
+import os
+import pstats
+import re
+import tempfile
+import threading
+import time
+import zipfile
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, NotSupportedError, connection, transaction
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.html import format_html, format_html_join
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+
+from .authentication import cached_authentication_classes
+
+logger = logging.getLogger(__name__)
+
+PROFILING_MIDDLEWARE = 'api.profiling.ProfilingMiddleware'
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_PARAM = '_profile'
+CAPTURE_HEADER = 'X-Profile-Capture'
+
+CAPTURE_NAME = re.compile(r'^[\w.-]+\.zip$')
+STATS_LINES = 80
+
+# cProfile can only run one profile per process at a time
+_capture_lock = threading.Lock()
+
+
+def profiling_enabled():
+    return getattr(settings, 'PROFILING_ENABLED', False)
+
+
+def get_capture_dir():
+    return getattr(settings, 'PROFILING_DIR', None) or os.path.join(tempfile.gettempdir(), 'laptopfinder-profiles')
+
+
+def install_profiling():
+    """Hook the profiling middleware in when PROFILING_ENABLED is set.
+
+    It goes last, after AuthenticationMiddleware has set request.user. Like
+    install_metrics, nothing is installed when the setting is off.
+    """
+    if profiling_enabled() and PROFILING_MIDDLEWARE not in settings.MIDDLEWARE:
+        settings.MIDDLEWARE = [*settings.MIDDLEWARE, PROFILING_MIDDLEWARE]
+
+
+def profile_requested(request):
+    return request.META.get(PROFILE_HEADER) == '1' or request.GET.get(PROFILE_PARAM) == '1'
+
+
+def _staff_user(request):
+    """The staff user making the request, or None"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_staff:
+        return user
+    # API clients send a token instead of a session cookie. Authenticating
+    # sets request.user as a side effect, so the original is put back.
+    original = request.__dict__.get('user')
+    try:
+        user = Request(request, authenticators=[auth() for auth in cached_authentication_classes()]).user
+    except APIException:
+        return None
+    finally:
+        if original is None:
+            request.__dict__.pop('user', None)
+        else:
+            request.user = original
+    return user if user is not None and user.is_staff else None
+
+
+class QueryLog:
+    """Execute wrapper keeping each statement's SQL, params and duration"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql,
+                'params': None if many else params,
+                'many': many,
+                'duration_ms': (time.perf_counter() - started) * 1000,
+            })
+
+    def explain(self, limit):
+        """Add EXPLAIN output to the first limit distinct SELECT statements"""
+        try:
+            prefix = connection.ops.explain_query_prefix()
+        except NotSupportedError:
+            return
+        explained = {}
+        for query in self.queries:
+            sql = query['sql']
+            if query['many'] or not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+                continue
+            if sql not in explained:
+                if len(explained) >= limit:
+                    continue
+                try:
+                    # In a savepoint, so a failed EXPLAIN can't break an open transaction
+                    with transaction.atomic(), connection.cursor() as cursor:
+                        cursor.execute(f'{prefix} {sql}', query['params'])
+                        explained[sql] = [' '.join(str(column) for column in row) for row in cursor.fetchall()]
+                except DatabaseError as e:
+                    explained[sql] = [f'EXPLAIN failed: {e}']
+            query['explain'] = explained[sql]
+
+
+def _write_bundle(name, summary, profile, queries):
+    stats_text = io.StringIO()
+    stats = pstats.Stats(profile, stream=stats_text)
+    stats.sort_stats('cumulative').print_stats(STATS_LINES)
+    stats.sort_stats('tottime').print_stats(STATS_LINES)
+
+    directory = get_capture_dir()
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=directory, suffix='.tmp', delete=False) as output:
+        try:
+            with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as bundle:
+                bundle.writestr('request.json', json.dumps(summary, indent=2, default=str))
+                bundle.writestr('sql.json', json.dumps(queries, indent=2, default=str))
+                bundle.writestr('profile.txt', stats_text.getvalue())
+                pstats_file = os.path.join(directory, f'{name}.pstats.tmp')
+                try:
+                    profile.dump_stats(pstats_file)
+                    bundle.write(pstats_file, 'profile.pstats')
+                finally:
+                    if os.path.exists(pstats_file):
+                        os.remove(pstats_file)
+        except BaseException:
+            output.close()
+            os.remove(output.name)
+            raise
+    # Renamed into place so listings never see a half-written bundle
+    try:
+        os.replace(output.name, os.path.join(directory, name))
+    except OSError:
+        os.remove(output.name)
+        raise
+    _prune(directory)
+
+
+def _prune(directory):
+    """Keep only the newest PROFILING_MAX_CAPTURES bundles"""
+    keep = getattr(settings, 'PROFILING_MAX_CAPTURES', 20)
+    names = sorted(name for name in os.listdir(directory) if CAPTURE_NAME.match(name))
+    for name in names[:max(len(names) - keep, 0)]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            # Another worker pruned it first
+            pass
+
+
+def _capture_name(request):
+    created = datetime.datetime.now(datetime.timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+    slug = re.sub(r'[^\w-]+', '-', request.path).strip('-')[:60] or 'root'
+    return f'{created}-{os.getpid()}-{slug}.zip'
+
+
+class ProfilingMiddleware:
+    """Run a staff request under cProfile when it carries X-Profile: 1 or ?_profile=1.
+
+    The bundle (cProfile stats, the SQL the request ran with timings and
+    EXPLAIN output, and a request summary) goes into a ring buffer of zip
+    files under PROFILING_DIR, listed for staff at /admin/profiles/. The
+    response names its bundle in an X-Profile-Capture header, or says
+    'busy' when another capture is running and 'failed' when the bundle
+    couldn't be written (the response itself is still served). Profiled
+    requests skip the catalog response cache, so they do the real work.
+    Other requests only pay for the header and query flag check.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        user = profile_requested(request) and _staff_user(request)
+        if not user:
+            return self.get_response(request)
+        return self.capture(request, user, self.get_response)
+
+    async def __acall__(self, request):
+        user = profile_requested(request) and await sync_to_async(_staff_user)(request)
+        if not user:
+            return await self.get_response(request)
+        # cProfile and the query log only see one thread, so the whole
+        # request runs in the thread sync views and the ORM already use
+        return await sync_to_async(self.capture)(request, user, async_to_sync(self.get_response))
+
+    def capture(self, request, user, get_response):
+        if not _capture_lock.acquire(blocking=False):
+            response = get_response(request)
+            response[CAPTURE_HEADER] = 'busy'
+            return response
+        try:
+            request.bypass_response_cache = True
+            queries = QueryLog()
+            profile = cProfile.Profile()
+            started = time.perf_counter()
+            with connection.execute_wrapper(queries):
+                profile.enable()
+                try:
+                    response = get_response(request)
+                finally:
+                    profile.disable()
+            elapsed = time.perf_counter() - started
+            queries.explain(getattr(settings, 'PROFILING_EXPLAIN_LIMIT', 20))
+
+            name = _capture_name(request)
+            match = getattr(request, 'resolver_match', None)
+            summary = {
+                'method': request.method,
+                'path': request.get_full_path(),
+                'view': match.view_name if match else None,
+                'status': response.status_code,
+                'duration_ms': elapsed * 1000,
+                'queries': len(queries.queries),
+                'sql_ms': sum(query['duration_ms'] for query in queries.queries),
+                'user': user.get_username(),
+                'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            }
+            try:
+                _write_bundle(name, summary, profile, queries.queries)
+            except Exception:
+                # Losing the capture mustn't cost the client its response
+                logger.exception("Failed to write profile %s", name)
+                name = 'failed'
+        finally:
+            _capture_lock.release()
+        response[CAPTURE_HEADER] = name
+        return response
+
+
+def list_captures():
+    """Summaries of the stored bundles, newest first"""
+    directory = get_capture_dir()
+    if not os.path.isdir(directory):
+        return []
+    captures = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if not CAPTURE_NAME.match(name):
+            continue
+        try:
+            with zipfile.ZipFile(os.path.join(directory, name)) as bundle:
+                summary = json.loads(bundle.read('request.json'))
+            summary['size'] = os.path.getsize(os.path.join(directory, name))
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            # Pruned while listing, or not one of ours
+            continue
+        captures.append({'name': name, **summary})
+    return captures
+
+
+def profile_captures_view(request):
+    """Admin page listing the captured profiles with download links"""
+    rows = format_html_join(
+        '\n', '<tr><td><a href="{}">{}</a></td><td>{}</td><td>{} {}</td><td>{}</td><td>{}</td>'
+              '<td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>',
+        ((capture['name'], capture['name'], capture['created'], capture['user'], capture['method'], capture['path'],
+          capture['view'] or '-', capture['status'], f"{capture['duration_ms']:.1f}", capture['queries'],
+          f"{capture['sql_ms']:.1f}", capture['size']) for capture in list_captures()),
+    )
+    return HttpResponse(format_html(
+        '<!DOCTYPE html><html><head><title>Request profiles</title></head><body>'
+        '<h1>Request profiles</h1>'
+        '<p>Staff requests sent with <code>X-Profile: 1</code> or <code>?_profile=1</code> are captured here '
+        '(newest {} kept).</p>'
+        '<table><tr><th>Bundle</th><th>Created</th><th>Request</th><th>View</th><th>Status</th>'
+        '<th>ms</th><th>Queries</th><th>SQL ms</th><th>Bytes</th></tr>{}</table></body></html>',
+        getattr(settings, 'PROFILING_MAX_CAPTURES', 20), rows,
+    ))
+
+
+def profile_capture_download(request, name):
+    if not CAPTURE_NAME.match(name):
+        raise Http404
+    path = os.path.join(get_capture_dir(), name)
+    if not os.path.isfile(path):
+        raise Http404
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=name, content_type='application/zip')
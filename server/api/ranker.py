@@ -0,0 +1,227 @@
+import hashlib
+import json
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from .specs import (
+    CPU_TIER_BASIC, CPU_TIER_HIGH, CPU_TIER_MODERATE, HIGH_PERFORMANCE_GPU_CLASSES, PERFORMANCE_CPU_TIERS,
+    parse_display_inches,
+)
+
+# How much each criterion counts towards the overall score
+CRITERIA_WEIGHTS = {
+    'budget': 3.0,
+    'performance': 2.0,
+    'ram': 1.5,
+    'storage': 1.0,
+    'display': 1.0,
+    'brand': 1.0,
+}
+
+# Use cases mentioned in a chat, mapped to the CPU tier they call for
+USE_CASE_TIERS = [
+    (CPU_TIER_HIGH, ('gaming', 'engineering', 'data science', 'machine learning', 'video editing',
+                     'content creation', 'creator', 'animation', '3d', 'modeling', 'workstation')),
+    (CPU_TIER_MODERATE, ('programming', 'development', 'developer', 'coding', 'business', 'multimedia',
+                         'design', 'professional')),
+    (CPU_TIER_BASIC, ('student', 'study', 'school', 'office', 'browsing', 'basic', 'everyday', 'portable')),
+]
+
+# A screen within this many inches of the preference counts as a match
+DISPLAY_TOLERANCE = 0.5
+# Price overshoot (as a fraction of the budget) at which the budget score reaches 0
+BUDGET_OVERSHOOT = 0.5
+
+
+def _positive_number(value, name):
+    if value in (None, ''):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a number")
+    if not np.isfinite(number) or number <= 0:
+        raise ValueError(f"{name} must be a positive number")
+    return number
+
+
+def _use_case_tier(use_cases):
+    tier = None
+    for use_case in use_cases:
+        use_case = str(use_case).lower()
+        for case_tier, keywords in USE_CASE_TIERS:
+            if any(keyword in use_case for keyword in keywords):
+                tier = max(tier or 0, case_tier)
+                break
+    return tier
+
+
+def parse_specs(data):
+    """Normalize extracted specs into the criteria the ranker scores.
+
+    Accepts the spec extraction JSON (budget, min_ram, min_storage,
+    display_size_preference, preferred_brands, use_cases) plus an
+    optional explicit performance_level. Raises ValueError on bad input.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("specs must be an object")
+    criteria = {}
+
+    budget = _positive_number(data.get('budget'), 'budget')
+    if budget:
+        criteria['budget'] = budget
+    min_ram = _positive_number(data.get('min_ram'), 'min_ram')
+    if min_ram:
+        criteria['ram'] = min_ram
+    min_storage = _positive_number(data.get('min_storage'), 'min_storage')
+    if min_storage:
+        criteria['storage'] = min_storage
+
+    display = data.get('display_size_preference')
+    if display not in (None, ''):
+        inches = parse_display_inches(display)
+        if inches is None:
+            raise ValueError("display_size_preference must be a screen size")
+        criteria['display'] = float(inches)
+
+    brands = data.get('preferred_brands') or []
+    if not isinstance(brands, list):
+        raise ValueError("preferred_brands must be a list")
+    brands = sorted({str(brand).strip().lower() for brand in brands if str(brand).strip()})
+    if brands:
+        criteria['brand'] = brands
+
+    level = data.get('performance_level')
+    if level not in (None, ''):
+        tier = PERFORMANCE_CPU_TIERS.get(str(level).lower())
+        if tier is None:
+            raise ValueError("performance_level must be one of: " + ', '.join(PERFORMANCE_CPU_TIERS))
+    else:
+        use_cases = data.get('use_cases') or []
+        if not isinstance(use_cases, list):
+            raise ValueError("use_cases must be a list")
+        tier = _use_case_tier(use_cases)
+    if tier:
+        criteria['performance'] = tier
+
+    return criteria
+
+
+def score_criteria(engine, criteria):
+    """Return {criterion: (score in [0, 1], matched)} arrays over every row of the engine"""
+    scores = {}
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if 'budget' in criteria:
+            budget = criteria['budget']
+            overshoot = (engine.price - budget) / (budget * BUDGET_OVERSHOOT)
+            score = np.where(engine.price <= budget, 1.0, np.clip(1 - overshoot, 0, 1))
+            scores['budget'] = (np.nan_to_num(score), engine.price <= budget)
+
+        for criterion, column in (('ram', engine.ram_gb), ('storage', engine.storage_gb)):
+            if criterion in criteria:
+                wanted = criteria[criterion]
+                scores[criterion] = (np.nan_to_num(np.clip(column / wanted, 0, 1)), column >= wanted)
+
+        if 'display' in criteria:
+            distance = np.abs(engine.display_inches - criteria['display'])
+            score = np.clip(1 - np.maximum(distance - DISPLAY_TOLERANCE, 0) / 2.5, 0, 1)
+            scores['display'] = (np.nan_to_num(score), distance <= DISPLAY_TOLERANCE)
+
+        if 'brand' in criteria:
+            matched = np.isin(engine.brand_lower, criteria['brand'])
+            scores['brand'] = (matched.astype(float), matched)
+
+        if 'performance' in criteria:
+            tier = criteria['performance']
+            score = np.clip(engine.cpu_tier / tier, 0, 1)
+            matched = engine.cpu_tier >= tier
+            if tier == CPU_TIER_HIGH:
+                capable_gpu = np.isin(engine.gpu_class.astype(str), HIGH_PERFORMANCE_GPU_CLASSES)
+                score = np.where(capable_gpu, score, score * 0.5)
+                matched &= capable_gpu
+            scores['performance'] = (score, matched)
+    return scores
+
+
+def _explain(engine, criteria, criterion, position):
+    wanted = criteria[criterion]
+    if criterion == 'budget':
+        price = engine.price[position]
+        return f"price unknown (budget {wanted:,.0f})" if np.isnan(price) else f"price {price:,.0f} (budget {wanted:,.0f})"
+    if criterion in ('ram', 'storage'):
+        value = (engine.ram_gb if criterion == 'ram' else engine.storage_gb)[position]
+        label = 'RAM' if criterion == 'ram' else 'storage'
+        return f"{label} unknown (wanted {wanted:g}GB+)" if np.isnan(value) else f"{value:g}GB {label} (wanted {wanted:g}GB+)"
+    if criterion == 'display':
+        inches = engine.display_inches[position]
+        return f"screen unknown (wanted {wanted:g}\")" if np.isnan(inches) else f"{inches:g}\" screen (wanted {wanted:g}\")"
+    if criterion == 'brand':
+        return f"{engine.brand[position]} (wanted {', '.join(wanted)})"
+    level = {tier: name for name, tier in PERFORMANCE_CPU_TIERS.items()}
+    have = level.get(int(engine.cpu_tier[position]), 'unknown')
+    return f"{have} CPU tier, {engine.gpu_class[position]} graphics (wanted {level[wanted]})"
+
+
+def rank(engine, criteria, limit=10):
+    """Score every laptop against the criteria in one pass and return the top matches.
+
+    Every row gets a weighted score, so a request whose criteria nothing
+    fully meets still returns the closest laptops (with the misses spelled
+    out) instead of an empty list. Ties go to the cheaper laptop, then to
+    the catalog's default order, so the result is deterministic.
+    """
+    scores = score_criteria(engine, criteria)
+    count = len(engine)
+    total = np.zeros(count)
+    matched_all = np.ones(count, dtype=bool)
+    weight = sum(CRITERIA_WEIGHTS[criterion] for criterion in scores) or 1.0
+    for criterion, (score, matched) in scores.items():
+        total += CRITERIA_WEIGHTS[criterion] * score
+        matched_all &= matched
+    total /= weight
+
+    default_rank = np.empty(count, dtype=np.int64)
+    default_rank[engine.sort_order(None)] = np.arange(count)
+    price = np.where(np.isnan(engine.price), np.inf, engine.price)
+
+    limit = min(limit, count)
+    if not limit:
+        return {'criteria': criteria, 'exact_matches': 0, 'results': []}
+    # Keep every row tied with the k-th best score so the cut is deterministic
+    threshold = np.partition(-total, limit - 1)[limit - 1]
+    candidates = np.flatnonzero(-total <= threshold)
+    candidates = candidates[np.lexsort((default_rank[candidates], price[candidates], -total[candidates]))][:limit]
+
+    results = []
+    for position in candidates:
+        results.append({
+            'laptop': engine.rows[position],
+            'score': round(float(total[position]), 4),
+            'matched_all': bool(matched_all[position]),
+            'criteria': {
+                criterion: {
+                    'matched': bool(matched[position]),
+                    'score': round(float(score[position]), 4),
+                    'detail': _explain(engine, criteria, criterion, position),
+                }
+                for criterion, (score, matched) in scores.items()
+            },
+        })
+    return {
+        'criteria': criteria,
+        'exact_matches': int(np.count_nonzero(matched_all)) if scores else 0,
+        'results': results,
+    }
+
+
+def get_recommendations(engine, criteria, limit=10):
+    """rank(), cached per catalog version and criteria"""
+    digest = hashlib.sha1(json.dumps([criteria, limit], sort_keys=True).encode()).hexdigest()
+    key = f'api:recommend:{engine.version}:{digest}'
+    recommendations = cache.get(key)
+    if recommendations is None:
+        recommendations = rank(engine, criteria, limit)
+        cache.set(key, recommendations, getattr(settings, 'CATALOG_RECOMMEND_CACHE_TIMEOUT', 300))
+    return recommendations
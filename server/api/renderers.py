@@ -0,0 +1,42 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+from .metrics import track_serialization
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional, JSONRenderer is the fallback
+    orjson = None
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer that encodes with orjson when it is installed.
+
+    For the compact, unicode output DRF renders by default the bytes are the
+    same as JSONRenderer's; indented or ASCII-only output, and any setup
+    without orjson, goes through JSONRenderer itself.
+    """
+    # NumPy arrays and scalars are encoded natively; JSONRenderer converts them with .tolist()
+    options = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_SERIALIZE_NUMPY) if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if orjson is None or indent or not self.compact or self.ensure_ascii:
+            with track_serialization():
+                return super().render(data, accepted_media_type, renderer_context)
+
+        # Dates, decimals, lazy strings etc. are formatted by DRF's own encoder
+        with track_serialization():
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=self.options)
+        # Same escaping JSONRenderer applies for JavaScript compatibility
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+def orjson_renderer_classes():
+    """DEFAULT_RENDERER_CLASSES with JSONRenderer swapped for ORJSONRenderer"""
+    return [
+        ORJSONRenderer if renderer is JSONRenderer else renderer
+        for renderer in api_settings.DEFAULT_RENDERER_CLASSES
+    ]
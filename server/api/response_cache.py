@@ -0,0 +1,131 @@
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from rest_framework.response import Response
+
+from .catalog import canonical_params, get_catalog_version
+
+RESPONSE_CACHE_ALIAS = 'catalog'
+
+_local_cache = None
+_stats = {'hits': 0, 'misses': 0}
+_stats_lock = threading.Lock()
+
+
+def response_cache_enabled():
+    return getattr(settings, 'CATALOG_RESPONSE_CACHE_ENABLED', True)
+
+
+def get_response_cache():
+    """Return the cache used for catalog responses.
+
+    A CACHES['catalog'] entry wins if configured; otherwise a bounded
+    local-memory cache is used (LocMemCache evicts least recently used
+    entries once MAX_ENTRIES is reached).
+    """
+    global _local_cache
+    if RESPONSE_CACHE_ALIAS in settings.CACHES:
+        return caches[RESPONSE_CACHE_ALIAS]
+    if _local_cache is None:
+        _local_cache = LocMemCache('api-catalog-responses', {
+            'TIMEOUT': getattr(settings, 'CATALOG_RESPONSE_CACHE_TIMEOUT', 60),
+            'OPTIONS': {'MAX_ENTRIES': getattr(settings, 'CATALOG_RESPONSE_CACHE_MAX_ENTRIES', 1000)},
+        })
+    return _local_cache
+
+
+def _request_digest(request, name, **kwargs):
+    params = canonical_params(request.query_params)
+    raw = repr((request.get_host(), request.is_secure(), name, sorted(kwargs.items()), params))
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def response_cache_key(request, name, **kwargs):
+    return f'api:response:{get_catalog_version()}:{_request_digest(request, name, **kwargs)}'
+
+
+def response_etag(request, name, **kwargs):
+    """Strong ETag for a catalog read.
+
+    Any Laptop write bumps the catalog version, so the version plus the
+    canonical request identifies the representation without touching the
+    database. The version is shared by every worker (see
+    require_shared_catalog_cache), so neither is the ETag. The negotiated
+    renderer is included because JSON and the browsable API are different
+    bytes.
+    """
+    renderer = getattr(request, 'accepted_renderer', None)
+    raw = f'{get_catalog_version()}:{getattr(renderer, "format", "")}:{_request_digest(request, name, **kwargs)}'
+    return '"%s"' % hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _record(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def response_cache_stats():
+    with _stats_lock:
+        hits, misses = _stats['hits'], _stats['misses']
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else None,
+        'max_entries': getattr(settings, 'CATALOG_RESPONSE_CACHE_MAX_ENTRIES', 1000),
+    }
+
+
+def cached_response(request, name, build, **kwargs):
+    """Serve a catalog read from the response cache, calling build() on a miss.
+
+    Requests whose If-None-Match matches the current ETag get a 304 before
+    any cache or database access. Only the data and Last-Modified header of
+    200 responses are cached, so content negotiation still happens per
+    request. Keys embed the catalog version, so any Laptop write or import
+    makes every older entry unreachable.
+    """
+    if getattr(request, 'bypass_response_cache', False):
+        # Set on profiled requests (api/profiling.py), which must do the real work
+        return build()
+
+    etag = response_etag(request, name, **kwargs)
+    validators = HttpResponse()
+    validators['ETag'] = etag
+    not_modified = get_conditional_response(request, etag=etag, response=validators)
+    if not_modified is not validators:
+        return not_modified
+
+    if not response_cache_enabled():
+        return _with_validators(request, build(), etag)
+
+    cache = get_response_cache()
+    key = response_cache_key(request, name, **kwargs)
+    entry = cache.get(key)
+    if entry is not None:
+        _record('hits')
+        response = Response(entry['data'])
+        if entry['last_modified']:
+            response['Last-Modified'] = entry['last_modified']
+        return _with_validators(request, response, etag)
+
+    _record('misses')
+    response = build()
+    if response.status_code == 200:
+        cache.set(key, {'data': response.data, 'last_modified': response.get('Last-Modified')})
+    return _with_validators(request, response, etag)
+
+
+def _with_validators(request, response, etag):
+    if response.status_code != 200:
+        return response
+    response['ETag'] = etag
+    last_modified = response.get('Last-Modified')
+    last_modified = last_modified and parse_http_date_safe(last_modified)
+    return get_conditional_response(request, etag=etag, last_modified=last_modified, response=response)
@@ -0,0 +1,281 @@
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Case, FloatField, Value, When
+from rest_framework.filters import SearchFilter
+
+from .catalog import get_catalog_version
+from .models import Laptop
+
+# Indexed fields and how much a token occurrence in each counts towards term frequency
+SEARCH_FIELD_WEIGHTS = {
+    'name': 1.0,
+    'brand': 3.0,
+    'model': 2.0,
+    'processor': 1.0,
+    'graphics': 1.0,
+}
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# A prefix or one-typo match counts for less than the exact term
+PREFIX_WEIGHT = 0.8
+TYPO_WEIGHT = 0.5
+# Upper bound on index terms a single query token may expand to
+MAX_EXPANSIONS = 64
+# Shorter tokens are only matched exactly or by prefix
+TYPO_MIN_LENGTH = 4
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or '').lower())
+
+
+def _deletes(term):
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+def _within_one_edit(a, b):
+    """True if a and b differ by one insertion, deletion, substitution or transposition"""
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) < len(b):
+        return a[i:] == b[i + 1:]
+    if a[i + 1:] == b[i + 1:]:
+        return True
+    return i + 1 < len(a) and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:]
+
+
+class SearchIndex:
+    """An in-memory inverted index over the searchable Laptop fields.
+
+    Each posting stores a precomputed BM25 score, so a query only looks up
+    the postings of its (expanded) tokens and intersects them; the cost
+    follows the number of matching documents, not the catalog size.
+    Query tokens match index terms exactly, by prefix, or, failing both,
+    within one typo. Documents are kept per (pk, updated_at), so a rebuild
+    after an import only re-tokenizes the rows that changed.
+    """
+
+    def __init__(self, documents, version):
+        self.version = version
+        self.built_at = time.monotonic()
+        self.documents = documents
+        self.pks = list(documents)
+
+        lengths = np.array([sum(documents[pk][1].values()) for pk in self.pks], dtype=float)
+        average_length = lengths.mean() if len(lengths) else 0.0
+        norms = BM25_K1 * (1 - BM25_B + BM25_B * lengths / (average_length or 1.0))
+
+        # One flat (term id, doc, frequency) array, scored in bulk and split per term
+        term_ids = {}
+        entries = [
+            (term_ids.setdefault(term, len(term_ids)), doc, frequency)
+            for doc, pk in enumerate(self.pks)
+            for term, frequency in documents[pk][1].items()
+        ]
+        entries = np.array(entries, dtype=float).reshape(-1, 3)
+        terms = entries[:, 0].astype(np.int64)
+        docs = entries[:, 1].astype(np.int64)
+        frequencies = entries[:, 2]
+
+        document_frequency = np.bincount(terms, minlength=len(term_ids))
+        idf = np.log(1 + (len(self.pks) - document_frequency + 0.5) / (document_frequency + 0.5))
+        scores = idf[terms] * frequencies * (BM25_K1 + 1) / (frequencies + norms[docs])
+
+        # Stable, so each term's docs stay in ascending order
+        order = np.argsort(terms, kind='stable')
+        docs, scores = docs[order], scores[order]
+        ends = np.cumsum(document_frequency)
+        self.postings = {}
+        self.deletes = defaultdict(set)
+        for term, term_id in term_ids.items():
+            start = ends[term_id] - document_frequency[term_id]
+            self.postings[term] = (docs[start:ends[term_id]], scores[start:ends[term_id]])
+            if len(term) >= TYPO_MIN_LENGTH:
+                for variant in _deletes(term):
+                    self.deletes[variant].add(term)
+        self.terms = sorted(self.postings)
+
+    @staticmethod
+    def document_terms(values):
+        frequencies = Counter()
+        for field, weight in SEARCH_FIELD_WEIGHTS.items():
+            for token in tokenize(values[field]):
+                frequencies[token] += weight
+        return frequencies
+
+    @classmethod
+    def build(cls, version, previous=None):
+        """Index the catalog, reusing the previous index's unchanged documents"""
+        reusable = previous.documents if previous is not None else {}
+        documents = {}
+        changed = []
+        for pk, updated_at in Laptop.objects.order_by('pk').values_list('pk', 'updated_at'):
+            document = reusable.get(pk)
+            if document is not None and document[0] == updated_at:
+                documents[pk] = document
+            else:
+                documents[pk] = None
+                changed.append(pk)
+
+        fields = ['pk', 'updated_at', *SEARCH_FIELD_WEIGHTS]
+        batch_size = 1000
+        for start in range(0, len(changed), batch_size):
+            for values in Laptop.objects.filter(pk__in=changed[start:start + batch_size]).values(*fields):
+                if values['pk'] in documents:
+                    documents[values['pk']] = (values['updated_at'], cls.document_terms(values))
+        # Rows deleted between the two queries
+        documents = {pk: document for pk, document in documents.items() if document is not None}
+        return cls(documents, version)
+
+    def __len__(self):
+        return len(self.pks)
+
+    def expand(self, token):
+        """Return {index term: weight} for the terms a query token matches"""
+        expansions = {}
+        start = bisect_left(self.terms, token)
+        for term in self.terms[start:start + MAX_EXPANSIONS]:
+            if not term.startswith(token):
+                break
+            expansions[term] = 1.0 if term == token else PREFIX_WEIGHT
+        if expansions or len(token) < TYPO_MIN_LENGTH:
+            return expansions
+
+        candidates = set(self.deletes.get(token, ()))
+        if token in self.postings:
+            candidates.add(token)
+        for variant in _deletes(token):
+            if variant in self.postings:
+                candidates.add(variant)
+            candidates |= self.deletes.get(variant, set())
+        for term in sorted(candidates)[:MAX_EXPANSIONS]:
+            if _within_one_edit(token, term):
+                expansions[term] = TYPO_WEIGHT
+        return expansions
+
+    def _token_scores(self, token):
+        """Return (sorted doc ids, best score per doc) over a token's expansions"""
+        docs, scores = [], []
+        for term, weight in self.expand(token).items():
+            term_docs, term_scores = self.postings[term]
+            docs.append(term_docs)
+            scores.append(term_scores * weight)
+        if not docs:
+            return np.array([], dtype=np.int64), np.array([], dtype=float)
+        docs = np.concatenate(docs)
+        scores = np.concatenate(scores)
+        order = np.lexsort((-scores, docs))
+        docs, scores = docs[order], scores[order]
+        first = np.ones(len(docs), dtype=bool)
+        first[1:] = docs[1:] != docs[:-1]
+        return docs[first], scores[first]
+
+    def search(self, terms, limit=None):
+        """Return {pk: score} for documents matching every query token, best first.
+
+        terms are the search terms as split by SearchFilter; each is
+        tokenized the same way as the indexed fields.
+        """
+        tokens = list(dict.fromkeys(token for term in terms for token in tokenize(term)))
+        if not tokens:
+            return {}
+
+        docs = scores = None
+        # Intersect starting from the rarest token to keep the candidate set small
+        for token_docs, token_scores in sorted((self._token_scores(token) for token in tokens), key=lambda pair: len(pair[0])):
+            if docs is None:
+                docs, scores = token_docs, token_scores
+                continue
+            keep = np.isin(docs, token_docs, assume_unique=True)
+            docs, scores = docs[keep], scores[keep]
+            scores = scores + token_scores[np.searchsorted(token_docs, docs)]
+            if not len(docs):
+                break
+
+        pks = [self.pks[doc] for doc in docs]
+        ranked = sorted(zip(pks, scores.tolist()), key=lambda pair: (-pair[1], pair[0]))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return dict(ranked)
+
+
+def search_max_results():
+    return getattr(settings, 'CATALOG_SEARCH_MAX_RESULTS', 1000)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def _is_stale(index, version):
+    max_age = getattr(settings, 'CATALOG_SEARCH_MAX_AGE', getattr(settings, 'CATALOG_ENGINE_MAX_AGE', 300))
+    return index is None or index.version != version or time.monotonic() - index.built_at > max_age
+
+
+def get_search_index():
+    """Return this worker's search index, rebuilding it if the catalog version moved on"""
+    global _index
+    version = get_catalog_version()
+    index = _index
+    if _is_stale(index, version):
+        with _index_lock:
+            if _is_stale(_index, version):
+                _index = SearchIndex.build(version, previous=_index)
+            index = _index
+    return index
+
+
+def search_scores(search_terms, by_relevance=True):
+    """Return {pk: score} for a search.
+
+    Results listed by relevance are capped at CATALOG_SEARCH_MAX_RESULTS,
+    the best matches being the ones worth paging through. Under an explicit
+    ordering every match counts, or the cut would drop rows the ordering
+    puts first (the cheapest, say) and cap the count.
+    """
+    return get_search_index().search(search_terms, limit=search_max_results() if by_relevance else None)
+
+
+class RankedSearchFilter(SearchFilter):
+    """SearchFilter backed by the in-memory index instead of icontains lookups.
+
+    Matches are restricted to the ranked hits and, unless the request asks
+    for an explicit ordering, sorted by relevance with the view's own
+    ordering as the tie-breaker.
+    """
+    score_annotation = 'search_score'
+
+    def filter_queryset(self, request, queryset, view):
+        search_terms = self.get_search_terms(request)
+        if not search_terms:
+            return queryset
+
+        ordering = request.query_params.get('ordering')
+        scores = search_scores(search_terms, by_relevance=not ordering)
+        queryset = queryset.filter(pk__in=list(scores))
+        if ordering or not scores:
+            return queryset
+        score = Case(
+            *[When(pk=pk, then=Value(value)) for pk, value in scores.items()],
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+        return queryset.annotate(**{self.score_annotation: score}).order_by(
+            f'-{self.score_annotation}', *queryset.query.order_by
+        )
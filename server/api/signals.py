@@ -0,0 +1,50 @@
+from contextlib import contextmanager
+
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate_token_cache
+from .catalog import bump_catalog_version
+from .models import Laptop
+
+
+@receiver(post_save, sender=Laptop)
+@receiver(post_delete, sender=Laptop)
+def laptop_changed(sender, **kwargs):
+    bump_catalog_version()
+
+
+@contextmanager
+def laptop_signals_disconnected():
+    """Stop Laptop writes from bumping the catalog version, for bulk jobs that bump once at the end.
+
+    Without a receiver, deletes also skip loading every row to send
+    post_delete. The receiver is disconnected for the whole process, so this
+    is meant for scripts such as import_data.py, not for request handling.
+    """
+    post_save.disconnect(laptop_changed, sender=Laptop)
+    post_delete.disconnect(laptop_changed, sender=Laptop)
+    try:
+        yield
+    finally:
+        post_save.connect(laptop_changed, sender=Laptop)
+        post_delete.connect(laptop_changed, sender=Laptop)
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def token_changed(sender, instance, created=False, **kwargs):
+    # A new token has nothing cached yet
+    if not created:
+        invalidate_token_cache(instance.user_id, instance.key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    # login() saves last_login on every sign-in, which doesn't affect authentication
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    invalidate_token_cache(instance.pk)
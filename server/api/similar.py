@@ -0,0 +1,193 @@
+import threading
+
+import numpy as np
+from django.conf import settings
+
+from .finder import _PRICE, FEATURE_WEIGHTS, MISSING_DISTANCE, get_finder_index, transform
+
+# Squared distance added between laptops of different or unknown categories
+CATEGORY_DISTANCE = 2.0
+
+
+def _neighbour_count():
+    return getattr(settings, 'CATALOG_SIMILAR_NEIGHBOURS', 20)
+
+
+class SimilarIndex:
+    """Precomputed table of every laptop's nearest neighbours by spec.
+
+    Distances use the finder's features and weights: weighted squared
+    differences in a normalized space, MISSING_DISTANCE when either laptop
+    lacks a value, plus CATEGORY_DISTANCE across categories. A lookup only
+    reads one row of the table.
+
+    A full build compares every pair of laptops, so its cost grows with the
+    square of the catalog; it runs in chunks of at most
+    CATALOG_SIMILAR_CHUNK_CELLS distances. When the finder index is rebuilt
+    after a change, the table is refreshed instead:
+    - laptops whose neighbours all survived keep them and only get compared
+      with the changed rows;
+    - new and changed laptops, and those that lost a neighbour, are
+      recomputed against the whole catalog.
+    The normalization is kept from the last full build so refreshed rows
+    stay comparable. A full rebuild happens once more than
+    CATALOG_SIMILAR_REBUILD_SHARE of the catalog has changed since then.
+    """
+
+    def __init__(self, finder, mean, std, neighbours, distances, changed_since_build=0):
+        self.finder = finder
+        self.mean = mean
+        self.std = std
+        self.neighbours = neighbours
+        self.distances = distances
+        self.changed_since_build = changed_since_build
+
+        values = (transform(finder.raw) - mean) / std
+        known = (~np.isnan(values)).astype(float)
+        values = np.nan_to_num(values)
+        codes = {}
+        categories = [codes.setdefault(category, len(codes)) if category is not None else None
+                      for category in finder.categories]
+        same_category = np.zeros((len(finder), len(codes)))
+        for row, code in enumerate(categories):
+            if code is not None:
+                same_category[row, code] = 1.0
+        # The distance between rows i and j is left[i] @ right[j] + _offset:
+        # sum(w * (x - y)^2) over the features both laptops have, expanded,
+        # plus MISSING_DISTANCE for each one either lacks, plus
+        # CATEGORY_DISTANCE unless both have the same known category
+        weights = FEATURE_WEIGHTS[None, :]
+        self._left = np.hstack([
+            np.square(values) * weights, -2 * values * weights, known * weights,
+            -MISSING_DISTANCE * known * weights, -CATEGORY_DISTANCE * same_category,
+        ])
+        self._right = np.hstack([known, values, np.square(values), known, same_category])
+        self._offset = MISSING_DISTANCE * FEATURE_WEIGHTS.sum() + CATEGORY_DISTANCE
+        # Ties go to the cheaper laptop, then to pk order (finder positions are in pk order)
+        self._price = np.nan_to_num(finder.raw[:, _PRICE], nan=np.inf)
+
+    @classmethod
+    def build(cls, finder, previous=None):
+        """Build the table for finder's rows, refreshing previous's where it can"""
+        if previous is not None and previous.neighbours.shape[1] == _neighbour_count():
+            index = cls._refresh(finder, previous)
+            if index is not None:
+                return index
+
+        k = _neighbour_count()
+        # Fresh builds share the finder's normalization
+        index = cls(finder, finder.mean, finder.std, np.full((len(finder), k), -1, dtype=np.int64),
+                    np.full((len(finder), k), np.inf))
+        index._compute(np.arange(len(finder)))
+        return index
+
+    @classmethod
+    def _refresh(cls, finder, previous):
+        old = previous.finder
+        unchanged, sources = [], []
+        for i, (pk, updated) in enumerate(zip(finder.pks, finder.updated_at)):
+            j = old.position.get(pk)
+            if j is not None and old.updated_at[j] == updated:
+                unchanged.append(i)
+                sources.append(j)
+        changed = np.setdiff1d(np.arange(len(finder)), unchanged)
+        changed_since_build = previous.changed_since_build + len(changed) + len(old) - len(unchanged)
+        if changed_since_build > getattr(settings, 'CATALOG_SIMILAR_REBUILD_SHARE', 0.2) * max(len(finder), 1):
+            return None
+
+        unchanged, sources = np.array(unchanged, dtype=np.int64), np.array(sources, dtype=np.int64)
+        remap = np.full(len(old), -1, dtype=np.int64)
+        remap[sources] = unchanged
+        old_neighbours = previous.neighbours[sources]
+        neighbours = np.where(old_neighbours >= 0, remap[np.maximum(old_neighbours, 0)], -1)
+        lost = ((old_neighbours >= 0) & (neighbours < 0)).any(axis=1)
+
+        k = previous.neighbours.shape[1]
+        index = cls(finder, previous.mean, previous.std, np.full((len(finder), k), -1, dtype=np.int64),
+                    np.full((len(finder), k), np.inf), changed_since_build)
+        kept = unchanged[~lost]
+        index.neighbours[kept] = neighbours[~lost]
+        index.distances[kept] = previous.distances[sources[~lost]]
+        if len(changed):
+            index._merge(kept, changed)
+        index._compute(np.concatenate([unchanged[lost], changed]))
+        return index
+
+    def __len__(self):
+        return len(self.finder)
+
+    def _chunks(self, rows, columns):
+        size = max(1, getattr(settings, 'CATALOG_SIMILAR_CHUNK_CELLS', 4_000_000) // max(columns, 1))
+        for start in range(0, len(rows), size):
+            yield rows[start:start + size]
+
+    def pair_distances(self, rows, columns):
+        """(rows x columns) distances between two sets of positions"""
+        distances = self._left[rows] @ self._right[columns].T
+        distances += self._offset
+        # Rounding in the expansion can dip just below zero
+        return np.maximum(distances, 0, out=distances)
+
+    def _select(self, rows, candidates, distances):
+        """Write the k nearest of each row's candidates into the table; -1 candidates must be at infinity"""
+        k = self.neighbours.shape[1]
+        if candidates.shape[1] > k:
+            # Keep every candidate tied with the k-th closest so the cut is deterministic
+            threshold = np.partition(distances, k - 1, axis=1)[:, k - 1]
+            row_of, column_of = np.nonzero(distances <= threshold[:, None])
+        else:
+            row_of, column_of = np.nonzero(np.ones(candidates.shape, dtype=bool))
+        positions = candidates[row_of, column_of]
+        values = distances[row_of, column_of]
+        order = np.lexsort((positions, self._price[positions], values, row_of))
+        row_of, positions, values = row_of[order], positions[order], values[order]
+        rank = np.arange(len(row_of)) - np.searchsorted(row_of, row_of)
+        keep = (rank < k) & np.isfinite(values)
+        neighbours = np.full((len(rows), k), -1, dtype=np.int64)
+        table = np.full((len(rows), k), np.inf)
+        neighbours[row_of[keep], rank[keep]] = positions[keep]
+        table[row_of[keep], rank[keep]] = values[keep]
+        self.neighbours[rows] = neighbours
+        self.distances[rows] = table
+
+    def _compute(self, rows):
+        """Fill rows' neighbours from the whole catalog"""
+        everything = np.arange(len(self))
+        for part in self._chunks(rows, len(self)):
+            distances = self.pair_distances(part, everything)
+            # A laptop isn't similar to itself
+            distances[np.arange(len(part)), part] = np.inf
+            self._select(part, np.broadcast_to(everything, (len(part), len(self))), distances)
+
+    def _merge(self, rows, changed):
+        """Let changed laptops displace rows' current neighbours where they are closer"""
+        for part in self._chunks(rows, len(changed) + self.neighbours.shape[1]):
+            candidates = np.hstack([self.neighbours[part], np.broadcast_to(changed, (len(part), len(changed)))])
+            distances = np.hstack([self.distances[part], self.pair_distances(part, changed)])
+            self._select(part, candidates, distances)
+
+    def similar(self, pk, limit):
+        """Return (positions, distances, count) of pk's nearest laptops, or None for an unknown pk"""
+        position = self.finder.position.get(pk)
+        if position is None:
+            return None
+        found = self.neighbours[position] >= 0
+        positions = self.neighbours[position][found][:limit]
+        return positions, self.distances[position][found][:limit], len(positions)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_similar_index():
+    """Return this worker's neighbour table, refreshed whenever the finder index is rebuilt"""
+    global _index
+    finder = get_finder_index()
+    index = _index
+    if index is None or index.finder is not finder:
+        with _index_lock:
+            if _index is None or _index.finder is not finder:
+                _index = SimilarIndex.build(finder, previous=_index)
+            index = _index
+    return index
@@ -0,0 +1,173 @@
+import math
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Q
+
+# CPU tiers, in the same buckets the catalog "performance" filter uses
+CPU_TIER_UNKNOWN = 0
+CPU_TIER_BASIC = 1
+CPU_TIER_MODERATE = 2
+CPU_TIER_HIGH = 3
+
+GPU_CLASS_INTEGRATED = 'integrated'
+GPU_CLASS_DISCRETE = 'discrete'
+GPU_CLASS_APPLE = 'apple'
+
+# Keyword rules lifted from the old icontains chains in LaptopViewSet
+CPU_TIER_KEYWORDS = [
+    (CPU_TIER_HIGH, ('i7', 'i9', 'ryzen 7', 'ryzen 9', 'm1', 'm2', 'm3')),
+    (CPU_TIER_MODERATE, ('i5', 'ryzen 5')),
+    (CPU_TIER_BASIC, ('i3', 'celeron', 'pentium', 'athlon')),
+]
+GPU_CLASS_KEYWORDS = [
+    (GPU_CLASS_DISCRETE, ('rtx', 'gtx')),
+    (GPU_CLASS_APPLE, ('m1', 'm2', 'm3')),
+]
+
+PERFORMANCE_CPU_TIERS = {
+    'high': CPU_TIER_HIGH,
+    'moderate': CPU_TIER_MODERATE,
+    'basic': CPU_TIER_BASIC,
+}
+# "high" also needs a capable GPU, the other levels only look at the CPU
+HIGH_PERFORMANCE_GPU_CLASSES = [GPU_CLASS_DISCRETE, GPU_CLASS_APPLE]
+
+_NUMBER_RE = re.compile(r'(\d+(?:\.\d+)?)\s*(TB|GB)?', re.IGNORECASE)
+
+# Sellers list decimal terabytes as 1000/2000/... GB, the filters use binary sizes
+_DECIMAL_TB_SIZES = {1000: 1024, 2000: 2048, 4000: 4096, 8000: 8192}
+
+
+def _is_blank(value):
+    return value is None or str(value).strip() in ('', 'nan', 'None')
+
+
+def parse_ram_gb(value):
+    """Return the RAM size in GB as an int, or None if it can't be parsed"""
+    if _is_blank(value):
+        return None
+    match = _NUMBER_RE.search(str(value))
+    if not match:
+        return None
+    size = float(match.group(1))
+    if (match.group(2) or '').upper() == 'TB':
+        size *= 1024
+    return int(round(size))
+
+
+def parse_storage_gb(value):
+    """Return the storage size in GB as an int, or None if it can't be parsed"""
+    if _is_blank(value):
+        return None
+    match = _NUMBER_RE.search(str(value))
+    if not match:
+        return None
+    size = float(match.group(1))
+    if (match.group(2) or '').upper() == 'TB':
+        size *= 1024
+    size = int(round(size))
+    return _DECIMAL_TB_SIZES.get(size, size)
+
+
+def parse_display_inches(value):
+    """Return the screen diagonal in inches as a Decimal, or None"""
+    if _is_blank(value):
+        return None
+    match = _NUMBER_RE.search(str(value))
+    if not match:
+        return None
+    return Decimal(match.group(1)).quantize(Decimal('0.01'))
+
+
+def classify_cpu(processor):
+    """Map a free-text processor name to one of the CPU_TIER_* constants"""
+    if _is_blank(processor):
+        return CPU_TIER_UNKNOWN
+    text = str(processor).lower()
+    for tier, keywords in CPU_TIER_KEYWORDS:
+        if any(keyword in text for keyword in keywords):
+            return tier
+    return CPU_TIER_UNKNOWN
+
+
+def classify_gpu(graphics):
+    """Map a free-text graphics name to one of the GPU_CLASS_* constants"""
+    if _is_blank(graphics):
+        return GPU_CLASS_INTEGRATED
+    text = str(graphics).lower()
+    for gpu_class, keywords in GPU_CLASS_KEYWORDS:
+        if any(keyword in text for keyword in keywords):
+            return gpu_class
+    return GPU_CLASS_INTEGRATED
+
+
+def spec_columns(ram, storage, display_size, processor, graphics):
+    """Return the normalized spec columns for one laptop as a dict"""
+    return {
+        'ram_gb': parse_ram_gb(ram),
+        'storage_gb': parse_storage_gb(storage),
+        'display_inches': parse_display_inches(display_size),
+        'cpu_tier': classify_cpu(processor),
+        'gpu_class': classify_gpu(graphics),
+    }
+
+
+# Largest value the integer spec columns hold; larger filter values can't match anything
+MAX_SPEC_INT = 2 ** 31 - 1
+
+
+def parse_int_list(values):
+    """Parse a list of filter strings as ints, skipping anything invalid, infinite or out of range"""
+    parsed = []
+    for value in values:
+        try:
+            number = float(value)
+        except (ValueError, TypeError):
+            continue
+        if math.isfinite(number) and abs(number) <= MAX_SPEC_INT:
+            parsed.append(int(number))
+    return parsed
+
+
+def screen_size_range(value):
+    """Return the [low, high) inch range matched by a screen_size filter value.
+
+    The old filter was display_size__startswith, so "15" covers 15.0-15.99
+    and "15.6" covers 15.60-15.69.
+    """
+    try:
+        low = Decimal(value.strip())
+    except (InvalidOperation, AttributeError):
+        return None
+    if not low.is_finite():
+        return None
+    exponent = min(low.as_tuple().exponent, 0)
+    return low, low + Decimal(1).scaleb(exponent)
+
+
+def storage_q(values):
+    """Build the storage filter as an indexed storage_gb__in predicate"""
+    return Q(storage_gb__in=parse_int_list(values))
+
+
+def screen_size_q(values):
+    """Build the screen_size filter as OR'd display_inches range predicates"""
+    q_objects = Q()
+    for value in values:
+        bounds = screen_size_range(value)
+        if bounds:
+            q_objects |= Q(display_inches__gte=bounds[0], display_inches__lt=bounds[1])
+    return q_objects if q_objects else Q(pk__in=[])
+
+
+def performance_q(levels):
+    """Build the performance filter from the cpu_tier/gpu_class columns"""
+    q_objects = Q()
+    for level in levels:
+        tier = PERFORMANCE_CPU_TIERS.get(level)
+        if tier == CPU_TIER_HIGH:
+            q_objects |= Q(cpu_tier=tier, gpu_class__in=HIGH_PERFORMANCE_GPU_CLASSES)
+        elif tier is not None:
+            q_objects |= Q(cpu_tier=tier)
+    return q_objects
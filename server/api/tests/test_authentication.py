@@ -0,0 +1,53 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+PRIVATE_PATH = '/server/api/favorites/laptop_ids/'
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user('alice', password='secret')
+        cls.bob = User.objects.create_user('bob', password='secret')
+
+    def setUp(self):
+        self.clients = {}
+        for user in (self.alice, self.bob):
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+            self.clients[user.username] = client
+
+    def queries(self, client):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(PRIVATE_PATH)
+        self.assertEqual(response.status_code, 200)
+        return [query['sql'] for query in queries if 'authtoken' in query['sql']]
+
+    def test_lookup_is_cached(self):
+        self.assertTrue(self.queries(self.clients['alice']))
+        self.assertFalse(self.queries(self.clients['alice']))
+
+    def test_user_change_only_drops_that_user(self):
+        self.queries(self.clients['alice'])
+        self.queries(self.clients['bob'])
+        self.bob.first_name = 'Bob'
+        self.bob.save()
+        self.assertFalse(self.queries(self.clients['alice']))
+        self.assertTrue(self.queries(self.clients['bob']))
+
+    def test_deactivated_user_is_refused(self):
+        self.queries(self.clients['alice'])
+        self.alice.is_active = False
+        self.alice.save()
+        self.assertEqual(self.clients['alice'].get(PRIVATE_PATH).status_code, 401)
+
+    def test_deleted_token_is_refused(self):
+        self.queries(self.clients['alice'])
+        self.queries(self.clients['bob'])
+        Token.objects.filter(user=self.alice).get().delete()
+        self.assertEqual(self.clients['alice'].get(PRIVATE_PATH).status_code, 401)
+        self.assertFalse(self.queries(self.clients['bob']))
@@ -0,0 +1,37 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from api.catalog import CATALOG_VERSION_KEY, bump_catalog_version, get_catalog_version
+from api.models import Laptop
+
+
+class CatalogVersionTests(TestCase):
+    """With a local-memory cache the version comes from the table, so every process agrees on it"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Laptop.objects.create(id='laptop-a', name='HP Laptop', brand='HP', price=30000)
+        Laptop.objects.create(id='laptop-b', name='Dell Laptop', brand='Dell', price=40000)
+
+    def setUp(self):
+        bump_catalog_version()
+
+    def test_write_bumps_version(self):
+        version = get_catalog_version()
+        self.assertEqual(get_catalog_version(), version)
+        Laptop.objects.filter(pk='laptop-a').delete()
+        self.assertNotEqual(get_catalog_version(), version)
+
+    def test_other_process_write_seen_after_expiry(self):
+        version = get_catalog_version()
+        # Another process's save: no signal reaches this one's cache
+        laptop = Laptop.objects.get(pk='laptop-b')
+        Laptop.objects.filter(pk='laptop-b').update(price=1, updated_at=laptop.updated_at.replace(year=2099))
+        self.assertEqual(get_catalog_version(), version)
+        cache.delete(CATALOG_VERSION_KEY)  # what CATALOG_VERSION_TTL does
+        self.assertNotEqual(get_catalog_version(), version)
+
+    def test_same_rows_same_version(self):
+        version = get_catalog_version()
+        cache.delete(CATALOG_VERSION_KEY)
+        self.assertEqual(get_catalog_version(), version)
@@ -0,0 +1,133 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.catalog import bump_catalog_version
+from api.models import Laptop
+
+LIST_PATH = '/server/api/laptops/'
+FACETS_PATH = '/server/api/laptops/facets/'
+
+BRANDS = ['HP', 'Dell', 'Lenovo', 'ASUS']
+CATEGORIES = ['Gaming', 'Business', 'Study', None]
+PROCESSORS = ['Intel Core i7-12700H', 'Intel Core i5-1235U', 'Intel Celeron N4020']
+GRAPHICS = ['NVIDIA GeForce RTX 3060', 'Intel UHD Graphics']
+STORAGE = ['256GB', '512GB', '1TB', None]
+DISPLAY_SIZES = ['14', '15.6', '13.3']
+PRICES = [18500, 25000, None, 31000, 42000]
+
+# Facet name -> list param it counts, for the options in each bucket
+FACET_PARAMS = ['brand', 'category', 'condition', 'storage', 'screen_size', 'performance']
+
+# Active filter sets, single and combined, including several options of one facet
+CASES = [
+    {},
+    {'brand': 'HP'},
+    {'brand': 'HP,Dell'},
+    {'brand': 'HP', 'category': 'Gaming'},
+    {'brand': 'Lenovo,ASUS', 'category': 'Business,Study', 'condition': 'New'},
+    {'storage': '512,1024', 'performance': 'high,basic'},
+    {'screen_size': '15.6', 'min_price': '20000'},
+    {'category': 'Gaming', 'max_price': '30000', 'processor': 'i7'},
+    {'brand': 'Dell', 'search': 'laptop 7'},
+]
+
+
+class FacetsTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(48):
+            Laptop.objects.create(
+                id=f'laptop-{i:02d}',
+                name=f'{BRANDS[i % 4]} Laptop {i}',
+                brand=BRANDS[i % 4],
+                model='',
+                category=CATEGORIES[i % 3 if i % 7 else 3],
+                processor=PROCESSORS[i % 3],
+                graphics=GRAPHICS[i % 2],
+                storage=STORAGE[(i // 2) % 4],
+                display_size=DISPLAY_SIZES[i % 3],
+                price=PRICES[i % 5],
+                condition='Used' if i % 5 == 0 else 'New',
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        bump_catalog_version()
+        self.client = APIClient()
+
+    def list_count(self, params):
+        response = self.client.get(LIST_PATH, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data['count']
+
+
+@override_settings(CATALOG_RESPONSE_CACHE_ENABLED=False, CATALOG_ENGINE_ENABLED=False)
+class FacetCountTests(FacetsTestCase):
+    """Facet counts must agree with what the (ORM) list endpoint returns for each option"""
+
+    def test_counts_match_list_endpoint(self):
+        for params in CASES:
+            facets = self.client.get(FACETS_PATH, params).data
+            self.assertEqual(facets['count'], self.list_count(params))
+            for name in FACET_PARAMS:
+                for bucket in facets['facets'][name]:
+                    # Picking the option replaces the facet's own filter and keeps every other one
+                    with self.subTest(params=params, facet=name, value=bucket['value']):
+                        self.assertEqual(bucket['count'], self.list_count({**params, name: bucket['value']}))
+
+    def test_options_are_counted_without_own_filter(self):
+        facets = self.client.get(FACETS_PATH, {'brand': 'HP', 'category': 'Gaming'}).data['facets']
+        # Other brands are still offered, counted within the category filter
+        self.assertEqual({bucket['value']: bucket['count'] for bucket in facets['brand']}, {
+            brand: Laptop.objects.filter(brand=brand, category='Gaming').count() for brand in BRANDS
+        })
+        self.assertEqual({bucket['value']: bucket['count'] for bucket in facets['category']}, {
+            category: Laptop.objects.filter(brand='HP', category=category).count()
+            for category in CATEGORIES if category and Laptop.objects.filter(brand='HP', category=category).exists()
+        })
+
+    def test_price_range_ignores_price_filter(self):
+        params = {'brand': 'Dell', 'min_price': '30000'}
+        price = self.client.get(FACETS_PATH, params).data['price']
+        prices = Laptop.objects.filter(brand='Dell', price__isnull=False).values_list('price', flat=True)
+        self.assertEqual(price, {'min': float(min(prices)), 'max': float(max(prices))})
+
+    def test_no_match_leaves_empty_buckets(self):
+        facets = self.client.get(FACETS_PATH, {'brand': 'Apple', 'category': 'Gaming'}).data
+        self.assertEqual(facets['count'], 0)
+        self.assertEqual(facets['facets']['category'], [])
+        # Brand options still count the laptops they would bring in
+        self.assertNotEqual(facets['facets']['brand'], [])
+
+    def test_invalid_filter(self):
+        response = self.client.get(FACETS_PATH, {'min_price': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.data)
+
+
+@override_settings(CATALOG_RESPONSE_CACHE_ENABLED=False, CATALOG_ENGINE_ENABLED=False)
+class MultiSelectFilterTests(FacetsTestCase):
+    """brand and category take comma-separated lists on the ORM list path"""
+
+    def ids(self, params):
+        response = self.client.get(LIST_PATH, {'page_size': 100, **params})
+        self.assertEqual(response.status_code, 200)
+        return {row['id'] for row in response.data['results']}
+
+    def expected(self, **lookups):
+        return set(Laptop.objects.filter(**lookups).values_list('id', flat=True))
+
+    def test_brands(self):
+        self.assertEqual(self.ids({'brand': 'HP,Dell'}), self.expected(brand__in=['HP', 'Dell']))
+        self.assertEqual(self.ids({'brand': 'HP'}), self.expected(brand='HP'))
+
+    def test_categories(self):
+        self.assertEqual(self.ids({'category': 'Gaming,Study'}), self.expected(category__in=['Gaming', 'Study']))
+
+    def test_combined_with_other_filters(self):
+        self.assertEqual(
+            self.ids({'brand': 'Lenovo,ASUS', 'category': 'Business,Study', 'processor': 'i5'}),
+            self.expected(brand__in=['Lenovo', 'ASUS'], category__in=['Business', 'Study'], processor__icontains='i5'),
+        )
@@ -0,0 +1,51 @@
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from api.favorites import favorite_ids_key, get_favorite_laptop_ids, toggle_favorite
+from api.models import Favorite, Laptop
+
+
+class ToggleFavoriteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('alice', password='secret')
+        Laptop.objects.create(id='laptop-a', name='HP Laptop', brand='HP', price=30000)
+
+    def test_toggle(self):
+        self.assertEqual(toggle_favorite(self.user.id, 'laptop-a'), 'added')
+        self.assertTrue(Favorite.objects.filter(user=self.user, laptop_id='laptop-a').exists())
+        self.assertEqual(toggle_favorite(self.user.id, 'laptop-a'), 'removed')
+        self.assertFalse(Favorite.objects.filter(user=self.user).exists())
+
+    def test_unknown_laptop(self):
+        with self.assertRaises(Laptop.DoesNotExist):
+            toggle_favorite(self.user.id, 'nope')
+
+    def test_concurrent_add(self):
+        filter_laptops = Laptop.objects.filter
+
+        def add_concurrently(*args, **kwargs):
+            # Another request's toggle inserts between this one's DELETE and INSERT
+            Favorite.objects.create(user=self.user, laptop_id='laptop-a')
+            return filter_laptops(*args, **kwargs)
+
+        with mock.patch.object(Laptop.objects, 'filter', side_effect=add_concurrently):
+            self.assertEqual(toggle_favorite(self.user.id, 'laptop-a'), 'removed')
+        self.assertFalse(Favorite.objects.filter(user=self.user).exists())
+
+    def test_ids_live_in_catalog_cache(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'catalog': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directory},
+        }):
+            self.assertEqual(get_favorite_laptop_ids(self.user.id), [])
+            self.assertEqual(caches['catalog'].get(favorite_ids_key(self.user.id)), [])
+            self.assertIsNone(caches['default'].get(favorite_ids_key(self.user.id)))
+            # A toggle through any worker clears the shared entry
+            toggle_favorite(self.user.id, 'laptop-a')
+            self.assertIsNone(caches['catalog'].get(favorite_ids_key(self.user.id)))
+            self.assertEqual(get_favorite_laptop_ids(self.user.id), ['laptop-a'])
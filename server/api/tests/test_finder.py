@@ -0,0 +1,186 @@
+import random
+
+import numpy as np
+from django.test import TestCase, override_settings
+
+from api.finder import FinderIndex, parse_finder_params
+from api.models import Laptop
+from api.specs import CPU_TIER_HIGH, CPU_TIER_MODERATE, HIGH_PERFORMANCE_GPU_CLASSES
+
+PROCESSORS = ['Intel Core i7-12700H', 'Intel Core i5-1235U', 'Intel Celeron N4020', 'Apple M2', None]
+GRAPHICS = ['NVIDIA GeForce RTX 3060', 'Intel UHD Graphics', 'Apple M2 GPU', None]
+RAM = ['8GB', '16GB', '32GB', None]
+STORAGE = ['256GB', '512GB', '1TB', None]
+DISPLAY_SIZES = ['13.3', '14', '15.6', None]
+CATEGORIES = ['Gaming', 'Business', 'Study', None]
+
+
+def create_catalog(count, seed=0):
+    """Laptops with varied, partly missing specs and prices"""
+    rng = random.Random(seed)
+    for i in range(count):
+        Laptop.objects.create(
+            id=f'laptop-{i:03d}',
+            name=f'Laptop {i}',
+            brand='HP',
+            model='',
+            category=rng.choice(CATEGORIES),
+            processor=rng.choice(PROCESSORS),
+            graphics=rng.choice(GRAPHICS),
+            ram=rng.choice(RAM),
+            storage=rng.choice(STORAGE),
+            display_size=rng.choice(DISPLAY_SIZES),
+            price=None if rng.random() < 0.15 else round(rng.uniform(12000, 90000), 1),
+        )
+
+
+def assert_same_index(test, index, expected):
+    test.assertEqual(index.pks, expected.pks)
+    test.assertEqual(index.updated_at, expected.updated_at)
+    np.testing.assert_array_equal(index.raw, expected.raw)
+    test.assertEqual(list(index.categories), list(expected.categories))
+    np.testing.assert_allclose(index.matrix, expected.matrix)
+
+
+class FinderFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_catalog(80)
+
+    def setUp(self):
+        self.index = FinderIndex.build('v1')
+
+    def test_masks_match_orm_filters(self):
+        high = {'cpu_tier': CPU_TIER_HIGH, 'gpu_class__in': HIGH_PERFORMANCE_GPU_CLASSES}
+        cases = [
+            ({}, {}),
+            ({'price_min': 30000}, {'price__gte': 30000}),
+            ({'price_max': 50000}, {'price__lte': 50000}),
+            ({'price_min': 20000, 'price_max': 60000, 'ram_min': 16}, {'price__gte': 20000, 'price__lte': 60000,
+                                                                       'ram_gb__gte': 16}),
+            ({'storage_min': 512}, {'storage_gb__gte': 512}),
+            ({'performance_level': CPU_TIER_MODERATE}, {'cpu_tier': CPU_TIER_MODERATE}),
+            # High tier also needs capable graphics
+            ({'performance_level': CPU_TIER_HIGH}, high),
+            ({'performance_level': CPU_TIER_HIGH, 'ram_min': 32}, {**high, 'ram_gb__gte': 32}),
+        ]
+        masks = self.index.filter_masks([filters for filters, _ in cases])
+        for mask, (filters, lookups) in zip(masks, cases):
+            with self.subTest(filters=filters):
+                expected = set(Laptop.objects.filter(**lookups).values_list('pk', flat=True))
+                self.assertEqual({self.index.pks[i] for i in np.flatnonzero(mask)}, expected)
+
+    def test_unknown_values_never_pass(self):
+        mask = self.index.filter_masks([{'price_min': 0, 'ram_min': 0, 'storage_min': 0}])[0]
+        expected = Laptop.objects.filter(price__isnull=False, ram_gb__isnull=False, storage_gb__isnull=False)
+        self.assertEqual({self.index.pks[i] for i in np.flatnonzero(mask)}, set(expected.values_list('pk', flat=True)))
+
+    def test_parse_finder_params(self):
+        self.assertEqual(parse_finder_params({'price_max': '50000', 'ram': '16', 'performance_level': 'High'}),
+                         ({'price_max': 50000.0, 'performance_level': CPU_TIER_HIGH}, {'ram_gb': 16.0}))
+        for params in [{'price_max': 'cheap'}, {'ram': 'inf'}, {'performance_level': 'ultra'}, ['ram']]:
+            with self.subTest(params=params), self.assertRaises(ValueError):
+                parse_finder_params(params)
+
+
+class FinderRankingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_catalog(80)
+        specs = dict(brand='HP', model='', processor='Intel Core i5-1235U', graphics='Intel UHD Graphics', ram='16GB',
+                     storage='512GB', display_size='14')
+        # Identical specs, so any query ties them; pks don't follow price
+        for pk, price in [('twin-a', 41000), ('twin-b', 39000), ('twin-c', 41000), ('twin-d', None)]:
+            Laptop.objects.create(id=pk, name=pk, price=price, **specs)
+
+    def setUp(self):
+        self.index = FinderIndex.build('v1')
+
+    def found(self, filters, targets, limit):
+        positions, _, _ = self.index.find(filters, targets, limit)
+        return [self.index.pks[i] for i in positions]
+
+    def test_ties_go_to_cheaper_then_pk(self):
+        filters = {'ram_min': 16, 'storage_min': 512, 'price_max': 41000, 'performance_level': CPU_TIER_MODERATE}
+        targets = {'ram_gb': 16, 'storage_gb': 512, 'display_inches': 14}
+        twins = [pk for pk in self.found(filters, targets, 50) if pk.startswith('twin-')]
+        self.assertEqual(twins, ['twin-b', 'twin-a', 'twin-c'])
+
+        # Cutting inside the tie keeps the same order whatever the limit
+        targets = {**targets, 'cpu_tier': CPU_TIER_MODERATE}
+        ranked = self.found({}, targets, 50)
+        for limit in range(1, 8):
+            with self.subTest(limit=limit):
+                self.assertEqual(self.found({}, targets, limit), ranked[:limit])
+
+    def test_unknown_price_ranks_after_known(self):
+        ranked = self.found({'ram_min': 16, 'storage_min': 512}, {'ram_gb': 16, 'storage_gb': 512, 'display_inches': 14}, 50)
+        twins = [pk for pk in ranked if pk.startswith('twin-')]
+        self.assertEqual(twins, ['twin-b', 'twin-a', 'twin-c', 'twin-d'])
+
+    def test_no_targets_order_by_price_then_pk(self):
+        positions, distances, count = self.index.find({'ram_min': 8}, {}, 200)
+        self.assertEqual(count, Laptop.objects.filter(ram_gb__gte=8).count())
+        self.assertFalse(distances.any())
+        expected = sorted(
+            Laptop.objects.filter(ram_gb__gte=8),
+            key=lambda laptop: (laptop.price is None, laptop.price or 0, laptop.pk),
+        )
+        self.assertEqual([self.index.pks[i] for i in positions], [laptop.pk for laptop in expected])
+
+    def test_batch_matches_single_queries(self):
+        rng = random.Random(1)
+        queries = []
+        for _ in range(25):
+            filters = {name: value for name, value in [
+                ('price_min', rng.choice([None, 20000, 35000])),
+                ('price_max', rng.choice([None, 50000, 80000])),
+                ('ram_min', rng.choice([None, 8, 16])),
+                ('storage_min', rng.choice([None, 512])),
+                ('performance_level', rng.choice([None, 1, 2, 3])),
+            ] if value is not None}
+            targets = {name: value for name, value in [
+                ('price', rng.choice([None, 25000, 45000])),
+                ('ram_gb', rng.choice([None, 8, 16, 32])),
+                ('storage_gb', rng.choice([None, 256, 1024])),
+                ('display_inches', rng.choice([None, 13.3, 15.6])),
+            ] if value is not None}
+            queries.append((filters, targets))
+
+        # A few queries per chunk, so the batch is split too
+        with override_settings(CATALOG_FINDER_BATCH_CELLS=len(self.index) * 4):
+            batch = self.index.find_many(queries, 7)
+        self.assertEqual(len(batch), len(queries))
+        for query, (positions, distances, count) in zip(queries, batch):
+            with self.subTest(query=query):
+                single = self.index.find(*query, 7)
+                np.testing.assert_array_equal(positions, single[0])
+                # The matrix products round differently with more queries in them
+                np.testing.assert_allclose(distances, single[1], atol=1e-9)
+                self.assertEqual(count, single[2])
+
+
+class FinderRefreshTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_catalog(60)
+
+    def test_incremental_build_matches_full_build(self):
+        previous = FinderIndex.build('v1')
+        laptop = Laptop.objects.get(pk='laptop-007')
+        laptop.ram = '64GB'
+        laptop.save()
+        Laptop.objects.filter(pk__in=['laptop-010', 'laptop-020']).delete()
+        Laptop.objects.create(id='laptop-new', name='New', brand='HP', model='', ram='16GB', price=30000, category='Study')
+
+        index = FinderIndex.build('v2', previous=previous)
+        assert_same_index(self, index, FinderIndex.build('v2'))
+        self.assertEqual(index.raw[index.position['laptop-007'], 1], 64)
+
+    def test_unchanged_rows_are_reused(self):
+        previous = FinderIndex.build('v1')
+        # update() leaves updated_at alone, so the row looks unchanged
+        Laptop.objects.filter(pk='laptop-003').update(price=1)
+        index = FinderIndex.build('v2', previous=previous)
+        np.testing.assert_array_equal(index.raw, previous.raw)
+        self.assertEqual(FinderIndex.build('v2').raw[index.position['laptop-003'], 0], 1)
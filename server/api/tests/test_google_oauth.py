@@ -0,0 +1,98 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from api import google_oauth
+from api.google_oauth import GoogleOAuthError
+
+CALLBACK_PATH = '/server/api/auth/google/callback/'
+
+
+class FakeGoogleHandler(BaseHTTPRequestHandler):
+    def reply(self, body):
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.reply({'access_token': 'access'})
+
+    def do_GET(self):
+        self.reply({'email': 'alice@example.com'})
+
+    def log_message(self, format, *args):
+        pass
+
+
+class GoogleCallbackTests(TestCase):
+    def test_missing_code(self):
+        response = self.client.get(CALLBACK_PATH)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'No authorization code provided'})
+
+    def test_failure_details_are_logged_not_returned(self):
+        error = GoogleOAuthError("Google token error: invalid_grant")
+        with mock.patch('api.google_oauth.exchange_code', side_effect=error), \
+                self.assertLogs('api.views', 'ERROR') as logs:
+            response = self.client.get(CALLBACK_PATH, {'code': 'used-code'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Google login failed'})
+        self.assertIn('invalid_grant', '\n'.join(logs.output))
+
+
+class GoogleClientTests(TestCase):
+    """Logins against a fake Google must not leave clients open"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeGoogleHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{cls.server.server_address[1]}'
+        cls.google = override_settings(
+            GOOGLE_OAUTH_TOKEN_URL=f'{url}/token', GOOGLE_OAUTH_USERINFO_URL=f'{url}/userinfo',
+            SOCIALACCOUNT_PROVIDERS={'google': {'APP': {'client_id': 'id', 'secret': 'secret'}}},
+        )
+        cls.google.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.google.disable()
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.created = []
+        new_client = google_oauth._new_client
+
+        def track():
+            client = new_client()
+            self.created.append(client)
+            return client
+
+        patcher = mock.patch('api.google_oauth._new_client', side_effect=track)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_wsgi_logins_close_their_clients(self):
+        for _ in range(3):
+            response = self.client.get(CALLBACK_PATH, {'code': 'code'})
+            self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(self.created), 3)
+        self.assertTrue(all(client.is_closed for client in self.created))
+
+    async def test_asgi_logins_share_a_client(self):
+        for _ in range(3):
+            response = await self.async_client.get(CALLBACK_PATH, {'code': 'code'})
+            self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(self.created), 1)
+        self.assertFalse(self.created[0].is_closed)
+        await self.created[0].aclose()
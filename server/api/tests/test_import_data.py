@@ -0,0 +1,52 @@
+import csv
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+import import_data
+from api.models import Favorite, Laptop
+
+COLUMNS = ['id', 'brand', 'model', 'price', 'storage']
+ROWS = [
+    ['laptop-a', 'HP', 'Pavilion', '30,000', '512GB'],
+    ['laptop-b', 'Dell', 'XPS', '$45000', '1TB'],
+    ['laptop-c', 'Lenovo', 'IdeaPad', '22000', '256GB'],
+]
+
+
+class ImportSignalsTests(TestCase):
+    """An import bumps the catalog version once, not once per deleted laptop"""
+
+    def import_rows(self, rows, incremental=False):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', newline='', delete=False) as output:
+            writer = csv.writer(output)
+            writer.writerow(COLUMNS)
+            writer.writerows(rows)
+        self.addCleanup(os.remove, output.name)
+        with mock.patch('api.signals.bump_catalog_version') as per_row, \
+                mock.patch('import_data.bump_catalog_version') as once, \
+                mock.patch('builtins.print'):
+            import_data.import_csv(output.name, incremental=incremental)
+        return per_row.call_count, once.call_count
+
+    def test_full_import(self):
+        self.import_rows(ROWS)
+        self.assertEqual(self.import_rows(ROWS[:2]), (0, 1))
+        self.assertEqual(sorted(Laptop.objects.values_list('pk', flat=True)), ['laptop-a', 'laptop-b'])
+
+    def test_incremental_import_deletes_vanished_rows(self):
+        self.import_rows(ROWS)
+        user = User.objects.create_user('alice')
+        Favorite.objects.create(user=user, laptop_id='laptop-c')
+        self.assertEqual(self.import_rows(ROWS[:2], incremental=True), (0, 1))
+        self.assertFalse(Laptop.objects.filter(pk='laptop-c').exists())
+        self.assertFalse(Favorite.objects.exists())
+
+    def test_receiver_is_reconnected(self):
+        self.import_rows(ROWS)
+        with mock.patch('api.signals.bump_catalog_version') as bump:
+            Laptop.objects.get(pk='laptop-a').save()
+        bump.assert_called_once()
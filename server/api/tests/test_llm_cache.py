@@ -0,0 +1,170 @@
+import json
+import threading
+import urllib.request
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.error import HTTPError
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from api import llm_cache
+from api.llm_cache import cached_extraction, extraction_cache_stats, normalize_message, purge_expired_extractions
+from api.models import SpecExtraction
+
+SPECS = {'budget': 1000, 'use_cases': ['gaming']}
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    """Answers every POST with the server's next (status, body), or SPECS once they run out"""
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.requests.append(request['message'])
+        status, body = self.server.replies.pop(0) if self.server.replies else (200, SPECS)
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class NormalizeMessageTests(TestCase):
+    def test_equivalent_messages(self):
+        for first, second in [
+            ('Gaming laptop under $1,000!', 'gaming laptop  under 1k usd'),
+            ('16 GB RAM, 1 TB SSD', '16gb ram, 1tb ssd'),
+            ('Budget 1.5k', 'budget 1500'),
+            ('ＧＡＭＩＮＧ laptop', 'gaming laptop'),
+            ('price 1000 EGP', 'price 1000 egy'),
+            ('under $999', 'under 999 dollars'),
+            ('$1000 usd', '$1000'),
+            ('budget €1.5k', 'budget 1500 euros'),
+            ('15.6 inch screen?', '15.6inch screen'),
+        ]:
+            with self.subTest(first=first, second=second):
+                self.assertEqual(normalize_message(first), normalize_message(second))
+
+    def test_different_messages(self):
+        for first, second in [
+            ('i7 laptop', 'i5 laptop'),
+            ('under 1k', 'under 10k'),
+            ('16gb ram', '8gb ram'),
+            # Same number, different currencies: the budgets differ
+            ('price 1000 EGP', 'price $1000'),
+            ('under €1000', 'under £1000'),
+        ]:
+            with self.subTest(first=first, second=second):
+                self.assertNotEqual(normalize_message(first), normalize_message(second))
+
+
+class CachedExtractionTests(TestCase):
+    """cached_extraction in front of an LLM served over HTTP by a local fake"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeLLMHandler)
+        cls.server.requests, cls.server.replies = [], []
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f'http://127.0.0.1:{cls.server.server_address[1]}/extract'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.requests.clear()
+        self.server.replies.clear()
+        # The memory tier is module-level, so entries would outlive the test's rows
+        llm_cache._get_local_cache().clear()
+        self.addCleanup(llm_cache._get_local_cache().clear)
+        self.stats = extraction_cache_stats()
+
+    def extract(self, message):
+        request = urllib.request.Request(
+            self.url, data=json.dumps({'message': message}).encode(), headers={'Content-Type': 'application/json'},
+        )
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return json.loads(response.read())
+
+    def stats_since_setup(self):
+        stats = extraction_cache_stats()
+        return {outcome: stats[outcome] - self.stats[outcome] for outcome in ('memory_hits', 'db_hits', 'misses')}
+
+    def test_tiers(self):
+        self.assertEqual(cached_extraction('Gaming laptop under $1,000', self.extract), SPECS)
+        self.assertEqual(self.stats_since_setup(), {'memory_hits': 0, 'db_hits': 0, 'misses': 1})
+
+        # Same normalized message: served from this process's memory
+        self.assertEqual(cached_extraction('gaming laptop under 1k usd', self.extract), SPECS)
+        self.assertEqual(self.stats_since_setup(), {'memory_hits': 1, 'db_hits': 0, 'misses': 1})
+
+        # Another worker has an empty memory cache but shares the table
+        llm_cache._get_local_cache().clear()
+        self.assertEqual(cached_extraction('GAMING laptop under 1000 usd!', self.extract), SPECS)
+        self.assertEqual(self.stats_since_setup(), {'memory_hits': 1, 'db_hits': 1, 'misses': 1})
+        self.assertEqual(SpecExtraction.objects.get().hits, 1)
+
+        # The table hit filled the memory cache again
+        cached_extraction('gaming laptop under 1000 dollars', self.extract)
+        self.assertEqual(self.stats_since_setup(), {'memory_hits': 2, 'db_hits': 1, 'misses': 1})
+        self.assertEqual(self.server.requests, ['Gaming laptop under $1,000'])
+
+    def test_prompt_version_is_part_of_key(self):
+        cached_extraction('gaming laptop', self.extract, prompt_version='1')
+        cached_extraction('gaming laptop', self.extract, prompt_version='2')
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(SpecExtraction.objects.count(), 2)
+
+    def test_expired_rows_are_not_served(self):
+        with override_settings(SPEC_EXTRACTION_TTL=60):
+            cached_extraction('gaming laptop', self.extract)
+        SpecExtraction.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        llm_cache._get_local_cache().clear()
+
+        self.server.replies.append((200, {'budget': 2000}))
+        self.assertEqual(cached_extraction('gaming laptop', self.extract), {'budget': 2000})
+        self.assertEqual(len(self.server.requests), 2)
+        # The fresh answer replaced the expired row
+        row = SpecExtraction.objects.get()
+        self.assertEqual(row.specs, {'budget': 2000})
+        self.assertGreater(row.expires_at, timezone.now())
+
+    def test_purge_expired(self):
+        cached_extraction('gaming laptop', self.extract)
+        cached_extraction('office laptop', self.extract)
+        SpecExtraction.objects.filter(message='office laptop').update(expires_at=timezone.now())
+        self.assertEqual(purge_expired_extractions(), 1)
+        self.assertEqual(list(SpecExtraction.objects.values_list('message', flat=True)), ['gaming laptop'])
+
+    def test_failed_extractions_are_not_cached(self):
+        self.server.replies.append((500, {'error': 'overloaded'}))
+        with self.assertRaises(HTTPError):
+            cached_extraction('gaming laptop', self.extract)
+        self.assertFalse(SpecExtraction.objects.exists())
+
+        # The next request asks the LLM again
+        self.assertEqual(cached_extraction('gaming laptop', self.extract), SPECS)
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_empty_extractions_are_not_cached(self):
+        self.server.replies.append((200, {}))
+        self.assertEqual(cached_extraction('hello there', self.extract), {})
+        self.assertFalse(SpecExtraction.objects.exists())
+        self.assertEqual(cached_extraction('hello there', self.extract), SPECS)
+        self.assertEqual(self.stats_since_setup(), {'memory_hits': 0, 'db_hits': 0, 'misses': 2})
+
+    def test_hit_ratio(self):
+        for message in ['gaming laptop', 'Gaming laptop!', 'GAMING  LAPTOP', 'office laptop']:
+            cached_extraction(message, self.extract)
+        stats = extraction_cache_stats()
+        total = stats['memory_hits'] + stats['db_hits'] + stats['misses']
+        self.assertEqual(stats['hit_ratio'], (stats['memory_hits'] + stats['db_hits']) / total)
+        self.assertEqual(self.stats_since_setup(), {'memory_hits': 2, 'db_hits': 0, 'misses': 2})
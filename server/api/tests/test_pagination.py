@@ -0,0 +1,146 @@
+from urllib.parse import parse_qs, urlsplit
+
+from django.core import signing
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.catalog import bump_catalog_version, get_catalog_version
+from api.models import Laptop
+from api.pagination import KeysetPagination
+
+LIST_PATH = '/server/api/laptops/'
+
+BRANDS = ['HP', 'Dell', 'Lenovo']
+# Repeated values and several NULLs, so pages break inside ties and inside the NULL tail
+PRICES = [25000, None, 18500, 25000, None, 31000, 18500, None]
+CATEGORIES = ['Gaming', None, 'Business', 'Study']
+
+
+@override_settings(CATALOG_RESPONSE_CACHE_ENABLED=False)
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(17):
+            Laptop.objects.create(
+                id=f'laptop-{(i * 7) % 17:02d}',
+                name=f'Laptop {i % 5}',
+                brand=BRANDS[i % 3],
+                model='',
+                category=CATEGORIES[i % 4],
+                price=PRICES[i % 8],
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        bump_catalog_version()
+        self.client = APIClient()
+
+    def expected(self, ordering):
+        """Ids in the documented order: the ordering field with NULLs last, then pk"""
+        laptops = sorted(Laptop.objects.all(), key=lambda laptop: laptop.pk)
+        if not ordering:
+            return [laptop.pk for laptop in sorted(laptops, key=lambda laptop: (laptop.brand, laptop.name))]
+        name = ordering.lstrip('-')
+        known = [laptop for laptop in laptops if getattr(laptop, name) is not None]
+        missing = [laptop for laptop in laptops if getattr(laptop, name) is None]
+        known.sort(key=lambda laptop: getattr(laptop, name), reverse=ordering.startswith('-'))
+        return [laptop.pk for laptop in known + missing]
+
+    def walk(self, params):
+        ids = []
+        response = self.client.get(LIST_PATH, {'pagination': 'cursor', **params})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            self.assertIsNone(response.data['previous'])
+            ids += [row['id'] for row in response.data['results']]
+            if response.data['next'] is None:
+                return ids
+            response = self.client.get(response.data['next'])
+
+    def first_cursor(self, params):
+        response = self.client.get(LIST_PATH, {'pagination': 'cursor', 'page_size': 2, **params})
+        return parse_qs(urlsplit(response.data['next']).query)['cursor'][0]
+
+    def test_walks_every_row_once_in_order(self):
+        for ordering in ['', 'price', '-price', 'category', '-category', 'name', '-id']:
+            for page_size in [1, 2, 3, 5, 100]:
+                with self.subTest(ordering=ordering, page_size=page_size):
+                    params = {'page_size': page_size}
+                    if ordering:
+                        params['ordering'] = ordering
+                    self.assertEqual(self.walk(params), self.expected(ordering))
+
+    def test_default_ordering_is_brand_then_name(self):
+        ids = self.walk({'page_size': 4})
+        laptops = Laptop.objects.in_bulk(ids)
+        keys = [(laptops[pk].brand, laptops[pk].name, pk) for pk in ids]
+        self.assertEqual(keys, sorted(keys))
+
+    def test_nulls_sort_last_in_both_directions(self):
+        for ordering in ['price', '-price']:
+            with self.subTest(ordering=ordering):
+                ids = self.walk({'ordering': ordering, 'page_size': 2})
+                prices = [Laptop.objects.get(pk=pk).price for pk in ids]
+                first_null = prices.index(None)
+                self.assertEqual(prices[first_null:], [None] * (len(prices) - first_null))
+                self.assertEqual(prices[:first_null], sorted(prices[:first_null], reverse=ordering == '-price'))
+
+    def test_rejects_tampered_cursor(self):
+        cursor = self.first_cursor({'ordering': 'price'})
+        payload = signing.loads(cursor, salt=KeysetPagination.cursor_salt)
+        tampered = cursor[:-1] + ('A' if cursor[-1] != 'A' else 'B')
+        for bad in [
+            tampered,
+            'not-a-cursor',
+            # Right payload, wrong key or salt
+            signing.dumps(payload, key='another-secret', salt=KeysetPagination.cursor_salt, compress=True),
+            signing.dumps(payload, salt='another.salt', compress=True),
+        ]:
+            with self.subTest(cursor=bad):
+                response = self.client.get(LIST_PATH, {'ordering': 'price', 'cursor': bad})
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(str(response.data['detail']), KeysetPagination.invalid_cursor_message)
+
+    def test_rejects_cursor_for_another_ordering(self):
+        cursor = self.first_cursor({'ordering': 'price'})
+        for ordering in ['-price', 'name', '']:
+            with self.subTest(ordering=ordering):
+                response = self.client.get(LIST_PATH, {'ordering': ordering, 'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
+
+    def test_rejects_invalid_ordering(self):
+        response = self.client.get(LIST_PATH, {'pagination': 'cursor', 'ordering': 'nope'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_count_only_when_asked(self):
+        response = self.client.get(LIST_PATH, {'pagination': 'cursor'})
+        self.assertNotIn('count', response.data)
+        response = self.client.get(LIST_PATH, {'pagination': 'cursor', 'count': 'true', 'category': 'Gaming'})
+        self.assertEqual(response.data['count'], Laptop.objects.filter(category='Gaming').count())
+
+    def test_count_is_cached_per_filter_set(self):
+        params = {'pagination': 'cursor', 'count': 'true', 'brand': 'HP'}
+        total = Laptop.objects.filter(brand='HP').count()
+        self.client.get(LIST_PATH, params)
+
+        get_catalog_version()
+        # Another page, page size or ordering of the same filters only runs the page query
+        with self.assertNumQueries(1):
+            response = self.client.get(LIST_PATH, {**params, 'page_size': 3, 'ordering': '-price'})
+        self.assertEqual(response.data['count'], total)
+        with self.assertNumQueries(1):
+            response = self.client.get(response.data['next'])
+        self.assertEqual(response.data['count'], total)
+
+        # Different filters are counted separately
+        with self.assertNumQueries(2):
+            response = self.client.get(LIST_PATH, {**params, 'brand': 'Dell'})
+        self.assertEqual(response.data['count'], Laptop.objects.filter(brand='Dell').count())
+
+    def test_count_follows_catalog_writes(self):
+        params = {'pagination': 'cursor', 'count': 'true', 'brand': 'HP'}
+        total = self.client.get(LIST_PATH, params).data['count']
+        Laptop.objects.create(id='laptop-new', name='Laptop new', brand='HP', model='')
+        self.assertEqual(self.client.get(LIST_PATH, params).data['count'], total + 1)
@@ -0,0 +1,53 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.profiling import CAPTURE_HEADER, PROFILING_MIDDLEWARE, list_captures
+
+
+class ProfilingMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', password='secret', is_staff=True)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        profiling = override_settings(
+            MIDDLEWARE=[*settings.MIDDLEWARE, PROFILING_MIDDLEWARE], PROFILING_ENABLED=True,
+            PROFILING_DIR=self.directory,
+        )
+        profiling.enable()
+        self.addCleanup(profiling.disable)
+        self.client = APIClient()
+        self.client.force_login(self.staff)
+
+    def test_capture(self):
+        response = self.client.get('/server/api/laptops/', HTTP_X_PROFILE='1')
+        self.assertEqual(response.status_code, 200)
+        [capture] = list_captures()
+        self.assertEqual(response[CAPTURE_HEADER], capture['name'])
+        self.assertEqual(capture['user'], 'staff')
+
+    def test_only_staff_is_profiled(self):
+        self.staff.is_staff = False
+        self.staff.save()
+        response = self.client.get('/server/api/laptops/', HTTP_X_PROFILE='1')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header(CAPTURE_HEADER))
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_failed_write_still_serves_response(self):
+        with mock.patch('zipfile.ZipFile.writestr', side_effect=OSError('disk full')), \
+                self.assertLogs('api.profiling', 'ERROR'):
+            response = self.client.get('/server/api/laptops/', HTTP_X_PROFILE='1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response[CAPTURE_HEADER], 'failed')
+        # No half-written bundle or temporary file is left behind
+        self.assertEqual(os.listdir(self.directory), [])
@@ -0,0 +1,228 @@
+import random
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api import ranker
+from api.catalog import bump_catalog_version
+from api.catalog_engine import CatalogEngine
+from api.models import Laptop
+from api.ranker import get_recommendations, parse_specs, rank, score_criteria
+from api.specs import CPU_TIER_BASIC, CPU_TIER_HIGH
+
+RECOMMEND_PATH = '/server/api/laptops/recommend/'
+
+
+def create_laptops(*laptops):
+    for fields in laptops:
+        Laptop.objects.create(model='', **fields)
+
+
+class ParseSpecsTests(TestCase):
+    def test_criteria(self):
+        criteria = parse_specs({
+            'budget': '1500',
+            'min_ram': 16,
+            'min_storage': None,
+            'display_size_preference': '15.6 inch',
+            'preferred_brands': ['HP', ' dell ', 'hp', ''],
+            'use_cases': ['office work', 'Gaming'],
+        })
+        # The most demanding use case wins
+        self.assertEqual(criteria, {'budget': 1500.0, 'ram': 16.0, 'display': 15.6, 'brand': ['dell', 'hp'],
+                                    'performance': CPU_TIER_HIGH})
+
+    def test_performance_level_overrides_use_cases(self):
+        self.assertEqual(parse_specs({'performance_level': 'Basic', 'use_cases': ['gaming']}),
+                         {'performance': CPU_TIER_BASIC})
+
+    def test_missing_specs_give_no_criteria(self):
+        self.assertEqual(parse_specs({}), {})
+        self.assertEqual(parse_specs({'budget': '', 'preferred_brands': None, 'use_cases': ['something else']}), {})
+
+    def test_invalid_specs(self):
+        for data in [
+            None,
+            ['budget'],
+            {'budget': 'cheap'},
+            {'budget': -5},
+            {'budget': 'inf'},
+            {'min_ram': 0},
+            {'display_size_preference': 'big'},
+            {'preferred_brands': 'HP'},
+            {'performance_level': 'ultra'},
+            {'use_cases': 'gaming'},
+        ]:
+            with self.subTest(data=data), self.assertRaises(ValueError):
+                parse_specs(data)
+
+
+class RankTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_laptops(
+            dict(id='gamer', name='HP Omen', brand='HP', processor='Intel Core i7-12700H',
+                 graphics='NVIDIA GeForce RTX 3060', ram='16GB', storage='512GB', display_size='15.6', price=30000),
+            dict(id='office', name='Dell Latitude', brand='Dell', processor='Intel Core i5-1235U',
+                 graphics='Intel UHD Graphics', ram='8GB', storage='256GB', display_size='14', price=20000),
+            dict(id='thin', name='Acer Swift', brand='Acer', processor='Intel Core i7-1165G7',
+                 graphics='Intel Iris Xe Graphics', ram='16GB', storage='512GB', display_size='14', price=25000),
+            # Nothing known but the name: every criterion has to cope with missing values
+            dict(id='unknown', name='Lenovo Mystery', brand='Lenovo'),
+        )
+
+    def setUp(self):
+        self.engine = CatalogEngine(list(Laptop.objects.all()), 'v1')
+
+    def ranked(self, criteria, limit=10):
+        return [result['laptop']['id'] for result in rank(self.engine, criteria, limit)['results']]
+
+    def scores(self, criteria):
+        position = self.engine.position
+        return {
+            criterion: {pk: (round(float(score[i]), 4), bool(matched[i])) for pk, i in position.items()}
+            for criterion, (score, matched) in score_criteria(self.engine, criteria).items()
+        }
+
+    def test_criterion_scores(self):
+        scores = self.scores({'budget': 25000, 'ram': 16, 'display': 15.6, 'brand': ['hp'], 'performance': CPU_TIER_HIGH})
+        # A price over budget loses score linearly, reaching 0 at BUDGET_OVERSHOOT over it
+        self.assertEqual(scores['budget'], {'gamer': (0.6, False), 'office': (1.0, True), 'thin': (1.0, True),
+                                            'unknown': (0.0, False)})
+        self.assertEqual(scores['ram'], {'gamer': (1.0, True), 'office': (0.5, False), 'thin': (1.0, True),
+                                         'unknown': (0.0, False)})
+        self.assertEqual(scores['display'], {'gamer': (1.0, True), 'office': (0.56, False), 'thin': (0.56, False),
+                                             'unknown': (0.0, False)})
+        self.assertEqual(scores['brand'], {'gamer': (1.0, True), 'office': (0.0, False), 'thin': (0.0, False),
+                                           'unknown': (0.0, False)})
+        # A high CPU tier without capable graphics only gets half the score
+        self.assertEqual(scores['performance'], {'gamer': (1.0, True), 'office': (0.3333, False),
+                                                 'thin': (0.5, False), 'unknown': (0.0, False)})
+
+    def test_weighted_total(self):
+        recommendations = rank(self.engine, {'budget': 25000, 'ram': 16})
+        results = {result['laptop']['id']: result for result in recommendations['results']}
+        self.assertEqual([result['laptop']['id'] for result in recommendations['results']],
+                         ['thin', 'office', 'gamer', 'unknown'])
+        # (3.0 * budget + 1.5 * ram) / 4.5
+        self.assertEqual({pk: result['score'] for pk, result in results.items()},
+                         {'thin': 1.0, 'office': 0.8333, 'gamer': 0.7333, 'unknown': 0.0})
+        self.assertEqual(recommendations['exact_matches'], 1)
+        self.assertTrue(results['thin']['matched_all'])
+        self.assertFalse(results['office']['matched_all'])
+        self.assertEqual(results['gamer']['criteria']['budget'],
+                         {'matched': False, 'score': 0.6, 'detail': 'price 30,000 (budget 25,000)'})
+
+    def test_missing_values_score_zero(self):
+        criteria = {'budget': 25000, 'ram': 16, 'storage': 256, 'display': 15.6, 'performance': CPU_TIER_HIGH}
+        unknown = next(result for result in rank(self.engine, criteria)['results'] if result['laptop']['id'] == 'unknown')
+        self.assertEqual(unknown['score'], 0.0)
+        self.assertEqual(unknown['criteria'], {
+            'budget': {'matched': False, 'score': 0.0, 'detail': 'price unknown (budget 25,000)'},
+            'ram': {'matched': False, 'score': 0.0, 'detail': 'RAM unknown (wanted 16GB+)'},
+            'storage': {'matched': False, 'score': 0.0, 'detail': 'storage unknown (wanted 256GB+)'},
+            'display': {'matched': False, 'score': 0.0, 'detail': 'screen unknown (wanted 15.6")'},
+            'performance': {'matched': False, 'score': 0.0, 'detail': 'unknown CPU tier, integrated graphics (wanted high)'},
+        })
+
+    def test_no_criteria_ranks_cheapest_first(self):
+        recommendations = rank(self.engine, {})
+        self.assertEqual(recommendations['exact_matches'], 0)
+        self.assertEqual({result['score'] for result in recommendations['results']}, {0.0})
+        # Unknown prices rank last, the rest by price
+        self.assertEqual(self.ranked({}), ['office', 'thin', 'gamer', 'unknown'])
+
+    def test_unmet_criteria_still_return_closest(self):
+        recommendations = rank(self.engine, {'budget': 5000, 'ram': 64}, limit=3)
+        self.assertEqual(recommendations['exact_matches'], 0)
+        # Every price is far over budget, so RAM decides; thin and gamer tie there and the cheaper one wins
+        self.assertEqual([result['laptop']['id'] for result in recommendations['results']], ['thin', 'gamer', 'office'])
+
+    def test_limit(self):
+        self.assertEqual(self.ranked({'ram': 16}, limit=2), ['thin', 'gamer'])
+        self.assertEqual(len(self.ranked({'ram': 16}, limit=50)), 4)
+        self.assertEqual(self.ranked({'ram': 16}, limit=0), [])
+
+
+class TieBreakTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        specs = dict(processor='Intel Core i5-1235U', graphics='Intel UHD Graphics', ram='8GB', storage='512GB',
+                     display_size='14')
+        # Ids deliberately don't sort the way the catalog does
+        create_laptops(
+            dict(id='twin-a', name='Dell Inspiron', brand='Dell', price=20000, **specs),
+            dict(id='twin-b', name='ASUS Vivobook', brand='ASUS', price=20000, **specs),
+            dict(id='twin-c', name='Lenovo IdeaPad', brand='Lenovo', price=15000, **specs),
+            dict(id='twin-d', name='Acer Aspire', brand='Acer', **specs),
+        )
+
+    def ranked(self, laptops, limit=10):
+        engine = CatalogEngine(laptops, 'v1')
+        return [result['laptop']['id'] for result in rank(engine, {'ram': 8, 'storage': 512}, limit)['results']]
+
+    def test_ties_go_to_cheaper_then_catalog_order(self):
+        # An unknown price ranks after every known one
+        self.assertEqual(self.ranked(list(Laptop.objects.all())), ['twin-c', 'twin-b', 'twin-a', 'twin-d'])
+
+    def test_cut_is_deterministic(self):
+        laptops = list(Laptop.objects.all())
+        expected = {limit: self.ranked(laptops, limit) for limit in range(1, 5)}
+        self.assertEqual(expected[2], ['twin-c', 'twin-b'])
+        for seed in range(5):
+            random.Random(seed).shuffle(laptops)
+            for limit in range(1, 5):
+                with self.subTest(seed=seed, limit=limit):
+                    self.assertEqual(self.ranked(laptops, limit), expected[limit])
+
+
+class RecommendationsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_laptops(
+            dict(id='gamer', name='HP Omen', brand='HP', processor='Intel Core i7-12700H',
+                 graphics='NVIDIA GeForce RTX 3060', ram='16GB', price=30000),
+            dict(id='office', name='Dell Latitude', brand='Dell', processor='Intel Core i5-1235U', ram='8GB', price=20000),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        bump_catalog_version()
+
+    def test_cached_per_version_and_criteria(self):
+        engine = CatalogEngine(list(Laptop.objects.all()), 'v1')
+        with mock.patch.object(ranker, 'rank', wraps=ranker.rank) as ranked:
+            first = get_recommendations(engine, {'ram': 16})
+            self.assertEqual(get_recommendations(engine, {'ram': 16}), first)
+            self.assertEqual(ranked.call_count, 1)
+
+            get_recommendations(engine, {'ram': 16}, limit=1)
+            get_recommendations(engine, {'ram': 8})
+            get_recommendations(CatalogEngine(list(Laptop.objects.all()), 'v2'), {'ram': 16})
+            self.assertEqual(ranked.call_count, 4)
+
+    def test_endpoint(self):
+        client = APIClient()
+        response = client.post(RECOMMEND_PATH, {'specs': {'budget': 25000, 'use_cases': ['gaming']}, 'limit': 1},
+                               format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['criteria'], {'budget': 25000.0, 'performance': CPU_TIER_HIGH})
+        # 0.6 on budget but capable graphics beats a cheaper laptop without them
+        self.assertEqual([result['laptop']['id'] for result in response.data['results']], ['gamer'])
+
+    def test_endpoint_rejects_bad_input(self):
+        client = APIClient()
+        for body in [
+            {'specs': {'budget': 'cheap'}},
+            {'specs': 'gaming'},
+            {'specs': {}, 'limit': 'ten'},
+            {'specs': {}, 'limit': 0},
+            {'specs': {}, 'limit': 1000},
+        ]:
+            with self.subTest(body=body):
+                response = client.post(RECOMMEND_PATH, body, format='json')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.data)
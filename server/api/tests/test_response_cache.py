@@ -0,0 +1,76 @@
+import tempfile
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.catalog import CATALOG_VERSION_KEY, bump_catalog_version, require_shared_catalog_cache
+from api.models import Laptop
+
+SHARED_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'catalog': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache'},
+}
+
+
+class ETagTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Laptop.objects.create(id='laptop-a', name='HP Laptop', brand='HP', price=30000)
+        Laptop.objects.create(id='laptop-b', name='Dell Laptop', brand='Dell', price=40000)
+
+    def setUp(self):
+        bump_catalog_version()
+        self.client = APIClient()
+
+    def revalidate(self, path, etag):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        return response.status_code, len(queries)
+
+    def test_repeat_view_costs_no_query(self):
+        for path in ['/server/api/laptops/laptop-a/', '/server/api/laptops/?ordering=price']:
+            with self.subTest(path=path):
+                etag = self.client.get(path)['ETag']
+                self.assertEqual(self.revalidate(path, etag), (304, 0))
+
+    def test_write_changes_etag(self):
+        etag = self.client.get('/server/api/laptops/laptop-a/')['ETag']
+        laptop = Laptop.objects.get(pk='laptop-a')
+        laptop.price = 1
+        laptop.save()
+        self.assertEqual(self.revalidate('/server/api/laptops/laptop-a/', etag)[0], 200)
+
+    def test_other_process_write_seen_after_version_ttl(self):
+        # Another process such as import_data.py: no signal reaches this one's cache
+        etag = self.client.get('/server/api/laptops/').get('ETag')
+        updated_at = Laptop.objects.get(pk='laptop-b').updated_at
+        Laptop.objects.filter(pk='laptop-b').update(price=1, updated_at=updated_at.replace(year=2099))
+        self.assertEqual(self.revalidate('/server/api/laptops/', etag)[0], 304)
+        cache.delete(CATALOG_VERSION_KEY)  # what CATALOG_VERSION_TTL does
+        self.assertEqual(self.revalidate('/server/api/laptops/', etag)[0], 200)
+
+    def test_shared_cache(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(CACHES={
+            **SHARED_CACHES, 'catalog': {**SHARED_CACHES['catalog'], 'LOCATION': directory},
+        }):
+            etag = self.client.get('/server/api/laptops/laptop-a/')['ETag']
+            self.assertEqual(self.revalidate('/server/api/laptops/laptop-a/', etag), (304, 0))
+            Laptop.objects.get(pk='laptop-b').save()
+            self.assertEqual(self.revalidate('/server/api/laptops/laptop-a/', etag)[0], 200)
+
+
+class RequireSharedCatalogCacheTests(TestCase):
+    def test_local_cache_allows_one_worker(self):
+        require_shared_catalog_cache(1)
+        with self.assertRaises(ImproperlyConfigured):
+            require_shared_catalog_cache(2)
+
+    def test_shared_cache_allows_many_workers(self):
+        with override_settings(CACHES={
+            **SHARED_CACHES, 'catalog': {**SHARED_CACHES['catalog'], 'LOCATION': tempfile.gettempdir()},
+        }):
+            require_shared_catalog_cache(4)
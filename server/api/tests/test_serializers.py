@@ -0,0 +1,58 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+
+from api.models import Favorite, Laptop
+from api.renderers import ORJSONRenderer
+from api.serializers import FavoriteSerializer, LaptopSerializer, favorite_rows, laptop_rows
+
+
+class RowSerializerOutputTests(TestCase):
+    """.values() rows rendered by ORJSONRenderer must match the ModelSerializers rendered by JSONRenderer byte for byte"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('alice')
+        laptops = [
+            # Nulls in every nullable field
+            Laptop(id='bare', name='Bare', brand='HP'),
+            Laptop(id='full', name='Full', brand='Dell', model='XPS 15', category='Business',
+                   processor='Intel Core i7-12700H', graphics='NVIDIA GeForce RTX 3050', ram='16GB',
+                   storage='512.0', display='OLED', display_size='15.6', display_resolution='3456x2160',
+                   price=Decimal('45999.5'), product_url='https://example.com/xps',
+                   image_url='https://example.com/xps.png', in_stock=True, seller='Dell', condition='New'),
+            # Non-ASCII text, and the separators JSONRenderer escapes
+            Laptop(id='ünïcode-笔记本', name='Ordinateur portable — «Été» 笔记本 💻', brand='Lenovo',
+                   model='line\u2028break\u2029para "quoted" \\ back', price=Decimal('0.1'), seller='Ñandú'),
+            Laptop(id='big', name='Big', brand='ASUS', price=Decimal('123456789.9')),
+        ]
+        for laptop in laptops:
+            laptop.populate_spec_columns()
+        Laptop.objects.bulk_create(laptops)
+        Favorite.objects.bulk_create([Favorite(user=cls.user, laptop=laptop) for laptop in laptops])
+
+    def assertSameBytes(self, serializer_data, row_data):
+        expected = JSONRenderer().render(serializer_data)
+        self.assertEqual(ORJSONRenderer().render(row_data), expected)
+        self.assertEqual(JSONRenderer().render(row_data), expected)
+
+    def test_laptops(self):
+        queryset = Laptop.objects.order_by('pk')
+        self.assertSameBytes(LaptopSerializer(queryset, many=True).data, laptop_rows.many(laptop_rows.values(queryset)))
+
+    def test_favorites(self):
+        queryset = Favorite.objects.filter(user=self.user).select_related('laptop').order_by('pk')
+        self.assertSameBytes(
+            FavoriteSerializer(queryset, many=True).data, favorite_rows.many(favorite_rows.values(queryset)),
+        )
+
+    def test_favorites_with_timezone(self):
+        # created_at is rendered in the current time zone with its offset
+        with override_settings(TIME_ZONE='Africa/Cairo'):
+            self.test_favorites()
+
+    def test_decimals_as_numbers(self):
+        with override_settings(REST_FRAMEWORK={'COERCE_DECIMAL_TO_STRING': False}):
+            self.test_laptops()
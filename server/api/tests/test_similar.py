@@ -0,0 +1,104 @@
+import numpy as np
+from django.test import TestCase, override_settings
+
+from api.finder import FEATURE_WEIGHTS, MISSING_DISTANCE, FinderIndex, transform
+from api.models import Laptop
+from api.similar import CATEGORY_DISTANCE, SimilarIndex
+
+from .test_finder import create_catalog
+
+NEIGHBOURS = 5
+
+
+def rebuilt(index):
+    """Every row recomputed against the whole catalog, with index's normalization"""
+    shape = index.neighbours.shape
+    full = SimilarIndex(index.finder, index.mean, index.std, np.full(shape, -1, dtype=np.int64), np.full(shape, np.inf))
+    full._compute(np.arange(len(full)))
+    return full
+
+
+@override_settings(CATALOG_SIMILAR_NEIGHBOURS=NEIGHBOURS, CATALOG_SIMILAR_REBUILD_SHARE=0.5)
+class SimilarIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_catalog(60)
+
+    def assert_same_table(self, index, expected):
+        np.testing.assert_array_equal(index.neighbours, expected.neighbours)
+        np.testing.assert_allclose(index.distances, expected.distances, atol=1e-9)
+
+    def change(self, updated=(), deleted=(), created=()):
+        for pk in updated:
+            laptop = Laptop.objects.get(pk=pk)
+            laptop.ram, laptop.price = '64GB', 99000
+            laptop.save()
+        Laptop.objects.filter(pk__in=deleted).delete()
+        for pk in created:
+            Laptop.objects.create(id=pk, name=pk, brand='HP', model='', ram='16GB', storage='512GB', price=30000,
+                                  category='Study')
+
+    def test_distances_match_pairwise_definition(self):
+        finder = FinderIndex.build('v1')
+        index = SimilarIndex.build(finder)
+        values = (transform(finder.raw) - index.mean) / index.std
+        for row in range(len(finder)):
+            squared = np.square(values - values[row])
+            squared = np.where(np.isnan(squared), MISSING_DISTANCE, squared)
+            expected = squared @ FEATURE_WEIGHTS
+            same = np.array([category is not None and category == finder.categories[row]
+                             for category in finder.categories])
+            expected += np.where(same, 0, CATEGORY_DISTANCE)
+            expected[row] = np.inf
+            with self.subTest(pk=finder.pks[row]):
+                # The table holds the k smallest distances, each belonging to its neighbour
+                np.testing.assert_allclose(index.distances[row], np.sort(expected)[:NEIGHBOURS], atol=1e-9)
+                np.testing.assert_allclose(index.distances[row], expected[index.neighbours[row]], atol=1e-9)
+
+    def test_refresh_matches_rebuild(self):
+        finder = FinderIndex.build('v1')
+        index = SimilarIndex.build(finder)
+        # Deleting a neighbour forces its rows to be recomputed; the rest are merged with the changed rows
+        lost = [finder.pks[i] for i in index.neighbours[:3, 0]]
+        for step, changes in enumerate([
+            dict(updated=['laptop-005', 'laptop-030'], deleted=lost[:2], created=['laptop-new-1']),
+            dict(updated=['laptop-041'], deleted=[lost[2]], created=['laptop-new-2', 'laptop-new-3']),
+            dict(updated=['laptop-new-1']),
+        ]):
+            self.change(**changes)
+            finder = FinderIndex.build(f'v{step + 2}', previous=finder)
+            index = SimilarIndex.build(finder, previous=index)
+            with self.subTest(step=step):
+                # Refreshed, not rebuilt
+                self.assertGreater(index.changed_since_build, 0)
+                self.assert_same_table(index, rebuilt(index))
+
+    def test_similar_skips_itself_and_missing_neighbours(self):
+        finder = FinderIndex.build('v1')
+        index = SimilarIndex.build(finder)
+        for pk in finder.pks:
+            positions, distances, count = index.similar(pk, NEIGHBOURS)
+            self.assertNotIn(finder.position[pk], positions)
+            self.assertEqual(count, len(positions))
+            self.assertTrue(np.all(np.diff(distances) >= 0))
+        self.assertIsNone(index.similar('nope', NEIGHBOURS))
+
+    def test_rebuilds_past_change_share(self):
+        finder = FinderIndex.build('v1')
+        index = SimilarIndex.build(finder)
+        self.change(updated=[f'laptop-{i:03d}' for i in range(0, 60, 3)])
+        finder = FinderIndex.build('v2', previous=finder)
+        with override_settings(CATALOG_SIMILAR_REBUILD_SHARE=0.2):
+            index = SimilarIndex.build(finder, previous=index)
+        self.assertEqual(index.changed_since_build, 0)
+        # A full build takes the new finder's normalization
+        np.testing.assert_array_equal(index.mean, finder.mean)
+        self.assert_same_table(index, SimilarIndex.build(finder))
+
+    def test_small_catalog(self):
+        Laptop.objects.exclude(pk__in=['laptop-001', 'laptop-002', 'laptop-003']).delete()
+        finder = FinderIndex.build('v1')
+        index = SimilarIndex.build(finder)
+        positions, distances, count = index.similar('laptop-001', NEIGHBOURS)
+        self.assertEqual(count, 2)
+        self.assertEqual(sorted(finder.pks[i] for i in positions), ['laptop-002', 'laptop-003'])
@@ -1,8 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import LaptopViewSet, LoginView, SignupView, ProfileView, GoogleLoginView, GoogleCallbackView, FavoriteViewSet
-from .model_views import LaptopFinderView
-from .chatbot_views import ChatbotView
+from .views import LaptopViewSet, LoginView, LogoutView, SignupView, ProfileView, GoogleLoginView, GoogleCallbackView, FavoriteViewSet
+from .lazy import lazy_view
 from django.urls import path
 from . import views
 
@@ -14,9 +13,10 @@ urlpatterns = [
     path('', include(router.urls)),
     path('auth/login/', LoginView.as_view(), name='login'),
     path('auth/signup/', SignupView.as_view(), name='signup'),
+    path('auth/logout/', LogoutView.as_view(), name='logout'),
     path('auth/profile/<int:pk>/', ProfileView.as_view(), name='profile'),  
     path('auth/google/', GoogleLoginView.as_view(), name='google_login'),
     path('auth/google/callback/', GoogleCallbackView.as_view(), name='google_callback'),
-    path('chatbot/', ChatbotView.as_view(), name='chatbot'),
-    path('laptop-finder/', LaptopFinderView.as_view(), name='laptop-finder'),
+    path('chatbot/', lazy_view('api.chatbot_views.ChatbotView'), name='chatbot'),
+    path('laptop-finder/', lazy_view('api.model_views.LaptopFinderView'), name='laptop-finder'),
 ]
\ No newline at end of file
@@ -4,26 +4,40 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db.models import Q
 from .models import Laptop, Favorite
-from .serializers import LaptopSerializer, FavoriteSerializer
+from .serializers import LaptopSerializer, FavoriteSerializer, laptop_rows, favorite_rows
+from .renderers import orjson_renderer_classes
+from .authentication import cached_authentication_classes
+from .specs import storage_q, screen_size_q, performance_q
+from .catalog_engine import catalog_engine_enabled, get_catalog_engine
+from .facets import get_facets
+from .finder import finder_results, get_finder_index, parse_finder_params
+from .ranker import get_recommendations, parse_specs
+from .similar import get_similar_index
+from .favorites import apply_favorite_changes, get_favorite_laptop_ids, invalidate_favorite_ids, toggle_favorite
+from .search import RankedSearchFilter
+from .pagination import KeysetPagination
+from .response_cache import cached_response, response_cache_stats
 from rest_framework.pagination import PageNumberPagination
 from django_filters.rest_framework import DjangoFilterBackend, FilterSet, CharFilter, NumberFilter
 from rest_framework import filters
 from rest_framework.views import APIView
-import numpy as np
 from django.contrib.auth import authenticate, login
 from django.contrib.auth.models import User
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django.contrib.auth.hashers import check_password
-from allauth.socialaccount.providers.google.views import GoogleOAuth2Adapter
-from allauth.socialaccount.providers.oauth2.client import OAuth2Client
 from rest_framework.authtoken.models import Token
 from django.conf import settings
 from django.shortcuts import redirect
 from django.urls import reverse
+from django.core.handlers.asgi import ASGIRequest
 from django.http import JsonResponse
+from django.views import View
+from django.utils.http import http_date
+import logging
 import random
 import math
-from .model_views import LaptopFinderView
+
+logger = logging.getLogger(__name__)
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 20
@@ -31,30 +45,208 @@ class StandardResultsSetPagination(PageNumberPagination):
     max_page_size = 100
 
 class LaptopFilter(FilterSet):
-    brand = CharFilter(lookup_expr='icontains')
+    # brand and category are comma-separated lists handled in get_queryset
     processor = CharFilter(lookup_expr='icontains')
     min_price = NumberFilter(field_name='price', lookup_expr='gte')
     max_price = NumberFilter(field_name='price', lookup_expr='lte')
     
     class Meta:
         model = Laptop
-        fields = ['brand', 'processor', 'condition', 'category']
+        fields = ['processor', 'condition']
 
 class LaptopViewSet(viewsets.ModelViewSet):
     queryset = Laptop.objects.all()
     serializer_class = LaptopSerializer
     
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
-    search_fields = ['name', 'brand'] 
+    # ?search= is answered by the ranked index in api/search.py
+    filter_backends = [DjangoFilterBackend, RankedSearchFilter]
+    renderer_classes = orjson_renderer_classes()
+    authentication_classes = cached_authentication_classes()
+    # Catalog reads never look at the user, so tokens aren't resolved for them
+    public_read = True
     filterset_class = LaptopFilter
     
+    @property
+    def paginator(self):
+        # ?pagination=cursor (or a cursor from a previous page) opts in to keyset paging
+        if not hasattr(self, '_paginator') and self.request is not None and self.action == 'list':
+            params = self.request.query_params
+            if params.get('pagination') == 'cursor' or 'cursor' in params:
+                self._paginator = KeysetPagination()
+        return super().paginator
+    
+    def list(self, request, *args, **kwargs):
+        return cached_response(request, 'list', lambda: self.list_uncached(request, *args, **kwargs))
+    
+    def list_uncached(self, request, *args, **kwargs):
+        if catalog_engine_enabled() and not isinstance(self.paginator, KeysetPagination):
+            rows = get_catalog_engine().query(request)
+            if rows is not None:
+                page = self.paginate_queryset(rows)
+                if page is not None:
+                    return self.get_paginated_response(page)
+                return Response(list(rows))
+        
+        # Serialize straight from .values() rows rather than model instances
+        columns = laptop_rows.columns
+        if isinstance(self.paginator, KeysetPagination):
+            columns = columns + self.paginator.get_cursor_fields(request, Laptop)
+        rows = self.filter_queryset(self.get_queryset()).values(*dict.fromkeys(columns))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(laptop_rows.many(page))
+        return Response(laptop_rows.many(rows))
+    
+    def retrieve(self, request, *args, **kwargs):
+        return cached_response(
+            request, 'retrieve', lambda: self.retrieve_uncached(request, *args, **kwargs),
+            pk=kwargs.get(self.lookup_url_kwarg or self.lookup_field),
+        )
+    
+    def retrieve_uncached(self, request, *args, **kwargs):
+        instance = self.get_object()
+        response = Response(self.get_serializer(instance).data)
+        response['Last-Modified'] = http_date(instance.updated_at.timestamp())
+        return response
+    
+    @action(detail=False, methods=['get', 'post'])
+    def batch(self, request):
+        """Fetch several laptops in one query, in the requested order.
+
+        GET takes ?ids=a,b,c; POST takes {"ids": [...]} for long lists.
+        Unknown ids come back as null in results and are listed in missing.
+        """
+        if request.method == 'POST':
+            ids = request.data.get('ids')
+            if not isinstance(ids, list):
+                return Response({"error": "ids must be a list"}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            ids = request.query_params.get('ids', '').split(',')
+        
+        ids = list(dict.fromkeys(str(laptop_id).strip() for laptop_id in ids if str(laptop_id).strip()))
+        if not ids:
+            return Response({"error": "ids is required"}, status=status.HTTP_400_BAD_REQUEST)
+        max_size = getattr(settings, 'LAPTOP_BATCH_MAX_SIZE', 50)
+        if len(ids) > max_size:
+            return Response({"error": f"At most {max_size} ids per batch"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        def build():
+            laptops = Laptop.objects.in_bulk(ids)
+            found = iter(self.get_serializer([laptops[i] for i in ids if i in laptops], many=True).data)
+            return Response({
+                "results": [next(found) if laptop_id in laptops else None for laptop_id in ids],
+                "missing": [laptop_id for laptop_id in ids if laptop_id not in laptops],
+            })
+        
+        if request.method == 'POST':
+            return build()
+        return cached_response(request, 'batch', build)
+    
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def cache_stats(self, request):
+        """Response cache hit/miss counters for this worker"""
+        return Response(response_cache_stats())
+    
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """Per-option match counts and price range for the filter sidebar"""
+        try:
+            facets = get_facets(get_catalog_engine(), request, filters.SearchFilter().get_search_terms(request))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(facets)
+    
+    @action(detail=False, methods=['post'])
+    def recommend(self, request):
+        """Rank the whole catalog against extracted chat specs.
+
+        Takes {"specs": {...}, "limit": 10} where specs has the chatbot's
+        extraction shape. Always returns up to limit laptops, best first, each
+        with a per-criterion explanation of what it matched and missed.
+        """
+        try:
+            criteria = parse_specs(request.data.get('specs'))
+            limit = int(request.data.get('limit', 10))
+        except (TypeError, ValueError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        max_size = getattr(settings, 'CATALOG_RECOMMEND_MAX_SIZE', 50)
+        if not 1 <= limit <= max_size:
+            return Response({"error": f"limit must be between 1 and {max_size}"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(get_recommendations(get_catalog_engine(), criteria, limit))
+    
+    @action(detail=False, methods=['get', 'post'])
+    def finder(self, request):
+        """Laptops closest to target specs among those passing hard filters.
+
+        Filters: price_min, price_max, ram_min, storage_min, performance_level.
+        Targets: price, ram, storage, display_size. "scores" is a NumPy array
+        aligned with "results", encoded as-is by the renderer. POST
+        {"queries": [...], "limit": n} runs a batch in one pass and returns
+        one such result per query, in order.
+        """
+        params = request.data if request.method == 'POST' else request.query_params
+        batch = request.method == 'POST' and 'queries' in params
+        try:
+            limit = int(params.get('limit', 10))
+            if batch:
+                queries = params.get('queries')
+                if not isinstance(queries, list) or not queries:
+                    raise ValueError("queries must be a non-empty list")
+                max_batch = getattr(settings, 'CATALOG_FINDER_BATCH_MAX_SIZE', 100)
+                if len(queries) > max_batch:
+                    raise ValueError(f"At most {max_batch} queries per batch")
+                queries = [parse_finder_params(query) for query in queries]
+            else:
+                queries = [parse_finder_params(params)]
+        except (TypeError, ValueError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        max_size = getattr(settings, 'CATALOG_FINDER_MAX_SIZE', 50)
+        if not 1 <= limit <= max_size:
+            return Response({"error": f"limit must be between 1 and {max_size}"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        def build():
+            index = get_finder_index()
+            results = finder_results(index, index.find_many(queries, limit))
+            return Response({"results": results} if batch else results[0])
+        
+        if request.method == 'POST':
+            return build()
+        return cached_response(request, 'finder', build)
+    
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        """The laptops nearest to this one by price, RAM, storage, CPU/GPU tier, screen size and category.
+
+        Read from the precomputed neighbour table in api/similar.py. Takes
+        ?limit= (default 10); "scores" is aligned with "results" as in finder.
+        """
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            return Response({"error": "limit must be a number"}, status=status.HTTP_400_BAD_REQUEST)
+        max_size = getattr(settings, 'CATALOG_SIMILAR_NEIGHBOURS', 20)
+        if not 1 <= limit <= max_size:
+            return Response({"error": f"limit must be between 1 and {max_size}"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        def build():
+            index = get_similar_index()
+            match = index.similar(pk, limit)
+            if match is None:
+                return Response({"error": "Laptop not found"}, status=status.HTTP_404_NOT_FOUND)
+            return Response(finder_results(index.finder, [match])[0])
+        
+        return cached_response(request, 'similar', build, pk=pk)
+    
     def get_queryset(self):
         queryset = Laptop.objects.all()
         
 
+        # pk breaks ties so pages are stable and match the catalog engine
         ordering = self.request.query_params.get('ordering')
         if ordering:
-            queryset = queryset.order_by(ordering)
+            queryset = queryset.order_by(ordering, 'pk')
+        else:
+            queryset = queryset.order_by(*Laptop._meta.ordering, 'pk')
         
 
         brand = self.request.query_params.get('brand')
@@ -71,42 +263,11 @@ class LaptopViewSet(viewsets.ModelViewSet):
 
         storage = self.request.query_params.get('storage')
         if storage:
-            storage_values = storage.split(',')
-            q_objects = Q()
-            
-            for value in storage_values:
-                if value == "2048":
-                    q_objects |= Q(storage__startswith="2048")
-                    q_objects |= Q(storage__startswith="2000")
-                    q_objects |= Q(storage__startswith="2TB")
-                elif value == "4096":  
-                    q_objects |= Q(storage__startswith="4096")
-                    q_objects |= Q(storage__startswith="4000")
-                    q_objects |= Q(storage__startswith="4TB")
-                elif value == "8192": 
-                    q_objects |= Q(storage__startswith="8192")
-                    q_objects |= Q(storage__startswith="8000")
-                    q_objects |= Q(storage__startswith="8TB")
-                else:
-                    q_objects |= Q(storage__startswith=f"{value}")
-                    q_objects |= Q(storage__startswith=f"{value}.")
-
-                    q_objects |= Q(storage__contains=f"{value}GB")
-                    q_objects |= Q(storage__contains=f"{value} GB")
-                    
-                    if value == "1024":
-                        q_objects |= Q(storage__contains="1TB")
-                        q_objects |= Q(storage__contains="1 TB")
-            
-            queryset = queryset.filter(q_objects)
+            queryset = queryset.filter(storage_q(storage.split(',')))
             
         screen_size = self.request.query_params.get('screen_size')
         if screen_size:
-            screen_size_values = screen_size.split(',')
-            q_objects = Q()
-            for value in screen_size_values:
-                q_objects |= Q(display_size__startswith=value)
-            queryset = queryset.filter(q_objects)
+            queryset = queryset.filter(screen_size_q(screen_size.split(',')))
             
         min_price = self.request.query_params.get('min_price')
         max_price = self.request.query_params.get('max_price')
@@ -135,40 +296,7 @@ class LaptopViewSet(viewsets.ModelViewSet):
 
         performance = self.request.query_params.get('performance')
         if performance:
-            performance_levels = performance.split(',')
-            q_objects = Q()
-            
-            for level in performance_levels:
-                if level == 'high':
-                    q_objects |= (
-                        Q(processor__icontains='i7') | 
-                        Q(processor__icontains='i9') | 
-                        Q(processor__icontains='ryzen 7') | 
-                        Q(processor__icontains='ryzen 9') |
-                        Q(processor__icontains='m1') |
-                        Q(processor__icontains='m2') |
-                        Q(processor__icontains='m3')
-                    ) & (
-                        Q(graphics__icontains='rtx') |
-                        Q(graphics__icontains='gtx') |
-                        Q(graphics__icontains='m1') |
-                        Q(graphics__icontains='m2') |
-                        Q(graphics__icontains='m3')
-                    )
-                elif level == 'moderate':
-                    q_objects |= (
-                        Q(processor__icontains='i5') | 
-                        Q(processor__icontains='ryzen 5')
-                    )
-                elif level == 'basic':
-                    q_objects |= (
-                        Q(processor__icontains='i3') | 
-                        Q(processor__icontains='celeron') | 
-                        Q(processor__icontains='pentium') | 
-                        Q(processor__icontains='athlon')
-                    )
-            
-            queryset = queryset.filter(q_objects)
+            queryset = queryset.filter(performance_q(performance.split(',')))
             
         return queryset
 
@@ -240,7 +368,18 @@ class SignupView(APIView):
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+class LogoutView(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = cached_authentication_classes()
+    
+    def post(self, request):
+        # Deleting the token also drops it from the token auth cache (see api/signals.py)
+        Token.objects.filter(user=request.user).delete()
+        return Response({"message": "Logout successful"}, status=status.HTTP_200_OK)
+
 class ProfileView(APIView):
+    authentication_classes = cached_authentication_classes()
+    
     def get(self, request, pk=None):
         if pk != request.user.id and not request.user.is_staff:
             return Response({"error": "You don't have permission to view this profile"}, 
@@ -307,7 +446,7 @@ class GoogleLoginView(APIView):
     def get(self, request):
         redirect_uri = "http://localhost:8000/server/api/auth/google/callback/"
         
-        print(f"Using redirect URI: {redirect_uri}")
+        logger.debug("Using redirect URI: %s", redirect_uri)
         
         auth_url = (f'https://accounts.google.com/o/oauth2/auth?'
                 f'client_id={settings.SOCIALACCOUNT_PROVIDERS["google"]["APP"]["client_id"]}'
@@ -318,92 +457,81 @@ class GoogleLoginView(APIView):
         
         return redirect(auth_url)
 
-class GoogleCallbackView(APIView):
-    def get(self, request):
+class GoogleCallbackView(View):
+    """Finish the Google login.
+
+    An async view so the two calls to Google don't hold a worker while
+    waiting: under laptopfinder.asgi they share the pooled client in
+    api/google_oauth.py. It still works, synchronously, under WSGI, where
+    each login opens and closes its own client.
+    """
+    async def get(self, request):
+        # Imported here so httpx only loads once someone logs in with Google
+        from . import google_oauth
+
         code = request.GET.get('code')
         if not code:
-            return Response({'error': 'No authorization code provided'}, status=400)
+            return JsonResponse({'error': 'No authorization code provided'}, status=400)
         
         try:
-            client_id = settings.SOCIALACCOUNT_PROVIDERS['google']['APP']['client_id']
-            client_secret = settings.SOCIALACCOUNT_PROVIDERS['google']['APP']['secret']
-            
             redirect_uri = "http://localhost:8000/server/api/auth/google/callback/"
             
-            import requests
-            token_url = 'https://oauth2.googleapis.com/token'
-            
-            print(f"Exchanging code for token with redirect URI: {redirect_uri}")
-            
-            token_data = requests.post(
-                token_url,
-                data={
-                    'code': code,
-                    'client_id': client_id,
-                    'client_secret': client_secret,
-                    'redirect_uri': redirect_uri,
-                    'grant_type': 'authorization_code'
-                }
-            ).json()
-            
-            if 'error' in token_data:
-                print(f"Google token error details: {token_data}")
-                return Response({'error': f"Google token error: {token_data['error']}"}, status=400)
-            
-            access_token = token_data.get('access_token')
-            user_info_response = requests.get(
-                'https://www.googleapis.com/oauth2/v2/userinfo',
-                headers={'Authorization': f'Bearer {access_token}'}
-            ).json()
-            
-            from django.contrib.auth.models import User
+            # Only an ASGI worker keeps one event loop, and so a pooled client, across requests
+            async with google_oauth.google_client(pooled=isinstance(request, ASGIRequest)) as client:
+                token_data = await google_oauth.exchange_code(client, code, redirect_uri)
+                user_info_response = await google_oauth.fetch_userinfo(client, token_data.get('access_token'))
             
             email = user_info_response.get('email')
             if not email:
-                return Response({'error': 'Email not provided by Google'}, status=400)
+                return JsonResponse({'error': 'Email not provided by Google'}, status=400)
             
-            try:
-                user = User.objects.get(email=email)
-            except User.DoesNotExist:
-                username = email.split('@')[0]
-                if User.objects.filter(username=username).exists():
-                    username = f"{username}{User.objects.count()}"
-                
-                user = User.objects.create_user(
-                    username=username,
-                    email=email,
-                    password=None
-                )
-                user.save()
-            
-            token, _ = Token.objects.get_or_create(user=user)
+            user = await google_oauth.get_or_create_google_user(email)
+            token, _ = await Token.objects.aget_or_create(user=user)
             
             frontend_url = 'http://localhost:5173'
             redirect_url = f"{frontend_url}/auth/google/callback?token={token.key}&user_id={user.id}&email={email}&username={user.username}"
             
             return redirect(redirect_url)
             
-        except Exception as e:
-            import traceback
-            print(traceback.format_exc())
-            return Response({'error': str(e)}, status=400)
+        except Exception:
+            # The details (Google's reply, database errors) stay in the log
+            logger.exception("Google login failed")
+            return JsonResponse({'error': 'Google login failed'}, status=400)
 
 # Add this new view class
 class FavoriteViewSet(viewsets.ModelViewSet):
     serializer_class = FavoriteSerializer
     permission_classes = [IsAuthenticated]
+    renderer_classes = orjson_renderer_classes()
+    authentication_classes = cached_authentication_classes()
     
     def get_queryset(self):
-        return Favorite.objects.filter(user=self.request.user)
+        return Favorite.objects.filter(user=self.request.user).select_related('laptop')
+    
+    def list(self, request, *args, **kwargs):
+        # Favorites and their laptops come back from one joined .values() query
+        rows = favorite_rows.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(favorite_rows.many(page))
+        return Response(favorite_rows.many(rows))
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+        invalidate_favorite_ids(self.request.user.id)
+    
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        invalidate_favorite_ids(self.request.user.id)
+    
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        invalidate_favorite_ids(self.request.user.id)
     
     @action(detail=False, methods=['get'])
     def laptop_ids(self, request):
         """Return just the IDs of favorited laptops for the current user"""
-        favorite_ids = self.get_queryset().values_list('laptop_id', flat=True)
-        return Response(favorite_ids)
+        return Response(get_favorite_laptop_ids(request.user.id))
     
     @action(detail=False, methods=['post'])
     def toggle(self, request):
@@ -411,21 +539,36 @@ class FavoriteViewSet(viewsets.ModelViewSet):
         laptop_id = request.data.get('laptop_id')
         if not laptop_id:
             return Response({"error": "laptop_id is required"}, status=status.HTTP_400_BAD_REQUEST)
-            
+        
         try:
-            laptop = Laptop.objects.get(id=laptop_id)
-            favorite = Favorite.objects.filter(user=request.user, laptop=laptop)
-            
-            if favorite.exists():
-                # Remove from favorites
-                favorite.delete()
-                return Response({"status": "removed", "laptop_id": laptop_id}, status=status.HTTP_200_OK)
-            else:
-                # Add to favorites
-                Favorite.objects.create(user=request.user, laptop=laptop)
-                return Response({"status": "added", "laptop_id": laptop_id}, status=status.HTTP_201_CREATED)
-                
+            result = toggle_favorite(request.user.id, str(laptop_id))
         except Laptop.DoesNotExist:
             return Response({"error": "Laptop not found"}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if result == 'removed':
+            return Response({"status": "removed", "laptop_id": laptop_id}, status=status.HTTP_200_OK)
+        return Response({"status": "added", "laptop_id": laptop_id}, status=status.HTTP_201_CREATED)
+    
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Add and remove several favorites at once.
+
+        Takes {"add": [...], "remove": [...]}; removals are applied first.
+        Returns what changed, unknown ids in missing, and the new laptop_ids.
+        """
+        changes = {}
+        for key in ('add', 'remove'):
+            ids = request.data.get(key, [])
+            if not isinstance(ids, list):
+                return Response({"error": f"{key} must be a list"}, status=status.HTTP_400_BAD_REQUEST)
+            changes[key] = [str(laptop_id).strip() for laptop_id in ids if str(laptop_id).strip()]
+        
+        max_size = getattr(settings, 'FAVORITES_BULK_MAX_SIZE', 100)
+        if len(changes['add']) + len(changes['remove']) > max_size:
+            return Response({"error": f"At most {max_size} changes per request"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        result = apply_favorite_changes(request.user.id, **changes)
+        result['laptop_ids'] = get_favorite_laptop_ids(request.user.id)
+        return Response(result)
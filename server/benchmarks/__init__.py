@@ -0,0 +1,12 @@
+"""Benchmarks for the Laptop Finder backend.
+
+Run from the server directory, e.g. ``python -m benchmarks.import_bench``.
+Every benchmark runs against a throwaway test database, never the real one.
+
+The general suite is ``synthetic`` (seeded catalogs of 10k to 1M laptops),
+``micro`` (per-feature timings and query counts) and ``load`` (a weighted
+request mix with per-endpoint latency percentiles). Both ``micro`` and
+``load`` write JSON results that ``--compare`` diffs against an earlier run,
+as does ``startup`` (import time and time to first response of a fresh
+worker).
+"""
@@ -0,0 +1,132 @@
+"""Check that catalog latency stays flat while slow upstream calls are in flight.
+
+    python -m benchmarks.asgi_load --rows 5000 --slow 300 --latency 2
+
+Drives the ASGI application (laptopfinder.asgi, concurrency limiter
+included) in-process. First it measures catalog list latency on its own.
+Then it measures again while --slow Google callbacks wait on a stub
+upstream that answers after --latency seconds, standing in for any
+I/O-bound endpoint such as an LLM call. It prints p50/p99 catalog
+latency for both phases and how the slow calls fared (completed vs 503
+from their concurrency limit). With SQLite's in-memory test database,
+concurrent signups can fail with "table is locked"; those count as other.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+CATALOG_PATH = '/server/api/laptops/'
+CALLBACK_PATH = '/server/api/auth/google/callback/'
+
+
+async def call(app, path, query=''):
+    """Send one GET through an ASGI app and return the response status"""
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': path, 'raw_path': path.encode(), 'query_string': query.encode(), 'root_path': '',
+        'headers': [(b'host', b'testserver')], 'client': ('127.0.0.1', 50000), 'server': ('testserver', 80),
+    }
+    status = None
+    sent = False
+    disconnected = asyncio.Event()
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    await app(scope, receive, send)
+    disconnected.set()
+    return status
+
+
+async def catalog_latencies(app, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(number):
+        async with semaphore:
+            started = time.perf_counter()
+            status = await call(app, CATALOG_PATH, f'page={number % 20 + 1}&page_size=20')
+            latencies.append(time.perf_counter() - started)
+            assert status == 200, status
+
+    await asyncio.gather(*(one(number) for number in range(requests)))
+    return np.percentile(latencies, [50, 99]) * 1000
+
+
+async def run(app, args):
+    # Warm-up, so first-request costs don't land in the baseline
+    await catalog_latencies(app, args.concurrency * 2, args.concurrency)
+    baseline = await catalog_latencies(app, args.requests, args.concurrency)
+
+    statuses = []
+
+    async def slow(number):
+        statuses.append(await call(app, CALLBACK_PATH, f'code={number}'))
+
+    slow_calls = [asyncio.ensure_future(slow(number)) for number in range(args.slow)]
+    # Let the slow calls reach the stub before measuring
+    await asyncio.sleep(min(0.5, args.latency / 2))
+    loaded = await catalog_latencies(app, args.requests, args.concurrency)
+    in_flight = sum(not task.done() for task in slow_calls)
+    await asyncio.gather(*slow_calls)
+    return baseline, loaded, in_flight, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--requests', type=int, default=400, help='catalog requests per phase')
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent catalog requests')
+    parser.add_argument('--slow', type=int, default=300, help='slow upstream calls kept in flight')
+    parser.add_argument('--latency', type=float, default=2.0, help='stub upstream delay in seconds')
+    args = parser.parse_args()
+
+    sys.path.insert(0, SERVER_DIR)
+    import import_data
+    from django.db import connection
+    from django.test.utils import override_settings
+    from benchmarks.import_bench import generate_csv
+    from benchmarks.oauth_bench import StubServer, make_stub_handler
+    from laptopfinder.asgi import application
+
+    connection.creation.create_test_db(verbosity=0)
+    csv_path = os.path.join(tempfile.mkdtemp(), 'bench_laptops.csv')
+    generate_csv(csv_path, args.rows)
+    import_data.import_csv(csv_path)
+
+    stub = StubServer(('127.0.0.1', 0), make_stub_handler(args.latency))
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{stub.server_address[1]}'
+    with override_settings(GOOGLE_OAUTH_TOKEN_URL=f'{base_url}/token',
+                           GOOGLE_OAUTH_USERINFO_URL=f'{base_url}/userinfo',
+                           GOOGLE_OAUTH_TIMEOUT=args.latency * 3,
+                           ALLOWED_HOSTS=['*']):
+        baseline, loaded, in_flight, statuses = asyncio.run(run(application, args))
+    stub.shutdown()
+
+    print(f"catalog p50/p99 alone:            {baseline[0]:7.1f} / {baseline[1]:7.1f} ms")
+    print(f"catalog p50/p99 with slow calls:  {loaded[0]:7.1f} / {loaded[1]:7.1f} ms "
+          f"({in_flight} slow calls still in flight at the end)")
+    print(f"slow calls: {statuses.count(302)} completed, {statuses.count(503)} shed with 503, "
+          f"{len(statuses) - statuses.count(302) - statuses.count(503)} other")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Compare single-query and batched laptop finder throughput.
+
+    python -m benchmarks.finder_bench --rows 20000 --queries 1000 --batch-size 100
+
+Loads a generated catalog into a fresh test database, builds random finder
+queries (filters plus targets), and runs them through laptops/finder/ once
+per request and then in batches. It prints queries/sec for both, with and
+without the HTTP layer, and checks that the two paths return the same
+results.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def random_queries(count, seed=0):
+    rng = np.random.default_rng(seed)
+    choices = {
+        'price_min': [5000, 10000, 20000],
+        'price_max': [25000, 40000, 60000, 100000],
+        'ram_min': [8, 16, 32],
+        'storage_min': [256, 512, 1024],
+        'performance_level': ['basic', 'moderate', 'high'],
+        'price': [15000, 30000, 50000],
+        'ram': [8, 16, 32],
+        'storage': [512, 1024],
+        'display_size': [13.3, 14, 15.6, 16],
+    }
+    queries = []
+    for _ in range(count):
+        query = {}
+        for name, values in choices.items():
+            if rng.random() < 0.4:
+                query[name] = values[rng.integers(len(values))]
+        queries.append(query)
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args()
+
+    sys.path.insert(0, SERVER_DIR)
+    import import_data
+    from django.db import connection
+    from django.test.utils import override_settings
+    from rest_framework.test import APIClient
+    from api.finder import get_finder_index, parse_finder_params
+    from benchmarks.import_bench import generate_csv
+
+    connection.creation.create_test_db(verbosity=0)
+    csv_path = os.path.join(tempfile.mkdtemp(), 'bench_laptops.csv')
+    generate_csv(csv_path, args.rows)
+    import_data.import_csv(csv_path)
+
+    queries = random_queries(args.queries)
+    parsed = [parse_finder_params(query) for query in queries]
+    batches = [queries[start:start + args.batch_size] for start in range(0, len(queries), args.batch_size)]
+    index = get_finder_index()
+    client = APIClient()
+
+    def index_single():
+        return [index.find(filters, targets, args.limit) for filters, targets in parsed]
+
+    def index_batch():
+        return [match for start in range(0, len(parsed), args.batch_size)
+                for match in index.find_many(parsed[start:start + args.batch_size], args.limit)]
+
+    def http_single():
+        return [client.post('/server/api/laptops/finder/', dict(query, limit=args.limit), format='json').json()
+                for query in queries]
+
+    def http_batch():
+        return [result for batch in batches
+                for result in client.post('/server/api/laptops/finder/', {'queries': batch, 'limit': args.limit},
+                                          format='json').json()['results']]
+
+    with override_settings(CATALOG_FINDER_BATCH_MAX_SIZE=args.batch_size, ALLOWED_HOSTS=['*']):
+        timings = {}
+        outputs = {}
+        for name, func in [('index single', index_single), ('index batch', index_batch),
+                           ('http single', http_single), ('http batch', http_batch)]:
+            started = time.perf_counter()
+            outputs[name] = func()
+            timings[name] = time.perf_counter() - started
+
+    for single, batch in [('index single', 'index batch'), ('http single', 'http batch')]:
+        if single.startswith('index'):
+            same = all(np.array_equal(a[0], b[0]) for a, b in zip(outputs[single], outputs[batch]))
+        else:
+            same = outputs[single] == outputs[batch]
+        assert same, f'{single} and {batch} results differ'
+
+    print(f"{args.queries} queries over {args.rows} laptops, batches of {args.batch_size}")
+    for name, elapsed in timings.items():
+        print(f"  {name:<13} {args.queries / elapsed:>10,.0f} queries/sec")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""Compare the streaming importer with the old read-everything importer.
+
+    python -m benchmarks.import_bench --rows 500000
+
+Generates a seller-feed style CSV, then imports it with each importer in a
+separate process (so peak RSS is measured cleanly) against a fresh test
+database, and prints wall time, rows/sec and peak RSS for both.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SAMPLE_DATA = os.path.join(SERVER_DIR, '..', 'src', 'data', 'data.json')
+
+
+def generate_csv(path, rows, seed=0):
+    """Write rows laptops sampled from src/data/data.json, with messy storage/price strings"""
+    rng = np.random.default_rng(seed)
+    sample = pd.read_json(SAMPLE_DATA, dtype=False)
+    df = sample.iloc[rng.integers(0, len(sample), rows)].reset_index(drop=True)
+    df['id'] = [f'bench-{i}' for i in range(rows)]
+    storage = df['storage'].astype(str)
+    suffix = rng.choice(['', 'GB', ' GB'], rows)
+    df['storage'] = np.where(storage == '1024', '1TB', storage + suffix)
+    price = pd.to_numeric(df['price'].astype(str).str.replace(',', ''), errors='coerce').fillna(0)
+    price = price * rng.uniform(0.9, 1.1, rows)
+    df['price'] = np.where(rng.random(rows) < 0.5, price.round(0).map('{:,.0f}'.format), 'EGY ' + price.round(0).astype(int).astype(str))
+    df.columns = [col.replace('_', ' ').title() for col in df.columns]
+    df.to_csv(path, index=False)
+
+
+def legacy_import(csv_path):
+    """The pre-streaming importer: whole-file read, iterrows, one unbatched bulk_create"""
+    from api.models import Laptop
+
+    df = pd.read_csv(csv_path, encoding='utf-8')
+    df.columns = [col.lower().replace(' ', '_') for col in df.columns]
+    Laptop.objects.all().delete()
+    laptops_to_create = []
+    for i, row in df.iterrows():
+        data = row.to_dict()
+        if 'in_stock' in data:
+            data['in_stock'] = str(data['in_stock']).lower() in ('in stock', 'yes', '1')
+        if 'storage' in data and data['storage']:
+            try:
+                storage_value = float(str(data['storage']).replace('GB', '').replace('TB', '1024').strip())
+                data['storage'] = f"{storage_value:.1f}"
+            except (ValueError, TypeError):
+                pass
+        if 'price' in data and not isinstance(data['price'], (int, float)):
+            try:
+                data['price'] = float(str(data['price']).replace('$', '').replace(',', '').replace('EGY', '').strip())
+            except ValueError:
+                data['price'] = 0.0
+        laptop = Laptop(**data)
+        laptop.populate_spec_columns()
+        laptops_to_create.append(laptop)
+    Laptop.objects.bulk_create(laptops_to_create)
+    return len(laptops_to_create)
+
+
+def run_one(importer, csv_path):
+    """Import csv_path with one importer into a fresh test database and print JSON stats"""
+    sys.path.insert(0, SERVER_DIR)
+    import import_data
+    from django.db import connection
+
+    connection.creation.create_test_db(verbosity=0)
+    started = time.perf_counter()
+    if importer == 'legacy':
+        legacy_import(csv_path)
+    else:
+        import_data.import_csv(csv_path)
+    elapsed = time.perf_counter() - started
+
+    from api.models import Laptop
+    rows = Laptop.objects.count()
+    # ru_maxrss is KiB on Linux
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({'importer': importer, 'rows': rows, 'seconds': elapsed, 'peak_rss_mb': peak_mb}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--csv', help='reuse an existing CSV instead of generating one')
+    parser.add_argument('--importers', default='streaming,legacy')
+    parser.add_argument('--run', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_one(args.run, args.csv)
+        return
+
+    csv_path = args.csv
+    if not csv_path:
+        csv_path = os.path.join(tempfile.mkdtemp(), 'bench_laptops.csv')
+        print(f"Generating {args.rows} rows into {csv_path}...")
+        generate_csv(csv_path, args.rows)
+
+    results = []
+    for importer in args.importers.split(','):
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.import_bench', '--run', importer, '--csv', csv_path],
+            cwd=SERVER_DIR, capture_output=True, text=True, check=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"{'importer':<10} {'rows':>9} {'seconds':>9} {'rows/sec':>10} {'peak MB':>9}")
+    for result in results:
+        print(f"{result['importer']:<10} {result['rows']:>9} {result['seconds']:>9.1f} "
+              f"{result['rows'] / result['seconds']:>10,.0f} {result['peak_rss_mb']:>9.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""Local load driver: latency percentiles and queries per request by endpoint.
+
+    python -m benchmarks.load --size 10k --requests 5000 --threads 8 --output load.json
+
+Imports a synthetic catalog into a fresh test database and runs a weighted
+mix of catalog, search, facet, batch, similar, finder and favorites requests
+through the full Django stack from --threads threads. The response cache
+stays on as in production unless --no-response-cache is given. For each
+endpoint it prints request and error counts, p50/p95/p99 latency and the
+average number of SQL queries per request. --output writes the same
+numbers as JSON, and --compare diffs them against an earlier file.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+SEARCH_TERMS = ['acer', 'acer nitro', 'ryzen 7', 'rtx', 'core i7', 'aspire', 'hp', 'gaming', 'lenov', 'thinkpad']
+BRANDS = ['Acer', 'HP', 'Dell', 'Lenovo', 'Asus', 'ACEMAGIC']
+
+
+def endpoint_mix(pks):
+    """(name, weight, method, request builder) for each endpoint in the mix"""
+    def pick(rng, values):
+        return values[rng.integers(len(values))]
+
+    return [
+        ('list', 25, 'get', lambda rng: (f'/server/api/laptops/?page={rng.integers(1, 20)}', None)),
+        ('list filtered', 15, 'get', lambda rng: (
+            f'/server/api/laptops/?brand={pick(rng, BRANDS)}&max_price={pick(rng, [20000, 30000, 50000])}', None)),
+        ('search', 15, 'get', lambda rng: (f'/server/api/laptops/?search={pick(rng, SEARCH_TERMS)}', None)),
+        ('detail', 15, 'get', lambda rng: (f'/server/api/laptops/{pick(rng, pks)}/', None)),
+        ('facets', 10, 'get', lambda rng: (f'/server/api/laptops/facets/?brand={pick(rng, BRANDS)}', None)),
+        ('batch', 5, 'get', lambda rng: (
+            '/server/api/laptops/batch/?ids=' + ','.join(str(pick(rng, pks)) for _ in range(10)), None)),
+        ('similar', 5, 'get', lambda rng: (f'/server/api/laptops/{pick(rng, pks)}/similar/', None)),
+        ('finder', 5, 'post', lambda rng: ('/server/api/laptops/finder/', {
+            'price_max': pick(rng, [25000, 40000, 60000]), 'ram': pick(rng, [8, 16, 32]), 'limit': 10})),
+        ('favorites ids', 10, 'get', lambda rng: ('/server/api/favorites/laptop_ids/', None)),
+    ]
+
+
+def worker(number, mix, user, remaining, lock, samples, seed):
+    from django.db import connection
+    from rest_framework.test import APIClient
+    from benchmarks.micro import count_queries
+
+    rng = np.random.default_rng([seed, number])
+    weights = np.array([weight for _, weight, _, _ in mix], dtype=float)
+    weights /= weights.sum()
+    client = APIClient()
+    client.force_authenticate(user)
+    try:
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            name, _, method, build = mix[rng.choice(len(mix), p=weights)]
+            path, data = build(rng)
+            response = {}
+
+            def call():
+                response['status'] = getattr(client, method)(path, data, format='json').status_code
+
+            started = time.perf_counter()
+            queries = count_queries(call)
+            samples[name].append((time.perf_counter() - started, queries, response['status'] >= 400))
+    finally:
+        connection.close()
+
+
+def summarize(samples):
+    results = {}
+    for name, values in sorted(samples.items()):
+        latencies = np.array([latency for latency, _, _ in values]) * 1000
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        results[name] = {
+            'requests': len(values),
+            'errors': sum(error for _, _, error in values),
+            'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99,
+            'queries_per_request': float(np.mean([queries for _, queries, _ in values])),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', default='10k', help='catalog size: 10k, 100k, 1m or a row count')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--no-response-cache', action='store_true')
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--compare', help='an earlier --output file to compare against')
+    args = parser.parse_args()
+
+    sys.path.insert(0, SERVER_DIR)
+    import import_data
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from django.test.utils import override_settings
+    from api.favorites import apply_favorite_changes
+    from api.models import Laptop
+    from benchmarks.results import print_comparison, write_results
+    from benchmarks.synthetic import parse_size, write_csv
+
+    rows = parse_size(args.size)
+    connection.creation.create_test_db(verbosity=0)
+    import_data.import_csv(write_csv(os.path.join(tempfile.mkdtemp(), 'load_catalog.csv'), rows, args.seed))
+    pks = list(Laptop.objects.values_list('pk', flat=True)[:2000])
+    user = User.objects.create_user('load', password='load')
+    apply_favorite_changes(user.id, pks[:20], [])
+
+    samples = defaultdict(list)
+    remaining = [args.requests]
+    lock = threading.Lock()
+    mix = endpoint_mix(pks)
+    with override_settings(CATALOG_RESPONSE_CACHE_ENABLED=not args.no_response_cache, ALLOWED_HOSTS=['*']):
+        threads = [threading.Thread(target=worker, args=(number, mix, user, remaining, lock, samples, args.seed))
+                   for number in range(args.threads)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+    results = summarize(samples)
+    print(f"\n{args.requests} requests over {rows} laptops from {args.threads} threads: "
+          f"{args.requests / elapsed:,.0f} requests/sec")
+    print(f"{'endpoint':<16} {'requests':>8} {'errors':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8}")
+    for name, values in results.items():
+        print(f"{name:<16} {values['requests']:>8} {values['errors']:>6} {values['p50_ms']:>8.1f} "
+              f"{values['p95_ms']:>8.1f} {values['p99_ms']:>8.1f} {values['queries_per_request']:>8.2f}")
+
+    settings = {'rows': rows, 'seed': args.seed, 'requests': args.requests, 'threads': args.threads,
+                'response_cache': not args.no_response_cache}
+    if args.output:
+        write_results(args.output, 'load', settings, results)
+    if args.compare:
+        print_comparison(args.compare, results, 'p99_ms')
+
+
+if __name__ == '__main__':
+    main()
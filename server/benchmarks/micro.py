@@ -0,0 +1,151 @@
+"""Micro-benchmarks for the catalog read path, favorites and the importer.
+
+    python -m benchmarks.micro --size 10k --output micro.json [--compare old.json]
+
+Imports a synthetic catalog (see benchmarks.synthetic) into a fresh test
+database and times filters (ORM and catalog engine), search,
+serialization, pagination (page numbers and keyset cursors), favorites and
+a full plus incremental import. Each case prints its best and median time
+and the SQL queries it ran. The response cache is off, so every call does
+the real work. --output writes the results as JSON, and --compare prints
+the change against an earlier file.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+FILTER_QUERY = 'brand=Acer,HP,Dell&min_price=10000&max_price=40000&processor=intel&page_size=20'
+SEARCH_QUERY = 'search=acer aspire ryzen&page_size=20'
+
+
+def count_queries(func):
+    """Call func and return how many SQL statements it ran on this thread's connection.
+
+    An execute wrapper rather than CaptureQueriesContext, whose log the test
+    client's request_started signal resets mid-request.
+    """
+    from django.db import connection
+
+    count = 0
+
+    def counter(execute, sql, params, many, context):
+        nonlocal count
+        count += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(counter):
+        func()
+    return count
+
+
+def measure(func, repeat):
+    """Return {best, median} milliseconds over repeat calls and the queries of a warm call"""
+    func()
+    queries = count_queries(func)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return {'best_ms': min(timings) * 1000, 'median_ms': statistics.median(timings) * 1000,
+            'queries': queries}
+
+
+def read_cases(client, user):
+    """(name, callable) pairs that leave the database unchanged"""
+    from django.test.utils import override_settings
+    from api.models import Laptop
+    from api.serializers import LaptopSerializer, laptop_rows
+
+    def get(path, engine=False):
+        def call():
+            with override_settings(CATALOG_ENGINE_ENABLED=engine):
+                response = client.get(path)
+            assert response.status_code == 200, (path, response.status_code)
+        return call
+
+    queryset = Laptop.objects.order_by(*Laptop._meta.ordering, 'pk')
+    # A cursor 50 pages in, to compare with ?page=50
+    cursor_page = client.get('/server/api/laptops/?pagination=cursor&page_size=20').json()
+    for _ in range(49):
+        cursor_page = client.get(cursor_page['next']).json()
+    deep_cursor = cursor_page['next']
+    favorite = Laptop.objects.order_by('pk').values_list('pk', flat=True)[Laptop.objects.count() // 2]
+
+    def toggle_twice():
+        for _ in range(2):
+            assert client.post('/server/api/favorites/toggle/', {'laptop_id': favorite},
+                               format='json').status_code in (200, 201)
+
+    return [
+        ('filters orm', get(f'/server/api/laptops/?{FILTER_QUERY}')),
+        ('filters engine', get(f'/server/api/laptops/?{FILTER_QUERY}', engine=True)),
+        ('search orm', get(f'/server/api/laptops/?{SEARCH_QUERY}')),
+        ('search engine', get(f'/server/api/laptops/?{SEARCH_QUERY}', engine=True)),
+        ('facets', get('/server/api/laptops/facets/?brand=Acer')),
+        ('serialize model', lambda: LaptopSerializer(list(queryset[:100]), many=True).data),
+        ('serialize rows', lambda: laptop_rows.many(laptop_rows.values(queryset)[:100])),
+        ('paginate page 50', get('/server/api/laptops/?page=50&page_size=20')),
+        ('paginate cursor 50', get(deep_cursor)),
+        ('favorites toggle x2', toggle_twice),
+        ('favorites ids', get('/server/api/favorites/laptop_ids/')),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', default='10k', help='catalog size: 10k, 100k, 1m or a row count')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--compare', help='an earlier --output file to compare against')
+    args = parser.parse_args()
+
+    sys.path.insert(0, SERVER_DIR)
+    import import_data
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from django.test.utils import override_settings
+    from rest_framework.test import APIClient
+    from benchmarks.results import print_comparison, write_results
+    from benchmarks.synthetic import parse_size, write_csv
+
+    rows = parse_size(args.size)
+    connection.creation.create_test_db(verbosity=0)
+    csv_path = write_csv(os.path.join(tempfile.mkdtemp(), 'micro_catalog.csv'), rows, args.seed)
+
+    results = {}
+    started = time.perf_counter()
+    import_data.import_csv(csv_path)
+    results['import full'] = {'best_ms': (time.perf_counter() - started) * 1000}
+    started = time.perf_counter()
+    import_data.import_csv(csv_path, incremental=True)
+    results['import unchanged'] = {'best_ms': (time.perf_counter() - started) * 1000}
+
+    user = User.objects.create_user('bench', password='bench')
+    client = APIClient()
+    client.force_authenticate(user)
+    with override_settings(CATALOG_RESPONSE_CACHE_ENABLED=False, ALLOWED_HOSTS=['*']):
+        for name, func in read_cases(client, user):
+            results[name] = measure(func, args.repeat)
+
+    print(f"\n{rows} laptops, best of {args.repeat}")
+    print(f"{'name':<24} {'best ms':>10} {'median ms':>10} {'queries':>8}")
+    for name, values in results.items():
+        median = values.get('median_ms')
+        print(f"{name:<24} {values['best_ms']:>10.2f} {'' if median is None else f'{median:.2f}':>10} "
+              f"{values.get('queries', ''):>8}")
+
+    if args.output:
+        write_results(args.output, 'micro', {'rows': rows, 'seed': args.seed, 'repeat': args.repeat}, results)
+    if args.compare:
+        print_comparison(args.compare, results, 'best_ms')
+
+
+if __name__ == '__main__':
+    main()
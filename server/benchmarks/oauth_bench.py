@@ -0,0 +1,111 @@
+"""Measure Google login throughput against a local stub of Google's endpoints.
+
+    python -m benchmarks.oauth_bench --logins 500 --concurrency 50 --latency 0.1
+
+Starts a stub token/userinfo server that answers after --latency seconds,
+points GoogleCallbackView at it, and drives --logins concurrent callback
+requests through the async view on a fresh test database. Every fifth
+login reuses a username from another domain, so username collisions are
+exercised too. Prints logins/sec and the error count.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+class StubServer(ThreadingHTTPServer):
+    # The default backlog of 5 resets connections under a burst of logins
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+def make_stub_handler(latency):
+    class StubGoogleHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def send_json(self, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            form = parse_qs(self.rfile.read(int(self.headers['Content-Length'])).decode())
+            time.sleep(latency)
+            self.send_json({'access_token': f"token-{form['code'][0]}", 'token_type': 'Bearer'})
+
+        def do_GET(self):
+            code = self.headers['Authorization'].rsplit('token-', 1)[1]
+            time.sleep(latency)
+            number = int(code)
+            # Every fifth login collides with an earlier username on another domain
+            local = f'user{number - 1}' if number % 5 == 0 and number else f'user{number}'
+            self.send_json({'email': f'{local}@{"other" if number % 5 == 0 else "example"}.com'})
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubGoogleHandler
+
+
+async def drive(logins, concurrency):
+    from django.test import AsyncClient
+
+    client = AsyncClient()
+    semaphore = asyncio.Semaphore(concurrency)
+    errors = 0
+
+    async def login(number):
+        nonlocal errors
+        async with semaphore:
+            response = await client.get('/server/api/auth/google/callback/', {'code': str(number)})
+            if response.status_code != 302:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(login(number) for number in range(logins)))
+    return time.perf_counter() - started, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--logins', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.1, help='stub response delay in seconds')
+    args = parser.parse_args()
+
+    sys.path.insert(0, SERVER_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'laptopfinder.settings')
+    import django
+    django.setup()
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from django.test.utils import override_settings
+
+    stub = StubServer(('127.0.0.1', 0), make_stub_handler(args.latency))
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{stub.server_address[1]}'
+
+    connection.creation.create_test_db(verbosity=0)
+    with override_settings(GOOGLE_OAUTH_TOKEN_URL=f'{base_url}/token',
+                           GOOGLE_OAUTH_USERINFO_URL=f'{base_url}/userinfo',
+                           ALLOWED_HOSTS=['*']):
+        elapsed, errors = asyncio.run(drive(args.logins, args.concurrency))
+    stub.shutdown()
+
+    print(f"{args.logins} logins in {elapsed:.2f}s: {args.logins / elapsed:,.1f} logins/sec, "
+          f"{errors} errors, {User.objects.count()} users created")
+
+
+if __name__ == '__main__':
+    main()
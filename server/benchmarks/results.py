@@ -0,0 +1,48 @@
+"""JSON result files for the benchmark suite, so runs can be diffed between commits"""
+import datetime
+import json
+import os
+import platform
+import subprocess
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SERVER_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(path, benchmark, settings, results):
+    """Write {name: {metric: value}} results with enough context to compare runs"""
+    payload = {
+        'benchmark': benchmark,
+        'commit': git_commit(),
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'settings': settings,
+        'results': results,
+    }
+    with open(path, 'w') as output:
+        json.dump(payload, output, indent=2, sort_keys=True)
+        output.write('\n')
+
+
+def print_comparison(baseline_path, results, metric):
+    """Print metric per result next to the same metric from an earlier results file"""
+    with open(baseline_path) as baseline_file:
+        baseline = json.load(baseline_file)
+    print(f"\n{metric} vs {baseline_path} (commit {baseline.get('commit')}):")
+    print(f"{'name':<24} {'before':>10} {'after':>10} {'change':>8}")
+    for name, values in results.items():
+        before = baseline['results'].get(name, {}).get(metric)
+        after = values.get(metric)
+        if before is None or after is None:
+            print(f"{name:<24} {'-' if before is None else f'{before:.3f}':>10} "
+                  f"{'-' if after is None else f'{after:.3f}':>10}")
+            continue
+        change = f"{(after - before) / before:+.0%}" if before else '-'
+        print(f"{name:<24} {before:>10.3f} {after:>10.3f} {change:>8}")
@@ -0,0 +1,72 @@
+"""Compare the ModelSerializer read path with the .values() row serializer.
+
+    python -m benchmarks.serializer_bench --rows 20000
+
+Loads a generated catalog into a fresh test database, then times fetching
+and serializing a list page (model instances + LaptopSerializer against
+.values() + RowSerializer) and rendering it (JSONRenderer against
+ORJSONRenderer), and prints the per-row cost of each step.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--page-sizes', default='20,100,1000')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    sys.path.insert(0, SERVER_DIR)
+    import import_data
+    from django.db import connection
+    from rest_framework.renderers import JSONRenderer
+    from api.models import Laptop
+    from api.renderers import ORJSONRenderer
+    from api.serializers import LaptopSerializer, laptop_rows
+    from benchmarks.import_bench import generate_csv
+
+    connection.creation.create_test_db(verbosity=0)
+    csv_path = os.path.join(tempfile.mkdtemp(), 'bench_laptops.csv')
+    generate_csv(csv_path, args.rows)
+    import_data.import_csv(csv_path)
+    queryset = Laptop.objects.order_by(*Laptop._meta.ordering, 'pk')
+
+    print(f"{'page':>6} {'step':<10} {'before us/row':>14} {'after us/row':>12} {'speedup':>8}")
+    for size in (int(size) for size in args.page_sizes.split(',')):
+        before_data = LaptopSerializer(list(queryset[:size]), many=True).data
+        after_data = laptop_rows.many(laptop_rows.values(queryset)[:size])
+        before_bytes = JSONRenderer().render(before_data)
+        assert before_bytes == ORJSONRenderer().render(after_data), 'outputs differ'
+
+        steps = [
+            ('serialize',
+             lambda: LaptopSerializer(list(queryset[:size]), many=True).data,
+             lambda: laptop_rows.many(laptop_rows.values(queryset)[:size])),
+            ('render',
+             lambda: JSONRenderer().render(before_data),
+             lambda: ORJSONRenderer().render(after_data)),
+        ]
+        for step, before, after in steps:
+            before_time = best_of(args.repeat, before) / size * 1e6
+            after_time = best_of(args.repeat, after) / size * 1e6
+            print(f"{size:>6} {step:<10} {before_time:>14.1f} {after_time:>12.1f} {before_time / after_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
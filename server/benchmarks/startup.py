@@ -0,0 +1,128 @@
+"""Cold-start cost of a worker: import time and time to first response.
+
+    python -m benchmarks.startup --runs 5 --output startup.json [--compare old.json]
+
+Each run starts a fresh interpreter that sets up Django, creates a
+throwaway test database and serves one WSGI request, the way a newly
+forked worker does. It reports the time spent in django.setup(), in the
+first request (which imports the URLconf and every view module it pulls
+in) and in a second request for comparison, as medians over --runs. One
+more run under ``python -X importtime`` lists the packages that cost the
+most to import during setup and the first request. --warm-up calls
+api.lazy.warm_up() before the first request, to see what the lazily
+loaded views add.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_PATH = '/server/api/laptops/?page_size=20'
+
+# Runs in the child interpreter; prints one JSON line of timings
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+setup_done = time.perf_counter()
+
+from django.db import connection
+connection.creation.create_test_db(verbosity=0)
+from django.test.utils import setup_test_environment
+setup_test_environment()
+if {warm_up!r}:
+    from api.lazy import warm_up
+    warm_up()
+
+from django.core.wsgi import get_wsgi_application
+from django.test.client import RequestFactory
+
+def serve():
+    begun = time.perf_counter()
+    handler = get_wsgi_application()
+    statuses = []
+    environ = RequestFactory().get({path!r}).environ
+    b''.join(handler(environ, lambda status, headers: statuses.append(status)))
+    return statuses[0], (time.perf_counter() - begun) * 1000
+
+first_status, first_ms = serve()
+second_status, second_ms = serve()
+print(json.dumps({{
+    'setup_ms': (setup_done - started) * 1000, 'first_response_ms': first_ms, 'second_response_ms': second_ms,
+    'status': first_status, 'modules': len(sys.modules),
+}}))
+"""
+
+
+def run_child(path, warm_up, importtime=False):
+    """Start one interpreter; return (timings, stderr)"""
+    command = [sys.executable, *(['-X', 'importtime'] if importtime else []),
+               '-c', CHILD.format(path=path, warm_up=warm_up)]
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, [SERVER_DIR, os.environ.get('PYTHONPATH')]))}
+    env.setdefault('DJANGO_SETTINGS_MODULE', 'laptopfinder.settings')
+    result = subprocess.run(command, cwd=SERVER_DIR, env=env, capture_output=True, text=True)
+    if result.returncode:
+        sys.exit(f"Worker run failed:\n{result.stderr[-3000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def import_costs(stderr):
+    """Self import time in milliseconds per top-level package from -X importtime output"""
+    costs = defaultdict(float)
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        costs[name.strip().split('.')[0]] += int(self_us) / 1000
+    return costs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--path', default=DEFAULT_PATH, help='request to time')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help='packages to list by import time')
+    parser.add_argument('--warm-up', action='store_true', help='load lazy views before the first request')
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--compare', help='an earlier --output file to compare against')
+    args = parser.parse_args()
+
+    sys.path.insert(0, SERVER_DIR)
+    from benchmarks.results import print_comparison, write_results
+
+    runs = [run_child(args.path, args.warm_up)[0] for _ in range(args.runs)]
+    timings, stderr = run_child(args.path, args.warm_up, importtime=True)
+    costs = sorted(import_costs(stderr).items(), key=lambda item: -item[1])
+
+    results = {name: {'median_ms': statistics.median(run[name] for run in runs),
+                      'best_ms': min(run[name] for run in runs)}
+               for name in ('setup_ms', 'first_response_ms', 'second_response_ms')}
+    results['cold_start_ms'] = {
+        'median_ms': statistics.median(run['setup_ms'] + run['first_response_ms'] for run in runs),
+        'best_ms': min(run['setup_ms'] + run['first_response_ms'] for run in runs),
+    }
+    results['imports'] = {'total_ms': sum(cost for _, cost in costs), 'modules': timings['modules']}
+
+    print(f"\nGET {args.path} (status {timings['status']}), median of {args.runs} fresh interpreters")
+    print(f"{'phase':<20} {'median ms':>10} {'best ms':>10}")
+    for name in ('setup_ms', 'first_response_ms', 'second_response_ms', 'cold_start_ms'):
+        print(f"{name[:-3]:<20} {results[name]['median_ms']:>10.1f} {results[name]['best_ms']:>10.1f}")
+    print(f"\n{timings['modules']} modules loaded, {results['imports']['total_ms']:.0f} ms importing; "
+          f"top {args.top} packages by self import time:")
+    for name, cost in costs[:args.top]:
+        print(f"  {name:<28} {cost:>8.1f} ms")
+
+    settings = {'path': args.path, 'runs': args.runs, 'warm_up': args.warm_up}
+    if args.output:
+        write_results(args.output, 'startup', settings, results)
+    if args.compare:
+        print_comparison(args.compare, results, 'median_ms')
+
+
+if __name__ == '__main__':
+    main()
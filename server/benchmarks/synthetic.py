@@ -0,0 +1,146 @@
+"""Seeded synthetic laptop catalogs shaped like src/data/data.json.
+
+    python -m benchmarks.synthetic --size 100k --out /tmp/catalog_100k.csv
+
+Columns are sampled independently from the sample catalog's value
+distributions, so the generated catalog has far more distinct brand,
+processor, GPU, RAM, storage and screen combinations than the 99-row
+sample. Processor and GPU stay paired the way they appear in real
+listings, and prices follow the specs with some noise. Storage, RAM,
+screen size and price are written in the same mix of messy formats the
+importer sees in seller feeds ("1TB", "512 GB", '15.6"', "EGY 41950",
+...), including a small share it can't parse. The same seed and size
+always give the same file. Large catalogs are written in chunks, so
+--size 1m needs no more memory than 100k.
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SAMPLE_DATA = os.path.join(SERVER_DIR, '..', 'src', 'data', 'data.json')
+
+CATALOG_SIZES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+CHUNK_SIZE = 100_000
+
+# Extra values so the generated catalog isn't limited to the sample's few brands and sizes
+EXTRA_BRANDS = ['Dell', 'Lenovo', 'Asus', 'MSI', 'Apple', 'Samsung', 'Microsoft', 'Razer', 'Gigabyte', 'Huawei']
+RAM_SIZES = [4, 8, 12, 16, 24, 32, 64]
+STORAGE_SIZES = [128, 256, 512, 1024, 2048, 4096]
+DISPLAY_SIZES = [11.6, 13.3, 13.6, 14, 14.5, 15.6, 16, 16.1, 17.3, 18]
+
+STORAGE_FORMATS = ['{gb}', '{gb}GB', '{gb} GB', '{gb}gb', '{tb}TB']
+RAM_FORMATS = ['{gb}', '{gb}GB', '{gb} GB', '{gb}GB DDR5']
+DISPLAY_FORMATS = ['{inches}', '{inches}"', '{inches} inch', '{inches}-inch', '{inches} Inches']
+# Share of storage and price values the importer can't parse
+UNPARSEABLE_SHARE = 0.01
+
+
+def load_sample():
+    return pd.read_json(SAMPLE_DATA, dtype=False)
+
+
+def _pick(rng, values, size, weights=None):
+    values = np.asarray(values, dtype=object)
+    if weights is not None:
+        weights = np.asarray(weights, dtype=float)
+        weights = weights / weights.sum()
+    return values[rng.choice(len(values), size=size, p=weights)]
+
+
+def _distribution(column, extra=()):
+    counts = column.dropna().astype(str).value_counts()
+    values = list(counts.index) + [value for value in extra if value not in counts.index]
+    weights = list(counts.values) + [counts.mean() if len(counts) else 1.0] * (len(values) - len(counts))
+    return values, weights
+
+
+def _format(templates, **columns):
+    return np.array([template.format(**{name: column[i] for name, column in columns.items()})
+                     for i, template in enumerate(templates)], dtype=object)
+
+
+def generate_chunk(sample, start, rows, seed=0):
+    """Generate catalog rows start..start + rows as a data.json-shaped DataFrame"""
+    rng = np.random.default_rng([seed, start])
+    brands, brand_weights = _distribution(sample['brand'], EXTRA_BRANDS)
+    brand = _pick(rng, brands, rows, brand_weights)
+    sellers, seller_weights = _distribution(sample['seller'])
+
+    templates = sample.iloc[rng.integers(0, len(sample), rows)].reset_index(drop=True)
+    chips = sample[['processor', 'graphics']].iloc[rng.integers(0, len(sample), rows)].reset_index(drop=True)
+    ram = _pick(rng, RAM_SIZES, rows, [1, 6, 2, 10, 2, 5, 1]).astype(int)
+    storage = _pick(rng, STORAGE_SIZES, rows, [2, 3, 10, 6, 2, 1]).astype(int)
+    inches = _pick(rng, DISPLAY_SIZES, rows, [1, 2, 1, 3, 1, 10, 5, 2, 2, 1]).astype(float)
+
+    numbers = np.arange(start, start + rows)
+    model = templates['model'].astype(str).to_numpy() + ' ' + (numbers % 997).astype(str)
+    name = (brand + ' ' + model + ', ' + chips['processor'].astype(str).to_numpy() + ', ' + ram.astype(str) + 'GB RAM, '
+            + storage.astype(str) + 'GB SSD, ' + np.array([f'{size:g}' for size in inches], dtype=object) + '" display')
+
+    # Price grows with the specs, with +-25% noise
+    price = (8000 + ram * 600 + storage * 8 + (inches - 11) * 500) * rng.uniform(0.75, 1.25, rows)
+    price_text = np.where(rng.random(rows) < 0.5,
+                          np.array([f'{value:,.0f}' for value in price], dtype=object),
+                          'EGY ' + np.round(price).astype(int).astype(str).astype(object))
+
+    storage_templates = _pick(rng, STORAGE_FORMATS, rows)
+    # Only whole terabytes are written in TB
+    storage_templates[(storage_templates == '{tb}TB') & (storage < 1024)] = '{gb}GB'
+    storage_text = _format(storage_templates, gb=storage, tb=[f'{size / 1024:g}' for size in storage])
+    unparseable = rng.random(rows) < UNPARSEABLE_SHARE
+    storage_text[unparseable] = 'N/A'
+    price_text[rng.random(rows) < UNPARSEABLE_SHARE] = 'Call for price'
+
+    return pd.DataFrame({
+        'id': [f'syn-{seed}-{number}' for number in numbers],
+        'condition': _pick(rng, ['New', 'Used', 'Refurbished'], rows, [85, 5, 10]),
+        'seller': _pick(rng, sellers, rows, seller_weights),
+        'brand': brand,
+        'model': model,
+        'name': name,
+        'category': templates['category'].to_numpy(),
+        'processor': chips['processor'].to_numpy(),
+        'graphics': chips['graphics'].to_numpy(),
+        'ram': _format(_pick(rng, RAM_FORMATS, rows), gb=ram),
+        'storage': storage_text,
+        'display': [f'{size:g} inches' for size in inches],
+        'display_size': _format(_pick(rng, DISPLAY_FORMATS, rows), inches=[f'{size:g}' for size in inches]),
+        'display_resolution': templates['display_resolution'].to_numpy(),
+        'product_url': [f'https://example.com/laptops/{number}' for number in numbers],
+        'price': price_text,
+        'image_url': templates['image_url'].to_numpy(),
+        'in_stock': _pick(rng, ['in stock', 'out of stock'], rows, [88, 12]),
+    })
+
+
+def write_csv(path, rows, seed=0, chunk_size=CHUNK_SIZE):
+    """Write a rows-long synthetic catalog to path with the importer's Title Case headers"""
+    sample = load_sample()
+    for start in range(0, rows, chunk_size):
+        df = generate_chunk(sample, start, min(chunk_size, rows - start), seed)
+        df.columns = [col.replace('_', ' ').title() for col in df.columns]
+        df.to_csv(path, index=False, mode='w' if start == 0 else 'a', header=start == 0)
+    return path
+
+
+def parse_size(value):
+    """'10k' / '100k' / '1m' or a plain row count"""
+    return CATALOG_SIZES.get(str(value).lower()) or int(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', default='10k', help='10k, 100k, 1m or a row count')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', required=True)
+    args = parser.parse_args()
+    rows = parse_size(args.size)
+    write_csv(args.out, rows, args.seed)
+    print(f"Wrote {rows} laptops to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
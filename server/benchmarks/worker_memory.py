@@ -0,0 +1,105 @@
+"""Compare gunicorn worker memory and boot time with and without preloading.
+
+    python -m benchmarks.worker_memory --workers 4 --requests 50
+
+Starts gunicorn twice against the configured database, once with
+GUNICORN_PRELOAD=0 and once with the default preloaded, warmed master. For
+each run it prints the time until the first catalog page is served, the
+time until every worker has answered, and per-worker RSS and PSS after
+--requests catalog requests. PSS splits shared pages between the processes
+sharing them, so it shows what each worker really adds.
+"""
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import time
+import urllib.request
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+CATALOG_PATH = '/server/api/laptops/?page_size=20'
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def memory_kb(pid):
+    """(RSS, PSS) of a process in kB"""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as smaps:
+        for line in smaps:
+            key, _, rest = line.partition(':')
+            if key in ('Rss', 'Pss'):
+                values[key] = int(rest.split()[0])
+    return values['Rss'], values['Pss']
+
+
+def children(pid):
+    found = []
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/stat') as stat:
+                    if int(stat.read().rsplit(')', 1)[1].split()[1]) == pid:
+                        found.append(int(entry))
+            except OSError:
+                pass
+    return found
+
+
+def get(url):
+    try:
+        with urllib.request.urlopen(url, timeout=30) as response:
+            response.read()
+            return response.status
+    except OSError:
+        return None
+
+
+def run(preload, workers, requests):
+    port = free_port()
+    url = f'http://127.0.0.1:{port}{CATALOG_PATH}'
+    env = dict(os.environ, GUNICORN_PRELOAD='1' if preload else '0', WEB_CONCURRENCY=str(workers))
+    started = time.perf_counter()
+    master = subprocess.Popen(
+        ['gunicorn', 'laptopfinder.wsgi', '--bind', f'127.0.0.1:{port}'],
+        cwd=SERVER_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while get(url) != 200:
+            if master.poll() is not None:
+                raise SystemExit('gunicorn exited during startup')
+            time.sleep(0.05)
+        first = time.perf_counter() - started
+        # Keep requesting until every worker has served (and so built) the catalog
+        for _ in range(max(requests, workers * 10)):
+            get(url)
+        warm = time.perf_counter() - started
+        memory = [memory_kb(pid) for pid in children(master.pid)]
+        return first, warm, memory_kb(master.pid), memory
+    finally:
+        master.send_signal(signal.SIGTERM)
+        master.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=50)
+    args = parser.parse_args()
+
+    for preload in (False, True):
+        first, warm, (master_rss, master_pss), memory = run(preload, args.workers, args.requests)
+        print(f"{'preload' if preload else 'per-worker'}: first response {first:.2f}s, "
+              f"all workers warm {warm:.2f}s, master RSS {master_rss / 1024:.0f}MB")
+        for number, (rss, pss) in enumerate(memory):
+            print(f"  worker {number}: RSS {rss / 1024:.0f}MB, PSS {pss / 1024:.0f}MB")
+        print(f"  total worker PSS {sum(pss for _, pss in memory) / 1024:.0f}MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Gunicorn settings, picked up from the working directory the Procfile starts in.
+
+The app is preloaded and the catalog engine, search index and similar
+laptops table are built in the master before any worker is forked, so
+workers start warm and share those pages copy-on-write instead of each
+building (and holding) its own copy. Set GUNICORN_PRELOAD=0 to go back to per-worker loading.
+
+SERVER_MODE=asgi serves laptopfinder.asgi with uvicorn workers instead of
+sync WSGI workers, so requests waiting on the LLM or Google don't each
+hold a worker; per-prefix limits live in api/concurrency.py.
+
+The finder and chatbot views load their heavy modules on first use (see
+api/lazy.py); with LAZY_VIEWS_WARMUP set, each worker loads them in a
+background thread once it has started.
+
+With more than one worker, the catalog cache (CACHES['catalog'], or the
+default cache) must be shared, e.g. Redis or Memcached; startup fails
+otherwise, see api.catalog.require_shared_catalog_cache.
+
+With METRICS_ENABLED, set PROMETHEUS_MULTIPROC_DIR so /metrics adds up
+every worker's values; it is emptied on startup and dead workers are
+dropped from it.
+"""
+import gc
+import os
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') != '0'
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+
+if os.environ.get('SERVER_MODE') == 'asgi':
+    wsgi_app = 'laptopfinder.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'laptopfinder.wsgi'
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    from django.core.cache import caches
+    from django.db import DatabaseError, connections
+    from api.catalog_engine import catalog_engine_enabled, get_catalog_engine
+    from api.search import get_search_index
+    from api.similar import get_similar_index
+
+    try:
+        if catalog_engine_enabled():
+            get_catalog_engine()
+        get_search_index()
+        get_similar_index()
+    except DatabaseError as e:
+        # Workers fall back to building lazily, e.g. before the first migrate
+        server.log.warning("Skipping catalog warm-up: %s", e)
+    finally:
+        # Sockets must not be shared with the forked workers
+        connections.close_all()
+        caches.close_all()
+    # Keep the collector from touching (and so copying) the warmed objects in every worker
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    from api.lazy import start_background_warm_up
+    start_background_warm_up()
+
+
+def on_starting(server):
+    if server.cfg.workers > 1:
+        import django
+        from django.apps import apps
+        if not apps.ready:
+            # Without preload_app the master hasn't loaded the app
+            os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'laptopfinder.settings')
+            django.setup()
+        from api.catalog import require_shared_catalog_cache
+        require_shared_catalog_cache(server.cfg.workers)
+
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        # Leftovers from a previous run would be counted again
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.endswith('.db'):
+                os.remove(os.path.join(directory, name))
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -1,5 +1,8 @@
+import codecs
+import hashlib
 import os
 import sys
+import time
 import django
 import pandas as pd
 
@@ -10,129 +13,258 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'laptopfinder.settings')
 django.setup()
 
+from collections import Counter
+from django.db import connection, transaction
+from django.utils import timezone
 from api.models import Laptop
+from api.catalog import bump_catalog_version
+from api.signals import laptop_signals_disconnected
 
-def generate_id(laptop, index):
-    """Generate a unique ID for each laptop"""
-    brand = laptop.get('brand', '').lower().replace(' ', '-')
-    model = laptop.get('model', '').lower().replace(' ', '-')
-    return f"{brand}-{model}-{index}"
+# Rows parsed and normalized per pandas chunk, and rows per INSERT statement
+CHUNK_SIZE = 50000
+BATCH_SIZE = 2000
 
-def import_csv(csv_path):
-    """Import laptop data from CSV file"""
+# Candidate encodings, tried in order against a sample of the file
+ENCODINGS = ['utf-8', 'latin1', 'ISO-8859-1', 'cp1252']
+ENCODING_SAMPLE_BYTES = 1024 * 1024
+
+# Rename columns if needed to match model fields
+COLUMN_MAPPING = {
+    'displaysize': 'display_size',
+    'displayresolution': 'display_resolution',
+    'producturl': 'product_url',
+    'imageurl': 'image_url',
+    'instock': 'in_stock'
+}
+
+MODEL_FIELDS = {field.name for field in Laptop._meta.concrete_fields}
+# Fields rewritten when an incremental import finds a changed row
+UPDATE_FIELDS = [field.name for field in Laptop._meta.concrete_fields if not field.primary_key]
+
+def detect_encoding(csv_path, encodings=ENCODINGS):
+    """Return the first encoding that can decode a leading sample of the file"""
+    with open(csv_path, 'rb') as f:
+        sample = f.read(ENCODING_SAMPLE_BYTES)
+    for encoding in encodings:
+        try:
+            # Incremental decoding tolerates a multi-byte character cut at the end of the sample
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            print(f"Sample does not decode as {encoding}, trying next...")
+    raise Exception("Could not read CSV file with any of the attempted encodings")
+
+def _blank(column):
+    return column.isna() | (column.str.strip() == '')
+
+def _conversion_warnings(raw, failed, message):
+    warnings = [message.format(value=value, row=i) for i, value in raw[failed].head(5).items()]
+    if failed.sum() > 5:
+        warnings.append(f"...and {failed.sum() - 5} more rows in this chunk")
+    return warnings
+
+def normalize_chunk(df, offset):
+    """Apply the import normalization rules to one chunk with vectorized pandas ops.
+
+    offset is the chunk's first row number in the file, used for generated ids.
+    Returns (normalized frame, list of warning strings).
+    """
+    warnings = []
+
+    # Convert column names to snake_case to match model field names
+    df.columns = [col.lower().replace(' ', '_') for col in df.columns]
+    df = df.rename(columns=COLUMN_MAPPING)
+    df.index = pd.RangeIndex(offset, offset + len(df))
+
+    brand = df['brand'].fillna('') if 'brand' in df else pd.Series('', index=df.index)
+    model = df['model'].fillna('') if 'model' in df else pd.Series('', index=df.index)
+
+    # Generate ID if not present, as "<brand>-<model>-<row number>"
+    generated_ids = (brand.str.lower().str.replace(' ', '-') + '-' +
+                     model.str.lower().str.replace(' ', '-') + '-' + df.index.astype(str))
+    if 'id' in df:
+        df['id'] = df['id'].where(~_blank(df['id']), generated_ids)
+    else:
+        df['id'] = generated_ids
+
+    # Set name if not present
+    generated_names = brand + ' ' + model
+    if 'name' in df:
+        df['name'] = df['name'].where(~_blank(df['name']), generated_names)
+    else:
+        df['name'] = generated_names
+
+    # Convert in_stock to boolean format
+    if 'in_stock' in df:
+        df['in_stock'] = df['in_stock'].fillna('').str.lower().isin(['in stock', 'yes', '1'])
+
+    # Format storage values consistently: "512GB" -> "512.0", "1TB" -> "1024.0"
+    if 'storage' in df:
+        raw = df['storage'].fillna('').str.strip()
+        upper = raw.str.upper()
+        sizes = pd.to_numeric(upper.str.replace('TB', '').str.replace('GB', '').str.strip(), errors='coerce')
+        sizes = sizes.where(~upper.str.endswith('TB'), sizes * 1024)
+        failed = sizes.isna() & (raw != '')
+        warnings += _conversion_warnings(raw, failed, "Could not convert storage '{value}' for row {row}")
+        formatted = sizes.map(lambda size: f"{size:.1f}", na_action='ignore')
+        df['storage'] = formatted.where(sizes.notna(), df['storage'])
+
+    # Convert price to decimal, removing currency symbols, commas and EGY
+    if 'price' in df:
+        raw = df['price'].fillna('').str.strip()
+        cleaned = raw.str.replace('$', '', regex=False).str.replace(',', '', regex=False).str.replace('EGY', '', regex=False).str.strip()
+        prices = pd.to_numeric(cleaned, errors='coerce')
+        failed = prices.isna() & (raw != '')
+        warnings += _conversion_warnings(raw, failed, "Could not convert price '{value}' to decimal for row {row}")
+        prices[failed] = 0.0
+        df['price'] = prices
+
+    return df, warnings
+
+def row_hashes(df):
+    """SHA-1 of each normalized row's model fields, stable across imports"""
+    columns = sorted(column for column in df.columns if column in MODEL_FIELDS and column != 'row_hash')
+    joined = pd.Series(','.join(columns), index=df.index)
+    for column in columns:
+        joined = joined + '\x1f' + df[column].astype(object).where(df[column].notna(), '').astype(str)
+    return joined.map(lambda row: hashlib.sha1(row.encode()).hexdigest())
+
+def laptops_from_chunk(df):
+    """Build unsaved Laptop objects (with spec columns filled) from a normalized chunk"""
+    columns = [column for column in df.columns if column in MODEL_FIELDS]
+    records = df[columns].astype(object).where(df[columns].notna(), None).to_dict('records')
+    laptops = []
+    for record in records:
+        laptop = Laptop(**record)
+        # bulk_create skips save(), so fill the normalized spec columns here
+        laptop.populate_spec_columns()
+        laptops.append(laptop)
+    return laptops
+
+def read_chunks(csv_path, encoding, chunk_size):
+    return pd.read_csv(csv_path, encoding=encoding, dtype=str, chunksize=chunk_size)
+
+def import_csv(csv_path, chunk_size=CHUNK_SIZE, batch_size=BATCH_SIZE, incremental=False):
+    """Import laptop data from CSV file.
+
+    The file is streamed in chunks of chunk_size rows, each chunk is
+    normalized with vectorized pandas operations and written with batched
+    bulk_create, so memory stays bounded by the chunk size whatever the
+    size of the feed. The whole import runs in one transaction.
+
+    With incremental=True the catalog is not wiped first: rows are matched
+    by id and compared by row hash, so only new, changed and vanished rows
+    are written (and only favorites of vanished laptops are removed).
+    """
     try:
-        # Try different encodings
-        encodings = ['utf-8', 'latin1', 'ISO-8859-1', 'cp1252']
-        
-        for encoding in encodings:
+        # Check if table exists
+        tables = connection.introspection.table_names()
+        if 'api_laptop' not in tables:
+            print("ERROR: api_laptop table not found in the database!")
+            print("Make sure you're using the correct database and migrations have been applied.")
+            return
+
+        encodings = ENCODINGS
+        while True:
+            encoding = detect_encoding(csv_path, encodings)
+            print(f"Reading CSV with {encoding} encoding...")
             try:
-                # Read CSV file with specific encoding
-                print(f"Trying to read CSV with {encoding} encoding...")
-                df = pd.read_csv(csv_path, encoding=encoding)
-                print(f"Successfully read CSV with {encoding} encoding")
+                # Deletes would bump the version once per row; it is bumped once below instead
+                with laptop_signals_disconnected():
+                    summary = _import_chunks(csv_path, encoding, chunk_size, batch_size, incremental)
                 break
             except UnicodeDecodeError:
-                print(f"Failed to read with {encoding} encoding, trying next...")
-                if encoding == encodings[-1]:
-                    raise Exception("Could not read CSV file with any of the attempted encodings")
-        
-        # Convert column names to snake_case to match model field names
-        df.columns = [col.lower().replace(' ', '_') for col in df.columns]
-        
-        # Print column names for debugging
-        print("CSV columns:", df.columns.tolist())
-        
-        # Rename columns if needed to match model fields
-        column_mapping = {
-            'displaysize': 'display_size',
-            'displayresolution': 'display_resolution',
-            'producturl': 'product_url',
-            'imageurl': 'image_url',
-            'instock': 'in_stock'
-        }
-        
-        df = df.rename(columns=column_mapping)
-        
-        # Check if table exists
-        from django.db import connection
-        with connection.cursor() as cursor:
-            tables = connection.introspection.table_names()
-            print("Available tables:", tables)
-            if 'api_laptop' not in tables:
-                print("ERROR: api_laptop table not found in the database!")
-                print("Make sure you're using the correct database and migrations have been applied.")
-                return
-        
-        # Clear existing data
-        print("Deleting existing data...")
-        Laptop.objects.all().delete()
-        print("Previous data deleted")
-        
-        # Process each laptop record
-        laptops_to_create = []
-        for i, row in df.iterrows():
-            data = row.to_dict()
-            
-            # Generate ID if not present
-            if 'id' not in data or not data['id']:
-                data['id'] = generate_id(data, i)
-            
-            # Set name if not present
-            if 'name' not in data or not data['name']:
-                data['name'] = f"{data.get('brand', '')} {data.get('model', '')}"
-            
-            # Convert in_stock to boolean format
-            if 'in_stock' in data:
-                data['in_stock'] = str(data['in_stock']).lower() in ('in stock', 'yes', '1')
-            elif 'in stock' in data:
-                data['in_stock'] = str(data['in stock']).lower() in ('true', 'in stock', 'yes', '1')
-            
-            # Format storage values consistently
-            if 'storage' in data and data['storage']:
-                try:
-                    # Convert to float and then back to string with one decimal place
-                    storage_value = float(str(data['storage']).replace('GB', '').replace('TB', '1024').strip())
-                    data['storage'] = f"{storage_value:.1f}"
-                except (ValueError, TypeError):
-                    print(f"Warning: Could not convert storage '{data['storage']}' for row {i}")
-            
-            # Convert price to decimal if it's not already
-            if 'price' in data and not isinstance(data['price'], (int, float)):
-                try:
-                    # Remove currency symbols and commas
-                    price_str = str(data['price']).replace('$', '').replace(',', '').strip()
-                    
-                    # Check for EGY currency and convert to a float
-                    if 'EGY' in price_str:
-                        price_str = price_str.replace('EGY', '').strip()
-                    
-                    # Convert to float
-                    data['price'] = float(price_str)
-                except ValueError:
-                    print(f"Warning: Could not convert price '{data['price']}' to decimal for row {i}")
-                    data['price'] = 0.0
-            
-            # Create Laptop object
-            try:
-                laptops_to_create.append(Laptop(**data))
-            except Exception as e:
-                print(f"Error creating laptop from row {i}: {str(e)}")
-                print(f"Data: {data}")
-        
-        # Bulk create laptops
-        Laptop.objects.bulk_create(laptops_to_create)
-        print(f"{len(laptops_to_create)} laptops imported successfully")
-            
+                # Only the sample was checked; a later chunk failed, so retry from scratch
+                print(f"Failed to read with {encoding} encoding past the sample, trying next...")
+                encodings = encodings[encodings.index(encoding) + 1:]
+
+        # Bulk writes send no signals (and deletes had theirs disconnected), so invalidate catalog caches explicitly
+        if summary['inserted'] or summary['updated'] or summary['deleted']:
+            bump_catalog_version()
+        print(f"Import summary: {summary['inserted']} inserted, {summary['updated']} updated, "
+              f"{summary['deleted']} deleted, {summary['unchanged']} unchanged")
+        print(f"{summary['inserted'] + summary['updated'] + summary['unchanged']} laptops imported successfully")
+
     except Exception as e:
         print(f"Error importing data: {str(e)}")
         import traceback
         traceback.print_exc()
         sys.exit(1)
 
+def _apply_changes(laptops, stored_hashes, seen, summary, batch_size):
+    """Insert new and update changed laptops from one chunk, skipping unchanged ones"""
+    to_create = []
+    to_update = []
+    now = timezone.now()
+    for laptop in laptops:
+        if laptop.pk in seen:
+            summary['duplicate'] += 1
+            continue
+        seen.add(laptop.pk)
+        if laptop.pk not in stored_hashes:
+            to_create.append(laptop)
+        elif stored_hashes[laptop.pk] != laptop.row_hash:
+            # bulk_update skips auto_now
+            laptop.updated_at = now
+            to_update.append(laptop)
+        else:
+            summary['unchanged'] += 1
+    Laptop.objects.bulk_create(to_create, batch_size=batch_size)
+    Laptop.objects.bulk_update(to_update, UPDATE_FIELDS, batch_size=batch_size)
+    summary['inserted'] += len(to_create)
+    summary['updated'] += len(to_update)
+
+def _import_chunks(csv_path, encoding, chunk_size, batch_size, incremental=False):
+    started = time.monotonic()
+    total = 0
+    summary = Counter()
+    seen = set()
+    with transaction.atomic():
+        if incremental:
+            stored_hashes = dict(Laptop.objects.values_list('id', 'row_hash'))
+            print(f"Comparing against {len(stored_hashes)} stored laptops")
+        else:
+            # Clear existing data
+            print("Deleting existing data...")
+            Laptop.objects.all().delete()
+            print("Previous data deleted")
+
+        for chunk in read_chunks(csv_path, encoding, chunk_size):
+            df, warnings = normalize_chunk(chunk, total)
+            if total == 0:
+                print("CSV columns:", df.columns.tolist())
+                ignored = [col for col in df.columns if col not in MODEL_FIELDS]
+                if ignored:
+                    print(f"Ignoring columns without a matching Laptop field: {ignored}")
+
+            for warning in warnings:
+                print(f"Warning: {warning}")
+
+            df['row_hash'] = row_hashes(df)
+            laptops = laptops_from_chunk(df)
+            if incremental:
+                _apply_changes(laptops, stored_hashes, seen, summary, batch_size)
+            else:
+                Laptop.objects.bulk_create(laptops, batch_size=batch_size)
+                summary['inserted'] += len(laptops)
+            total += len(laptops)
+
+            elapsed = time.monotonic() - started
+            print(f"Processed {total} rows ({total / elapsed:,.0f} rows/sec)")
+
+        if incremental:
+            vanished = [pk for pk in stored_hashes if pk not in seen]
+            for start in range(0, len(vanished), batch_size):
+                Laptop.objects.filter(pk__in=vanished[start:start + batch_size]).delete()
+            summary['deleted'] = len(vanished)
+            if summary['duplicate']:
+                print(f"Warning: skipped {summary['duplicate']} rows with an id already seen in this file")
+    return summary
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python import_data.py <path_to_csv_file>")
+        print("Usage: python import_data.py <path_to_csv_file> [--incremental]")
         sys.exit(1)
-    
+
     csv_path = sys.argv[1]
-    import_csv(csv_path)
\ No newline at end of file
+    import_csv(csv_path, incremental='--incremental' in sys.argv[2:])
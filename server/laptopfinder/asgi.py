@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'laptopfinder.settings')
 
 application = get_asgi_application()
+
+# Imported after setup: the limiter reads its limits from settings
+from api.concurrency import ConcurrencyLimiter  # noqa: E402
+
+application = ConcurrencyLimiter(application)
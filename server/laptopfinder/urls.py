@@ -1,11 +1,16 @@
 from django.contrib import admin
 from django.urls import path, include
 from django.views.generic import RedirectView  # Add this import
+from api.metrics import metrics_view
+from api.profiling import profile_capture_download, profile_captures_view
 
 urlpatterns = [
+    path('admin/profiles/', admin.site.admin_view(profile_captures_view), name='profile_captures'),
+    path('admin/profiles/<str:name>', admin.site.admin_view(profile_capture_download), name='profile_capture'),
     path('admin/', admin.site.urls),
     path('server/api/', include('api.urls')),
     path('accounts/', include('allauth.urls')),
+    path('metrics', metrics_view, name='metrics'),
     
     path('', RedirectView.as_view(url='server/api/')),  # Redirect root to your API
 ]
\ No newline at end of file
@@ -1,6 +1,7 @@
 import { useNavigate,useLocation } from "react-router-dom";
 import { Heart, Menu, X } from "lucide-react";
 import { useState, useEffect } from "react";
+import { logoutUser } from "../services/api";
 
 // ]]import React, { useState, useEffect } from "react";
 
@@ -33,6 +34,7 @@ export const Header = ({
   }, []);
 
   const handleLogout = () => {
+    logoutUser();
     localStorage.removeItem('authToken');
     localStorage.removeItem('user');
     localStorage.removeItem('isLoggedIn');
@@ -1,5 +1,5 @@
 import React, { createContext, useState, useEffect, useContext } from 'react';
-import api from '../services/api';  // Use named import with curly braces
+import api, { logoutUser } from '../services/api';  // Use named import with curly braces
 
 interface User {
   id: number;
@@ -44,6 +44,7 @@ export const AuthProvider: React.FC<{ children: React.ReactNode }> = ({ children
   };
 
   const logout = () => {
+    logoutUser();
     localStorage.removeItem('authToken');
     localStorage.removeItem('user');
     localStorage.removeItem('isLoggedIn');
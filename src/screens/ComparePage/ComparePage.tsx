@@ -66,9 +66,14 @@ export const ComparePage = (): JSX.Element => {
           throw new Error('No product ID provided');
         }
         
-        const response1 = await fetch(`${API_BASE_URL}/laptops/${productId}`);
-        if (!response1.ok) throw new Error('Failed to fetch first product');
-        const product1Data = await response1.json();
+        // Fetch both laptops in a single round trip
+        const ids = secondProductId ? [productId, secondProductId] : [productId];
+        const response = await fetch(`${API_BASE_URL}/laptops/batch/?ids=${ids.map(encodeURIComponent).join(',')}`);
+        if (!response.ok) throw new Error('Failed to fetch products');
+        const { results } = await response.json();
+
+        const product1Data = results[0];
+        if (!product1Data) throw new Error('Failed to fetch first product');
         setProduct1({
           ...product1Data,
           imageUrl: product1Data.image_url,
@@ -77,9 +82,8 @@ export const ComparePage = (): JSX.Element => {
         });
 
         if (secondProductId) {
-          const response2 = await fetch(`${API_BASE_URL}/laptops/${secondProductId}`);
-          if (!response2.ok) throw new Error('Failed to fetch second product');
-          const product2Data = await response2.json();
+          const product2Data = results[1];
+          if (!product2Data) throw new Error('Failed to fetch second product');
           setProduct2({
             ...product2Data,
             imageUrl: product2Data.image_url,
@@ -27,6 +27,19 @@ api.interceptors.request.use(
 
 export default api;
 
+// Revoke the token server-side; reads it before the caller clears localStorage
+export const logoutUser = async () => {
+  const token = localStorage.getItem('authToken');
+  if (!token) {
+    return;
+  }
+  try {
+    await api.post('/auth/logout/', null, { headers: { Authorization: `Token ${token}` } });
+  } catch (error) {
+    console.error('Error logging out:', error);
+  }
+};
+
 // Now you can simplify your favorites functions
 export const getFavorites = async () => {
   try {
@@ -74,6 +87,17 @@ export const getFavoriteLaptopIds = async () => {
   }
 };
 
+// Apply several favorite changes in one request; removals are applied first
+export const syncFavorites = async (add: string[], remove: string[]) => {
+  try {
+    const response = await api.post('/favorites/bulk/', { add, remove });
+    return response.data;
+  } catch (error) {
+    console.error('Error syncing favorites:', error);
+    throw error;
+  }
+};
+
 // Keep your existing functions
 export const getLaptops = async (filters = {}) => {
   try {
@@ -95,6 +119,16 @@ export const getLaptopById = async (id: string) => {
   }
 };
 
+export const getLaptopsByIds = async (ids: string[]) => {
+  try {
+    const response = await api.post('/laptops/batch/', { ids });
+    return response.data;
+  } catch (error) {
+    console.error('Error fetching laptops by ids:', error);
+    throw error;
+  }
+};
+
 export const getBrands = async () => {
   try {
     const response = await api.get('/laptops/brands/');